@@ -10,14 +10,21 @@ from datetime import datetime
 
 import pdfplumber
 from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import PyPDF2
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.api.dependencies import get_db
-from app.services.ollama_service import OllamaClient
+from app.services.llm_fanout import gather_bounded
+from app.services.llm_resilience import LLMUnavailableError
+from app.services.llm_router import get_async_llm_router
+from app.services.ranking_lock import JobRankingLock, JobRankingLocked
+from app.services.ranking_runs import ACTIVE, get_ranking_runs, run_status
+from app.services.ranking_service import rank_job, sorted_results
+from app.services.ranking_stream import ranking_events
+from app.services.scoring_cascade import CascadeConfig
 from app.db import models
 from app.schemas import candidate as schemas
 
@@ -166,12 +173,12 @@ async def rank_resume(job_description: str, resume1: UploadFile = File(...), res
                 resume2_text += page.extract_text() + "\n"
         logger.info("Text extracted from resume2.")
 
-        # Initialize Ollama client
-        ollama_client = OllamaClient()
-        logger.info("Ollama client initialized.")
+        # Get the shared LLM client (routes each task to Ollama or the remote backend)
+        llm_client = get_async_llm_router()
+        logger.info("LLM client ready.")
         
         # Rank resumes using Ollama
-        analysis = ollama_client.rank_resumes(job_description, [resume1_text, resume2_text])
+        analysis = await llm_client.rank_resumes(job_description, [resume1_text, resume2_text])
         logger.info("Resume ranking completed with Ollama.")
         
         # If Ollama returned error or empty response, return appropriate message
@@ -365,23 +372,30 @@ async def match_with_budget(request: JobMatchRequest, db: Session = Depends(get_
             "max_budget": request.budget
         }
         
-        # Initialize Ollama client
-        ollama_client = OllamaClient()
+        # Get the shared LLM client (routes each task to Ollama or the remote backend)
+        llm_client = get_async_llm_router()
         
-        # Get candidate scores compared to job
-        jd_scores = {}
-        for candidate in candidates:
-            candidate_info = {
+        # Get candidate scores compared to job, several in flight at once
+        candidate_infos = [
+            {
                 "email": candidate.email,
                 "name": candidate.name,
                 "resume_text": candidate.resume_text,
                 "current_ctc": candidate.current_ctc,
                 "expected_ctc": candidate.expected_ctc
             }
-            jd_scores[candidate.email] = ollama_client.compare_candidate_with_jd(candidate_info, job_info)
+            for candidate in candidates
+        ]
+        scores = await gather_bounded(
+            candidate_infos,
+            lambda candidate_info: llm_client.compare_candidate_with_jd(candidate_info, job_info),
+            llm_client.scoring_concurrency(),
+            lambda candidate_info: 0.5,
+        )
+        jd_scores = {info["email"]: score for info, score in zip(candidate_infos, scores)}
         
         # Get comparative scores
-        comparative_scores = ollama_client.compare_candidates(candidates_info, job_info)
+        comparative_scores = await llm_client.compare_candidates(candidates_info, job_info)
         
         # Create analysis structure
         analysis = {
@@ -569,14 +583,15 @@ async def create_candidates_from_pdfs(
             with open(resume_path, 'wb') as f:
                 f.write(file_bytes)
             
-            # Extract email using Ollama LLM
+            # Extract email, name and other details using Ollama LLM in a single call
             email = None
+            details = {}
             try:
-                # Initialize Ollama client
-                ollama_client = OllamaClient()
+                # Get the shared LLM client (routes each task to Ollama or the remote backend)
+                llm_client = get_async_llm_router()
                 
-                # Extract email from resume text
-                email = ollama_client.extract_email_from_resume(text)
+                details = await llm_client.extract_candidate_details(text)
+                email = details.get('email')
                 logger.info(f"Email extracted by Ollama: {email}")
                 
                 # If Ollama couldn't extract an email, use a fallback method
@@ -613,17 +628,11 @@ async def create_candidates_from_pdfs(
                 email = f"{file.filename.replace('.pdf', '').lower()}@example.com"
                 logger.warning(f"Using fallback synthetic email due to error: {email}")
             
-            # Get candidate name from resume or use filename
+            # Get candidate name from the extracted details or use filename
             name = file.filename.replace('.pdf', '')
-            
-            # Try to extract more details with Ollama
-            try:
-                details = ollama_client.extract_candidate_details(text)
-                if details and 'fullName' in details and details['fullName']:
-                    name = details['fullName']
-                    logger.info(f"Name extracted by Ollama: {name}")
-            except Exception as e:
-                logger.error(f"Error extracting candidate details: {e}", exc_info=True)
+            if details.get('full_name'):
+                name = details['full_name']
+                logger.info(f"Name extracted by Ollama: {name}")
             
             # Create candidate
             new_candidate = models.Candidate(
@@ -744,15 +753,16 @@ async def process_and_match(
                 text = clean_text(text)
                 resume_texts.append(text)  # Store text for ranking
 
-                # Extract email using Ollama LLM
+                # Extract email, name and other details using Ollama LLM in a single call
                 email = None
                 synthetic = False
+                details = {}
                 try:
-                    # Initialize Ollama client
-                    ollama_client = OllamaClient()
+                    # Get the shared LLM client (routes each task to Ollama or the remote backend)
+                    llm_client = get_async_llm_router()
                     
-                    # Extract email from resume text
-                    email = ollama_client.extract_email_from_resume(text)
+                    details = await llm_client.extract_candidate_details(text)
+                    email = details.get('email')
                     logger.info(f"Email extracted by Ollama for {file.filename}: {email}")
                     
                     # If Ollama couldn't extract an email, use regex fallback
@@ -784,18 +794,11 @@ async def process_and_match(
                         detail=f"Could not extract or generate email for {file.filename}."
                     )
 
-                # Try to extract detailed candidate information using Ollama
+                # Use the extracted name if available
                 name = os.path.splitext(file.filename)[0]  # Default name from filename
-                try:
-                    # Extract candidate details
-                    details = ollama_client.extract_candidate_details(text)
-                    if details and isinstance(details, dict):
-                        # Extract name if available
-                        if 'fullName' in details and details['fullName']:
-                            name = details['fullName']
-                            logger.info(f"Name extracted by Ollama for {file.filename}: {name}")
-                except Exception as e:
-                    logger.error(f"Error extracting candidate details: {e}", exc_info=True)
+                if details.get('full_name'):
+                    name = details['full_name']
+                    logger.info(f"Name extracted by Ollama for {file.filename}: {name}")
 
                 # Check if candidate exists
                 candidate = db.query(models.Candidate).filter(models.Candidate.email == email).first()
@@ -883,14 +886,14 @@ async def process_and_match(
         """
 
         try:
-            # Initialize Ollama client
-            ollama_client = OllamaClient()
+            # Get the shared LLM client (routes each task to Ollama or the remote backend)
+            llm_client = get_async_llm_router()
             
             # Get resume texts for ranking
             resume_texts = [c.resume_text for c in candidates]
             
             # Use Ollama to rank resumes
-            ranking_analysis = ollama_client.rank_resumes(job_description, resume_texts)
+            ranking_analysis = await llm_client.rank_resumes(job_description, resume_texts)
             
             if not ranking_analysis or "error" in ranking_analysis:
                 raise HTTPException(
@@ -925,12 +928,16 @@ async def process_and_match(
         
         try:
             # Get comparative scores using Ollama
-            comparative_scores = ollama_client.compare_candidates(candidates_info, job_info)
+            comparative_scores = await llm_client.compare_candidates(candidates_info, job_info)
             
-            # Get individual JD match scores
-            jd_scores = {}
-            for candidate_info in candidates_info:
-                jd_scores[candidate_info["email"]] = ollama_client.compare_candidate_with_jd(candidate_info, job_info)
+            # Get individual JD match scores, several in flight at once
+            scores = await gather_bounded(
+                candidates_info,
+                lambda candidate_info: llm_client.compare_candidate_with_jd(candidate_info, job_info),
+                llm_client.scoring_concurrency(),
+                lambda candidate_info: 0.5,
+            )
+            jd_scores = {info["email"]: score for info, score in zip(candidates_info, scores)}
             
             # Build analysis structure
             analysis = {
@@ -1086,17 +1093,14 @@ async def extract_email_ollama(resume: UploadFile = File(...)):
         if not resume_text:
             return {"error": "Could not extract text from the resume"}
         
-        # Initialize Ollama client
-        ollama_client = OllamaClient()
-        
-        # Extract email
-        email = ollama_client.extract_email_from_resume(resume_text)
+        # Get the shared LLM client (routes each task to Ollama or the remote backend)
+        llm_client = get_async_llm_router()
         
-        # Extract full candidate details
-        details = ollama_client.extract_candidate_details(resume_text)
+        # Extract full candidate details, including the email, in one call
+        details = await llm_client.extract_candidate_details(resume_text)
         
         return {
-            "email": email,
+            "email": details.get("email"),
             "details": details,
             "text_sample": resume_text[:500] + "..." if len(resume_text) > 500 else resume_text
         }
@@ -1115,13 +1119,76 @@ class StatusUpdate(BaseModel):
     status: str  # "active", "saved", "rejected"
 
 
+def _ranking_cascade(
+    cascade: Optional[bool],
+    cascade_band_low: Optional[float],
+    cascade_band_high: Optional[float],
+    cascade_top_k: Optional[int],
+    batch_size: Optional[int],
+    concurrency: Optional[int],
+) -> Optional[CascadeConfig]:
+    """Validate rank-by-job parameters; returns the cascade to use, if any."""
+    if batch_size is not None and batch_size < 1:
+        raise HTTPException(status_code=400, detail="batch_size must be at least 1")
+    if concurrency is not None and concurrency < 1:
+        raise HTTPException(status_code=400, detail="concurrency must be at least 1")
+
+    use_cascade = bool(settings.LLM_CASCADE_MODEL) if cascade is None else cascade
+    if not use_cascade:
+        return None
+    if not settings.LLM_CASCADE_MODEL:
+        raise HTTPException(status_code=400, detail="Cascade requested but LLM_CASCADE_MODEL is not configured")
+    try:
+        return CascadeConfig(
+            band_low=cascade_band_low,
+            band_high=cascade_band_high,
+            top_k=cascade_top_k,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/rank-by-job/{job_id}")
-async def rank_by_job(job_id: int, db: Session = Depends(get_db)):
+async def rank_by_job(
+    job_id: int,
+    cascade: Optional[bool] = None,
+    cascade_band_low: Optional[float] = None,
+    cascade_band_high: Optional[float] = None,
+    cascade_top_k: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    incremental: bool = True,
+    db: Session = Depends(get_db),
+):
     """
     Rank ALL candidates against a specific job using Ollama.
     Computes both JD match scores and comparative rankings.
+
+    By default the ranking is incremental: only candidates who are new or
+    whose resume, CTC or additional info changed since the last run are
+    scored, unless the job's JD, budget or scoring model changed, and the
+    stored rows (and their status) are kept. incremental=false re-scores
+    every candidate.
+
+    With the cascade on (default when LLM_CASCADE_MODEL is set), a cheap
+    model scores every candidate and only those scoring inside
+    [cascade_band_low, cascade_band_high] or in the cheap model's top
+    cascade_top_k are re-scored by OLLAMA_MODEL. Thresholds default to the
+    LLM_CASCADE_* settings and can be set per job through these parameters.
+
+    Without the cascade, JD scores are requested for up to `batch_size`
+    candidates per prompt (LLM_BATCH_MAX_CANDIDATES by default; 1 sends
+    one request per candidate), as many as fit the model's context.
+
+    Up to `concurrency` scoring requests are in flight at once
+    (LLM_SCORING_CONCURRENCY, or the backend's slot count, by default), and
+    the comparative pass runs alongside the JD scoring.
+
+    Returns 409 while the job is being ranked by another request or run.
     """
     try:
+        cascade_config = _ranking_cascade(cascade, cascade_band_low, cascade_band_high, cascade_top_k, batch_size, concurrency)
+
         # Get the job
         job = db.query(models.Job).filter(models.Job.id == job_id).first()
         if not job:
@@ -1132,153 +1199,128 @@ async def rank_by_job(job_id: int, db: Session = Depends(get_db)):
         if not candidates:
             raise HTTPException(status_code=404, detail="No candidates found")
 
-        # Prepare job info
-        job_info = {
-            "id": job.id,
-            "title": job.title or "",
-            "jd_text": job.description or job.jd_text or "",
-            "min_budget": job.min_budget or 0,
-            "max_budget": job.max_budget or 0,
-        }
-
-        # Initialize Ollama client
-        ollama_client = OllamaClient()
-
-        # --- Step 1: Get individual JD match scores ---
-        jd_scores = {}
-        for candidate in candidates:
-            candidate_info = {
-                "name": candidate.name,
-                "resume_text": candidate.resume_text or "",
-                "current_ctc": candidate.current_ctc or 0,
-                "expected_ctc": candidate.expected_ctc or 0,
-            }
-            score = ollama_client.compare_candidate_with_jd(candidate_info, job_info)
-            jd_scores[candidate.email] = score
-            logger.info(f"JD match score for {candidate.email}: {score}")
-
-        # --- Step 2: Get comparative scores ---
-        candidates_info_for_compare = []
-        for candidate in candidates:
-            candidates_info_for_compare.append({
-                "id": hash(candidate.email) % 10000,  # numeric id for prompt
-                "name": candidate.name,
-                "resume_text": candidate.resume_text or "",
-                "current_ctc": candidate.current_ctc or 0,
-                "expected_ctc": candidate.expected_ctc or 0,
-            })
-
-        # Map numeric ids back to emails
-        id_to_email = {}
-        for i, candidate in enumerate(candidates):
-            id_to_email[hash(candidate.email) % 10000] = candidate.email
-
-        comparative_scores_raw = ollama_client.compare_candidates(candidates_info_for_compare, job_info)
-        comparative_scores = {}
-        for k, v in comparative_scores_raw.items():
-            email = id_to_email.get(int(k), None)
-            if email:
-                comparative_scores[email] = v
-
-        # --- Step 3: Build results and store in DB ---
-        # Delete old matches for this job first
-        db.query(models.CandidateJobMatch).filter(
-            models.CandidateJobMatch.job_id == job_id
-        ).delete()
-
-        results = []
-        for candidate in candidates:
-            jd_score = jd_scores.get(candidate.email, 0.5)
-            comp_score = comparative_scores.get(candidate.email, 0.5)
-
-            # Salary match
-            budget = job.max_budget or 1
-            salary_ratio = (candidate.expected_ctc or 0) / budget if budget > 0 else 0
-            salary_match = max(0.0, min(1.0, 1.0 - abs(1.0 - salary_ratio)))
-
-            # Overall = 40% JD match + 30% comparative + 30% salary
-            overall = (jd_score * 0.4) + (comp_score * 0.3) + (salary_match * 0.3)
-
-            # Budget fit
-            expected = candidate.expected_ctc or 0
-            if expected <= budget:
-                budget_fit = "Within budget"
-            elif expected <= budget * 1.1:
-                budget_fit = "Slightly above"
-            else:
-                budget_fit = "Above budget"
-
-            salary_gap = round(((expected / budget) - 1) * 100, 2) if budget > 0 else 0
-
-            strengths = ["Technical skills match"] if jd_score >= 0.6 else ["Potential growth candidate"]
-            if salary_match >= 0.8:
-                strengths.append("Good salary fit")
-            weaknesses = []
-            if jd_score < 0.5:
-                weaknesses.append("JD skills mismatch")
-            if salary_match < 0.5:
-                weaknesses.append("Budget constraints")
-            if not weaknesses:
-                weaknesses.append("None identified")
-
-            match_record = models.CandidateJobMatch(
-                candidate_email=candidate.email,
-                job_id=job_id,
-                jd_match_score=round(jd_score, 3),
-                comparative_score=round(comp_score, 3),
-                overall_score=round(overall, 3),
-                salary_match_score=round(salary_match, 3),
-                technical_match_score=round(jd_score, 3),
-                experience_match_score=round(comp_score, 3),
-                strengths=json.dumps(strengths),
-                weaknesses=json.dumps(weaknesses),
-                salary_analysis=json.dumps({
-                    "current_ctc": candidate.current_ctc,
-                    "expected_ctc": candidate.expected_ctc,
-                    "budget_fit": budget_fit,
-                    "salary_gap_percentage": salary_gap,
-                }),
-                recommendation=f"{round(jd_score * 100)}% JD match, {round(comp_score * 100)}% comparative",
-                status="active",
+        lock = JobRankingLock(job_id)
+        try:
+            lock.acquire()
+        except JobRankingLocked as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        async with lock.held():
+            return await rank_job(
+                db, job, candidates, cascade_config=cascade_config, batch_size=batch_size,
+                concurrency=concurrency, incremental=incremental,
             )
-            db.add(match_record)
-
-            results.append({
-                "candidate_email": candidate.email,
-                "candidate_name": candidate.name,
-                "current_ctc": candidate.current_ctc,
-                "expected_ctc": candidate.expected_ctc,
-                "jd_match_score": round(jd_score, 3),
-                "comparative_score": round(comp_score, 3),
-                "overall_score": round(overall, 3),
-                "salary_match_score": round(salary_match, 3),
-                "strengths": strengths,
-                "weaknesses": weaknesses,
-                "budget_fit": budget_fit,
-                "salary_gap_percentage": salary_gap,
-                "recommendation": match_record.recommendation,
-                "status": "active",
-            })
-
-        db.commit()
-
-        # Sort by overall score descending
-        results.sort(key=lambda x: x["overall_score"], reverse=True)
-
-        return {
-            "job_id": job_id,
-            "job_title": job.title,
-            "total_candidates": len(results),
-            "rankings": results,
-        }
 
     except HTTPException:
         raise
+    except LLMUnavailableError:
+        # Ollama is down: fail fast (503) instead of storing default scores
+        db.rollback()
+        raise
     except Exception as e:
         logger.error(f"Error in rank_by_job: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/rank-by-job/{job_id}/stream")
+async def stream_rank_by_job(
+    job_id: int,
+    cascade: Optional[bool] = None,
+    cascade_band_low: Optional[float] = None,
+    cascade_band_high: Optional[float] = None,
+    cascade_top_k: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    incremental: bool = True,
+    db: Session = Depends(get_db),
+):
+    """
+    Rank all candidates against a job, streaming results as server-sent events.
+
+    Takes the same parameters as POST /rank-by-job/{job_id} (GET so that
+    browsers can use EventSource). Emits a "candidate" event with each
+    candidate's JD score as soon as it is scored (or reused), then a
+    "ranking" event with the comparative scores and the overall order; see
+    ranking_stream.ranking_events for every event (an "error" event with
+    status_code 409 while the job is being ranked elsewhere).
+    """
+    cascade_config = _ranking_cascade(cascade, cascade_band_low, cascade_band_high, cascade_top_k, batch_size, concurrency)
+    if not db.query(models.Job).filter(models.Job.id == job_id).first():
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    events = ranking_events(
+        job_id, cascade_config=cascade_config, batch_size=batch_size, concurrency=concurrency, incremental=incremental,
+    )
+    # No caching or proxy buffering, so each event reaches the browser when it is sent
+    return StreamingResponse(events, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.post("/rank-by-job/{job_id}/runs", status_code=202)
+async def start_ranking_run(
+    job_id: int,
+    cascade: Optional[bool] = None,
+    cascade_band_low: Optional[float] = None,
+    cascade_band_high: Optional[float] = None,
+    cascade_top_k: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    incremental: bool = True,
+    db: Session = Depends(get_db),
+):
+    """
+    Rank all candidates against a job in the background.
+
+    Takes the same parameters as POST /rank-by-job/{job_id} but returns
+    202 with the run's status right away; poll GET /ranking-runs/{run_id}
+    for progress and read the results from GET /rankings/{job_id}, where
+    they are stored as candidates finish. If the job already has an active
+    run (on any server process), that run is returned; 409 if it is being
+    ranked by a POST /rank-by-job or stream request.
+    """
+    cascade_config = _ranking_cascade(cascade, cascade_band_low, cascade_band_high, cascade_top_k, batch_size, concurrency)
+    if not db.query(models.Job).filter(models.Job.id == job_id).first():
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    try:
+        return get_ranking_runs().submit(job_id, {
+            "cascade": cascade_config.to_dict() if cascade_config is not None else None,
+            "batch_size": batch_size,
+            "concurrency": concurrency,
+            "incremental": incremental,
+        })
+    except JobRankingLocked as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/ranking-runs/{run_id}")
+async def get_ranking_run(run_id: str, db: Session = Depends(get_db)):
+    """Progress of a background ranking run: scored/total, ETA, errors and, once finished, its statistics."""
+    run = db.query(models.RankingRun).filter(models.RankingRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Ranking run not found")
+    # A run whose process died shows as failed once its heartbeat expires
+    if run.status in ACTIVE and get_ranking_runs().recover(run.job_id):
+        db.refresh(run)
+    return run_status(run)
+
+
+@router.delete("/ranking-runs/{run_id}")
+async def cancel_ranking_run(run_id: str, db: Session = Depends(get_db)):
+    """Cancel a background ranking run; candidates scored so far stay stored."""
+    run = db.query(models.RankingRun).filter(models.RankingRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Ranking run not found")
+    if run.status not in ACTIVE:
+        raise HTTPException(status_code=409, detail=f"Ranking run already {run.status}")
+
+    runs = get_ranking_runs()
+    if not runs.cancel(run_id):
+        raise HTTPException(status_code=409, detail="Ranking run is not running on this server")
+    await runs.wait(run_id)
+    db.refresh(run)
+    return run_status(run)
+
+
 @router.get("/rankings/{job_id}")
 async def get_rankings(job_id: int, db: Session = Depends(get_db)):
     """Get cached ranking results for a job (no re-ranking)."""
@@ -1301,30 +1343,12 @@ async def get_rankings(job_id: int, db: Session = Depends(get_db)):
                 "rankings": [],
             }
 
-        results = []
-        for m in matches:
-            candidate = db.query(models.Candidate).filter(
-                models.Candidate.email == m.candidate_email
-            ).first()
-
-            results.append({
-                "candidate_email": m.candidate_email,
-                "candidate_name": candidate.name if candidate else m.candidate_email,
-                "current_ctc": candidate.current_ctc if candidate else 0,
-                "expected_ctc": candidate.expected_ctc if candidate else 0,
-                "jd_match_score": m.jd_match_score or 0,
-                "comparative_score": m.comparative_score or 0,
-                "overall_score": m.overall_score or 0,
-                "salary_match_score": m.salary_match_score or 0,
-                "strengths": json.loads(m.strengths) if m.strengths else [],
-                "weaknesses": json.loads(m.weaknesses) if m.weaknesses else [],
-                "budget_fit": json.loads(m.salary_analysis).get("budget_fit", "Unknown") if m.salary_analysis else "Unknown",
-                "salary_gap_percentage": json.loads(m.salary_analysis).get("salary_gap_percentage", 0) if m.salary_analysis else 0,
-                "recommendation": m.recommendation or "",
-                "status": m.status or "active",
-            })
-
-        results.sort(key=lambda x: x["overall_score"], reverse=True)
+        emails = [m.candidate_email for m in matches]
+        candidates = {
+            c.email: c
+            for c in db.query(models.Candidate).filter(models.Candidate.email.in_(emails)).all()
+        }
+        results = sorted_results(matches, candidates)
 
         return {
             "job_id": job_id,
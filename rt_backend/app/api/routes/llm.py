@@ -0,0 +1,112 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.services.llm_cache import get_llm_cache
+from app.services.llm_metrics import get_llm_metrics
+from app.services.llm_resilience import get_circuit_breaker, get_hedge_budget
+from app.services.llm_router import router_stats
+from app.services.llm_scheduler import get_llm_scheduler
+from app.services.ollama_service import get_parse_stats, get_task_timeouts
+from app.services.ollama_endpoints import get_endpoint_pool
+from app.services.ollama_warmup import get_model_warmer
+
+router = APIRouter()
+
+
+@router.get("/llm/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters and memory usage of the LLM response cache."""
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.delete("/llm/cache")
+def clear_cache():
+    """Drop every cached LLM response (both tiers)."""
+    cache = get_llm_cache()
+    if cache is None:
+        raise HTTPException(status_code=400, detail="LLM cache is disabled")
+    cache.clear()
+    return {"message": "LLM cache cleared"}
+
+
+@router.get("/llm/scheduler/stats")
+def get_scheduler_stats():
+    """Active requests, queue depth and wait times per priority lane."""
+    return get_llm_scheduler().stats()
+
+
+@router.get("/llm/endpoints")
+def get_endpoints():
+    """Health and load of every configured Ollama node."""
+    return get_endpoint_pool().stats()
+
+
+@router.get("/llm/breaker")
+def get_breaker_state():
+    """Circuit breaker state, the current adaptive timeout per task and the hedge budget."""
+    return {
+        "circuit_breaker": get_circuit_breaker().stats(),
+        "task_timeouts": get_task_timeouts().stats(),
+        "hedge_budget": get_hedge_budget().stats(),
+    }
+
+
+@router.get("/llm/router")
+def get_router_stats():
+    """Configured route per task and how many calls went to each backend, and why."""
+    return router_stats()
+
+
+@router.get("/llm/parse/stats")
+def get_parse_stats_route():
+    """Schema-valid, invalid, retried and exhausted structured responses per task."""
+    return get_parse_stats().stats()
+
+
+@router.get("/llm/ready")
+def get_model_readiness():
+    """Whether the model is loaded; 503 until warm-up has succeeded (usable as a readiness probe)."""
+    status = get_model_warmer().status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+@router.get("/llm/metrics")
+def get_metrics():
+    """Per-method latency histograms, token usage, failures by cause and fallbacks to defaults."""
+    return get_llm_metrics().stats()
+
+
+@router.get("/llm/metrics/prometheus", response_class=PlainTextResponse)
+def get_metrics_prometheus():
+    """The same metrics in Prometheus text exposition format, for scraping."""
+    return get_llm_metrics().prometheus()
+
+
+@router.delete("/llm/metrics")
+def reset_metrics():
+    """Zero the LLM metrics, e.g. before a benchmark run."""
+    get_llm_metrics().reset()
+    return {"message": "LLM metrics reset"}
+
+
+@router.get("/llm/debug")
+def get_llm_debug():
+    """Everything about the LLM layer in one place, including the most recent failures."""
+    metrics = get_llm_metrics()
+    cache = get_llm_cache()
+    return {
+        "metrics": metrics.stats(),
+        "recent_failures": metrics.recent_failures(),
+        "parse": get_parse_stats().stats(),
+        "circuit_breaker": get_circuit_breaker().stats(),
+        "task_timeouts": get_task_timeouts().stats(),
+        "hedge_budget": get_hedge_budget().stats(),
+        "scheduler": get_llm_scheduler().stats(),
+        "endpoints": get_endpoint_pool().stats(),
+        "router": router_stats(),
+        "warmup": get_model_warmer().status(),
+        "cache": cache.stats() if cache is not None else {"enabled": False},
+    }
@@ -21,10 +21,109 @@ class Settings(BaseSettings):
     # OpenAI API settings
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    OPENAI_TIMEOUT: float = float(os.getenv("OPENAI_TIMEOUT", "60"))
+    OPENAI_MAX_RETRIES: int = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+    # Batch API for bulk offline scoring: "openai", or "local" to run the
+    # batch file against Ollama (development and tests)
+    OPENAI_BATCH_BACKEND: str = os.getenv("OPENAI_BATCH_BACKEND", "openai")
+    OPENAI_BATCH_DIR: str = os.getenv("OPENAI_BATCH_DIR", "batches")
+    OPENAI_BATCH_POLL_INTERVAL: float = float(os.getenv("OPENAI_BATCH_POLL_INTERVAL", "30"))
+    OPENAI_BATCH_COMPLETION_WINDOW: str = os.getenv("OPENAI_BATCH_COMPLETION_WINDOW", "24h")
     
     # Ollama API settings
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "llama3.2")
+    # Optional comma-separated list of Ollama nodes, each "url" or "url|weight";
+    # when empty only OLLAMA_BASE_URL is used
+    OLLAMA_ENDPOINTS: str = os.getenv("OLLAMA_ENDPOINTS", "")
+    OLLAMA_HEALTH_CHECK_INTERVAL: float = float(os.getenv("OLLAMA_HEALTH_CHECK_INTERVAL", "10"))
+    OLLAMA_EJECT_AFTER_FAILURES: int = int(os.getenv("OLLAMA_EJECT_AFTER_FAILURES", "3"))
+    OLLAMA_POOL_SIZE: int = int(os.getenv("OLLAMA_POOL_SIZE", "10"))
+    OLLAMA_CONNECT_TIMEOUT: float = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+    OLLAMA_READ_TIMEOUT: float = float(os.getenv("OLLAMA_READ_TIMEOUT", "30"))
+    # Model warm-up: load OLLAMA_MODEL at startup and keep it resident
+    OLLAMA_WARMUP_ENABLED: bool = os.getenv("OLLAMA_WARMUP_ENABLED", "true").lower() == "true"
+    OLLAMA_WARMUP_TIMEOUT: float = float(os.getenv("OLLAMA_WARMUP_TIMEOUT", "120"))
+    OLLAMA_KEEP_ALIVE: str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    OLLAMA_KEEP_ALIVE_PING_INTERVAL: float = float(os.getenv("OLLAMA_KEEP_ALIVE_PING_INTERVAL", "240"))
+    # Context window the server runs the model with (Ollama num_ctx /
+    # OLLAMA_CONTEXT_LENGTH); prompts are budgeted to fit inside it
+    OLLAMA_NUM_CTX: int = int(os.getenv("OLLAMA_NUM_CTX", "4096"))
+    # Tokenizer used to count prompt tokens: a Hugging Face tokenizer name or
+    # tokenizer.json path, "tiktoken:<encoding>", "heuristic", or empty to
+    # choose from OLLAMA_MODEL
+    LLM_TOKENIZER: str = os.getenv("LLM_TOKENIZER", "")
+    
+    # Cheap-model-first scoring cascade for rank-by-job (off when no model is set):
+    # candidates the cheap model scores inside [BAND_LOW, BAND_HIGH] or in its
+    # TOP_K are re-scored by OLLAMA_MODEL
+    LLM_CASCADE_MODEL: str = os.getenv("LLM_CASCADE_MODEL", "")
+    LLM_CASCADE_BAND_LOW: float = float(os.getenv("LLM_CASCADE_BAND_LOW", "0.35"))
+    LLM_CASCADE_BAND_HIGH: float = float(os.getenv("LLM_CASCADE_BAND_HIGH", "0.75"))
+    LLM_CASCADE_TOP_K: int = int(os.getenv("LLM_CASCADE_TOP_K", "5"))
+    
+    # LLM request scheduling: global concurrency cap (match Ollama's
+    # OLLAMA_NUM_PARALLEL) and relative share of slots per priority lane
+    OLLAMA_NUM_PARALLEL: int = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+    LLM_INTERACTIVE_WEIGHT: int = int(os.getenv("LLM_INTERACTIVE_WEIGHT", "4"))
+    LLM_BULK_WEIGHT: int = int(os.getenv("LLM_BULK_WEIGHT", "1"))
+    
+    # LLM circuit breaker and adaptive timeouts
+    LLM_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+    LLM_BREAKER_RESET_TIMEOUT: float = float(os.getenv("LLM_BREAKER_RESET_TIMEOUT", "30"))
+    LLM_TIMEOUT_PERCENTILE: float = float(os.getenv("LLM_TIMEOUT_PERCENTILE", "0.99"))
+    LLM_TIMEOUT_MULTIPLIER: float = float(os.getenv("LLM_TIMEOUT_MULTIPLIER", "2.0"))
+    LLM_TIMEOUT_MIN: float = float(os.getenv("LLM_TIMEOUT_MIN", "2"))
+    # Retries for timeouts, connection errors, 429 and 5xx: exponential backoff with full jitter
+    LLM_RETRY_ATTEMPTS: int = int(os.getenv("LLM_RETRY_ATTEMPTS", "2"))
+    LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.25"))
+    LLM_RETRY_MAX_DELAY: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "4.0"))
+    # Hedging: a request still running after the task's observed percentile latency
+    # gets a duplicate on another node/slot; hedges are capped at LLM_HEDGE_BUDGET of requests
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+    LLM_HEDGE_BUDGET: float = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+    # Pin requests sharing a system prompt (one job's scoring run) to one
+    # Ollama node so the job's prompt prefix is served from its KV cache (opt-in:
+    # it trades the least-outstanding spread for cache hits). A pinned node with
+    # LLM_PREFIX_AFFINITY_MAX_OUTSTANDING requests in flight overflows to the
+    # least-loaded node (0 = never)
+    LLM_PREFIX_AFFINITY: bool = os.getenv("LLM_PREFIX_AFFINITY", "false").lower() == "true"
+    LLM_PREFIX_AFFINITY_MAX_OUTSTANDING: int = int(os.getenv("LLM_PREFIX_AFFINITY_MAX_OUTSTANDING", "4"))
+    # Stream completions and hang up once the answer's JSON object is complete
+    LLM_STREAMING_ENABLED: bool = os.getenv("LLM_STREAMING_ENABLED", "true").lower() == "true"
+    # Extra attempts when a structured (JSON schema) response fails validation
+    LLM_PARSE_RETRIES: int = int(os.getenv("LLM_PARSE_RETRIES", "2"))
+    # Most candidates packed into one batched JD scoring prompt (1 = one call per candidate)
+    LLM_BATCH_MAX_CANDIDATES: int = int(os.getenv("LLM_BATCH_MAX_CANDIDATES", "8"))
+    # Most scoring requests a ranking run keeps in flight (0 = the scheduler's slot count)
+    LLM_SCORING_CONCURRENCY: int = int(os.getenv("LLM_SCORING_CONCURRENCY", "0"))
+    # A job is ranked by one request or run at a time, across server processes:
+    # the holder refreshes its lock every RANKING_HEARTBEAT_INTERVAL seconds and a
+    # lock (or run) not refreshed for RANKING_HEARTBEAT_TIMEOUT is taken to be dead
+    RANKING_HEARTBEAT_INTERVAL: float = float(os.getenv("RANKING_HEARTBEAT_INTERVAL", "10"))
+    RANKING_HEARTBEAT_TIMEOUT: float = float(os.getenv("RANKING_HEARTBEAT_TIMEOUT", "60"))
+
+    # Backend router: each task ("task=route", tasks as in DEFAULT_TASK_TIMEOUTS)
+    # is routed "local" (Ollama), "remote" (an OpenAI-compatible server) or
+    # "auto" (local, overflowing to the remote when the local queue is deep,
+    # the local p95 exceeds the task's latency budget or the local circuit is open)
+    LLM_REMOTE_ENABLED: bool = os.getenv("LLM_REMOTE_ENABLED", "false").lower() == "true"
+    LLM_REMOTE_BASE_URL: str = os.getenv("LLM_REMOTE_BASE_URL", "https://api.openai.com")
+    LLM_REMOTE_MODEL: str = os.getenv("LLM_REMOTE_MODEL", "")  # empty = OPENAI_MODEL
+    LLM_REMOTE_CONCURRENCY: int = int(os.getenv("LLM_REMOTE_CONCURRENCY", "8"))
+    LLM_ROUTES: str = os.getenv("LLM_ROUTES", "")
+    LLM_ROUTE_DEFAULT: str = os.getenv("LLM_ROUTE_DEFAULT", "local")
+    LLM_ROUTER_OVERFLOW_QUEUE_DEPTH: int = int(os.getenv("LLM_ROUTER_OVERFLOW_QUEUE_DEPTH", "16"))
+    LLM_ROUTER_LATENCY_BUDGETS: str = os.getenv("LLM_ROUTER_LATENCY_BUDGETS", "")  # "task=seconds,..."
+    # Cost budget: most remote calls per minute (0 = unlimited)
+    LLM_ROUTER_REMOTE_MAX_PER_MINUTE: int = int(os.getenv("LLM_ROUTER_REMOTE_MAX_PER_MINUTE", "60"))
+    
+    # LLM response cache settings (opt-in)
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "./llm_cache.db")
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", "604800"))
+    LLM_CACHE_MEMORY_MAX_BYTES: int = int(os.getenv("LLM_CACHE_MEMORY_MAX_BYTES", "33554432"))
     
     model_config = SettingsConfigDict(case_sensitive=True)
 
@@ -8,7 +8,7 @@ from app.db.session import Base
 class CandidateJobMatch(Base):
     __tablename__ = "candidate_job_match"
     candidate_email = Column(String, ForeignKey("candidates.email"), primary_key=True)
-    job_id = Column(Integer, ForeignKey("jobs.id"), primary_key=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), primary_key=True, index=True)
     jd_match_score = Column(Float)
     comparative_score = Column(Float)
     overall_score = Column(Float)
@@ -21,7 +21,20 @@ class CandidateJobMatch(Base):
     recommendation = Column(Text)
     comparative_analysis = Column(Text)
     status = Column(String, default="active")  # active, saved, rejected
+    # What the scores were computed from: hashes of the inputs plus the model
+    # and prompt version. A row whose inputs no longer match is stale, and
+    # incremental re-ranking re-scores only those (see ranking_service)
+    candidate_fingerprint = Column(String(64))  # resume, CTCs and additional info
+    resume_hash = Column(String(64), index=True)
+    jd_hash = Column(String(64), index=True)
+    budget_hash = Column(String(64), index=True)
+    model_name = Column(String, index=True)
+    prompt_version = Column(String(16), index=True)
+    # The JD score is the neutral default because the LLM gave no valid one;
+    # such a row is always stale
+    jd_score_fallback = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     candidate = relationship("Candidate", back_populates="job_matches")
     job = relationship("Job", back_populates="candidates")
@@ -83,4 +96,38 @@ class Job(Base):
     candidates = relationship(
         "CandidateJobMatch",
         back_populates="job"
-    ) 
\ No newline at end of file
+    ) 
+
+class RankingRun(Base):
+    """A background rank-by-job run and its progress."""
+    __tablename__ = "ranking_runs"
+
+    id = Column(String(32), primary_key=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), index=True)
+    status = Column(String, default="queued", index=True)  # queued, running, completed, failed, cancelled
+    options = Column(Text)  # JSON string of the ranking parameters
+    total_candidates = Column(Integer, default=0)
+    to_score = Column(Integer, default=0)
+    scored = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    errors = Column(Text)  # JSON list of error messages
+    summary = Column(Text)  # JSON string of the finished ranking's statistics
+    owner = Column(String)  # server process running it (ranking_lock.WORKER_ID)
+    heartbeat_at = Column(DateTime(timezone=True))  # refreshed while it runs; an expired one means the process is gone
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+
+class RankingLock(Base):
+    """Who is ranking a job right now (see ranking_lock); one row per job ever ranked."""
+    __tablename__ = "ranking_locks"
+
+    job_id = Column(Integer, primary_key=True)
+    token = Column(String(32))  # the holder's; NULL when the lock is free
+    owner = Column(String)  # server process of the holder
+    run_id = Column(String(32))  # background run holding the lock, if any
+    acquired_at = Column(DateTime(timezone=True))
+    heartbeat_at = Column(DateTime(timezone=True))
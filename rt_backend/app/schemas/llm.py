@@ -0,0 +1,46 @@
+from typing import Optional, List
+from pydantic import BaseModel
+
+# Structured outputs requested from the LLM. Each model doubles as the JSON
+# schema sent with the request and as the validator for the response.
+
+class EmailExtraction(BaseModel):
+    email: Optional[str] = None
+
+class CandidateDetails(BaseModel):
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    skills: List[str] = []
+    years_of_experience: Optional[float] = None
+    education: Optional[str] = None
+
+class JDScore(BaseModel):
+    score: float
+
+class CandidateScore(BaseModel):
+    id: int
+    score: float
+
+class ComparativeScores(BaseModel):
+    scores: List[CandidateScore]
+
+class BatchJDScores(BaseModel):
+    scores: List[CandidateScore]
+
+class ResumeRanking(BaseModel):
+    resume_id: int
+    overall_score: float
+    skills_match: float
+    experience_match: float
+    strengths: List[str]
+    weaknesses: List[str]
+    recommendation: str
+
+class BestMatch(BaseModel):
+    best_match: int
+    reasoning: str
+
+class RankingAnalysis(BaseModel):
+    rankings: List[ResumeRanking]
+    comparative_analysis: BestMatch
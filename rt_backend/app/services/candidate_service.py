@@ -9,7 +9,7 @@ import PyPDF2
 
 from app.db.models import Candidate
 from app.schemas.candidate import CandidateCreate, CandidateUpdate
-from app.services.ollama_service import OllamaClient
+from app.services.llm_router import get_llm_router
 from app.services.openai_service import extract_email_from_text
 
 logger = logging.getLogger(__name__)
@@ -54,11 +54,11 @@ def create(
         # Always try to extract email using Ollama, even if email is provided
         # This ensures we have a valid email as the primary key
         try:
-            # Initialize Ollama client
-            ollama_client = OllamaClient()
+            # Get the shared LLM client (routes each task to Ollama or the remote backend)
+            llm_client = get_llm_router()
             
             # Extract email from resume text
-            extracted_email = ollama_client.extract_email_from_resume(resume_text)
+            extracted_email = llm_client.extract_email_from_resume(resume_text)
             
             # If email is found by Ollama, use it
             if extracted_email:
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(text: str) -> str:
+    """Collapse whitespace so formatting-only differences share a cache entry."""
+    return " ".join(text.split())
+
+
+def make_cache_key(model: str, prompt_version: str, payload: Dict[str, Any]) -> str:
+    """
+    Build a content-addressed key for a chat completion request.
+
+    The key covers the model, the prompt template version and a hash of the
+    normalized messages plus any generation parameters, so a response is only
+    reused for a request that would have produced it.
+    """
+    normalized = dict(payload)
+    normalized.pop("model", None)
+    normalized["messages"] = [
+        {**m, "content": normalize_prompt(m.get("content", ""))}
+        for m in payload.get("messages", [])
+    ]
+    prompt_hash = hashlib.sha256(
+        json.dumps(normalized, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    return f"{model}:{prompt_version}:{prompt_hash}"
+
+
+class LLMCache:
+    """
+    Two-tier cache for LLM responses.
+
+    Tier 1 is an in-process LRU bounded by the approximate size of the stored
+    responses. Tier 2 is a SQLite file with a TTL that survives restarts and is
+    shared by every worker pointing at the same path.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        memory_max_bytes: Optional[int] = None,
+    ):
+        self.path = path or settings.LLM_CACHE_PATH
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.LLM_CACHE_TTL_SECONDS
+        self.memory_max_bytes = memory_max_bytes if memory_max_bytes is not None else settings.LLM_CACHE_MEMORY_MAX_BYTES
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, size, expires_at)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+        logger.info(f"Initialized LLM cache at {self.path} (ttl={self.ttl_seconds}s, memory={self.memory_max_bytes} bytes)")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached response, checking memory first and then disk."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                self._drop(key)
+
+            row = self._db.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] > now:
+                value = json.loads(row[0])
+                self._remember(key, value, len(row[0]), row[1])
+                self._stats["disk_hits"] += 1
+                return value
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response in both tiers."""
+        serialized = json.dumps(value)
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, value, len(serialized), expires_at)
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, serialized, expires_at),
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to persist LLM cache entry: {e}")
+            self._stats["stores"] += 1
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from the disk tier and return how many were removed."""
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+            return cursor.rowcount
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._db.execute("DELETE FROM llm_cache")
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current memory usage."""
+        with self._lock:
+            lookups = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            return {
+                **self._stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_max_bytes": self.memory_max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "path": self.path,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _remember(self, key: str, value: Dict[str, Any], size: int, expires_at: float) -> None:
+        # Caller holds the lock
+        if key in self._memory:
+            self._drop(key)
+        if size > self.memory_max_bytes:
+            return
+        self._memory[key] = (value, size, expires_at)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_max_bytes:
+            oldest = next(iter(self._memory))
+            self._drop(oldest)
+            self._stats["evictions"] += 1
+
+    def _drop(self, key: str) -> None:
+        # Caller holds the lock
+        _, size, _ = self._memory.pop(key)
+        self._memory_bytes -= size
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Return the process-wide LLM cache, or None when caching is disabled."""
+    global _cache
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache()
+    return _cache
@@ -0,0 +1,66 @@
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, List, Sequence, TypeVar
+
+from app.services.llm_resilience import LLMUnavailableError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_bounded(items: Sequence[T], func: Callable[[T], R], limit: int, default: Callable[[T], R]) -> List[R]:
+    """
+    Run func over items on at most `limit` threads and return the results
+    in input order.
+
+    An item whose call raises gets default(item) instead, so one failure
+    does not lose the others; LLMUnavailableError (backend down) is
+    re-raised once every call has finished.
+    """
+    if limit <= 1 or len(items) <= 1:
+        return _unwrap([_call(func, item, default) for item in items])
+
+    with ThreadPoolExecutor(max_workers=min(limit, len(items)), thread_name_prefix="llm-fanout") as pool:
+        # Each call runs in a copy of the caller's context (e.g. the method its metrics are attributed to)
+        futures = [pool.submit(contextvars.copy_context().run, _call, func, item, default) for item in items]
+        return _unwrap([future.result() for future in futures])
+
+
+async def gather_bounded(
+    items: Sequence[T], func: Callable[[T], Awaitable[R]], limit: int, default: Callable[[T], R],
+) -> List[R]:
+    """Asyncio version of map_bounded: at most `limit` calls awaited at once."""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(item: T):
+        async with semaphore:
+            try:
+                return await func(item), None
+            except LLMUnavailableError as e:
+                return default(item), e
+            except Exception as e:
+                logger.error(f"LLM call failed for one item; using its default: {e}", exc_info=True)
+                return default(item), None
+
+    return _unwrap(await asyncio.gather(*(run(item) for item in items)))
+
+
+def _call(func: Callable[[T], R], item: T, default: Callable[[T], R]):
+    try:
+        return func(item), None
+    except LLMUnavailableError as e:
+        return default(item), e
+    except Exception as e:
+        logger.error(f"LLM call failed for one item; using its default: {e}", exc_info=True)
+        return default(item), None
+
+
+def _unwrap(outcomes) -> list:
+    for _, error in outcomes:
+        if error is not None:
+            raise error
+    return [result for result, _ in outcomes]
@@ -0,0 +1,258 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds, from a cache hit to a full ranking prompt
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Failure causes
+TIMEOUT = "timeout"
+HTTP_ERROR = "http_error"
+CONNECTION_ERROR = "connection_error"
+PARSE = "parse"
+CLAMP = "clamp"
+CIRCUIT_OPEN = "circuit_open"
+FAILURE_CAUSES = (TIMEOUT, HTTP_ERROR, CONNECTION_ERROR, PARSE, CLAMP, CIRCUIT_OPEN)
+
+# Calls made outside an instrumented client method
+UNATTRIBUTED = "other"
+
+# The public client method currently running; transport-level events
+# (tokens, timeouts, HTTP errors) are attributed to it
+_current_method: contextvars.ContextVar[str] = contextvars.ContextVar("llm_method", default=UNATTRIBUTED)
+
+
+def current_method() -> str:
+    return _current_method.get()
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram plus a window of raw samples for percentiles."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS, window: int = 1000):
+        self.buckets = buckets
+        self.counts = [0 for _ in buckets]
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self._recent:
+            return None
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        def rounded(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value, 4)
+
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.sum, 4),
+            "mean_seconds": rounded(self.sum / self.count if self.count else None),
+            "p50_seconds": rounded(self.percentile(0.50)),
+            "p95_seconds": rounded(self.percentile(0.95)),
+            "p99_seconds": rounded(self.percentile(0.99)),
+            "max_seconds": rounded(self.max),
+            "buckets": {**{str(b): c for b, c in zip(self.buckets, self.counts)}, "+Inf": self.count},
+        }
+
+
+class _MethodMetrics:
+    def __init__(self):
+        self.calls = 0
+        self.fallbacks = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.latency = LatencyHistogram()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.requests = 0
+        self.estimated_usage = 0
+        self.failures = {cause: 0 for cause in FAILURE_CAUSES}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "fallbacks": self.fallbacks,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "latency": self.latency.snapshot(),
+            "tokens": {
+                "requests": self.requests,
+                "prompt": self.prompt_tokens,
+                "completion": self.completion_tokens,
+                "total": self.prompt_tokens + self.completion_tokens,
+                # Streams closed early never see the usage chunk; those are counted locally
+                "estimated_requests": self.estimated_usage,
+            },
+            "failures": dict(self.failures),
+        }
+
+
+class LLMMetrics:
+    """
+    Per-method instrumentation of the Ollama clients.
+
+    For every public client method: end-to-end latency histogram, prompt and
+    completion tokens from the response `usage` field, failures by cause
+    (timeout, HTTP error, connection error, schema parse failure, clamped
+    out-of-range value, open circuit) and how often the method fell back to
+    its default answer, plus retries, hedged requests and hedges that
+    answered first. The most recent failures are kept with their details
+    for the debug endpoint.
+    """
+
+    def __init__(self, recent_failures: int = 50):
+        self._methods: Dict[str, _MethodMetrics] = {}
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=recent_failures)
+        self._lock = threading.Lock()
+
+    def _method(self, method: str) -> _MethodMetrics:
+        # Caller holds the lock
+        metrics = self._methods.get(method)
+        if metrics is None:
+            metrics = self._methods[method] = _MethodMetrics()
+        return metrics
+
+    def observe_call(self, method: str, seconds: float) -> None:
+        with self._lock:
+            metrics = self._method(method)
+            metrics.calls += 1
+            metrics.latency.observe(seconds)
+
+    def record_usage(self, prompt_tokens: int, completion_tokens: int, estimated: bool = False) -> None:
+        with self._lock:
+            metrics = self._method(current_method())
+            metrics.requests += 1
+            metrics.prompt_tokens += prompt_tokens
+            metrics.completion_tokens += completion_tokens
+            if estimated:
+                metrics.estimated_usage += 1
+
+    def record_failure(self, cause: str, detail: str = "") -> None:
+        method = current_method()
+        with self._lock:
+            self._method(method).failures[cause] += 1
+            self._recent.append({"time": time.time(), "method": method, "cause": cause, "detail": detail[:500]})
+
+    def record_fallback(self) -> None:
+        with self._lock:
+            self._method(current_method()).fallbacks += 1
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self._method(current_method()).retries += 1
+
+    def record_hedge(self) -> None:
+        with self._lock:
+            self._method(current_method()).hedges += 1
+
+    def record_hedge_win(self) -> None:
+        with self._lock:
+            self._method(current_method()).hedge_wins += 1
+
+    def recent_failures(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._recent)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {method: m.snapshot() for method, m in sorted(self._methods.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._methods.clear()
+            self._recent.clear()
+
+    def prometheus(self) -> str:
+        """The metrics in Prometheus text exposition format."""
+        stats = self.stats()
+        lines = [
+            "# HELP llm_call_duration_seconds End-to-end latency of LLM client methods",
+            "# TYPE llm_call_duration_seconds histogram",
+        ]
+        for method, m in stats.items():
+            for bound, count in m["latency"]["buckets"].items():
+                lines.append(f'llm_call_duration_seconds_bucket{{method="{method}",le="{bound}"}} {count}')
+            lines.append(f'llm_call_duration_seconds_sum{{method="{method}"}} {m["latency"]["sum_seconds"]}')
+            lines.append(f'llm_call_duration_seconds_count{{method="{method}"}} {m["latency"]["count"]}')
+        lines += ["# HELP llm_tokens_total Tokens processed per method", "# TYPE llm_tokens_total counter"]
+        for method, m in stats.items():
+            for kind in ("prompt", "completion"):
+                lines.append(f'llm_tokens_total{{method="{method}",kind="{kind}"}} {m["tokens"][kind]}')
+        lines += ["# HELP llm_failures_total LLM failures by cause", "# TYPE llm_failures_total counter"]
+        for method, m in stats.items():
+            for cause, count in m["failures"].items():
+                lines.append(f'llm_failures_total{{method="{method}",cause="{cause}"}} {count}')
+        lines += ["# HELP llm_fallbacks_total Calls answered with the method's default", "# TYPE llm_fallbacks_total counter"]
+        for method, m in stats.items():
+            lines.append(f'llm_fallbacks_total{{method="{method}"}} {m["fallbacks"]}')
+        lines += ["# HELP llm_retries_total Requests retried after a transient failure", "# TYPE llm_retries_total counter"]
+        for method, m in stats.items():
+            lines.append(f'llm_retries_total{{method="{method}"}} {m["retries"]}')
+        lines += ["# HELP llm_hedges_total Hedged requests sent, and how many answered first", "# TYPE llm_hedges_total counter"]
+        for method, m in stats.items():
+            lines.append(f'llm_hedges_total{{method="{method}",outcome="sent"}} {m["hedges"]}')
+            lines.append(f'llm_hedges_total{{method="{method}",outcome="won"}} {m["hedge_wins"]}')
+        return "\n".join(lines) + "\n"
+
+
+_metrics: Optional[LLMMetrics] = None
+_metrics_lock = threading.Lock()
+
+def get_llm_metrics() -> LLMMetrics:
+    """Return the process-wide LLM metrics shared by the sync and async clients."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = LLMMetrics()
+    return _metrics
+
+
+def instrumented(func: Callable) -> Callable:
+    """
+    Time a client method (sync or async) into its latency histogram and
+    attribute the requests it makes to it. The client must have `metrics`.
+    """
+    method = func.__name__
+
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(self, *args, **kwargs):
+            token = _current_method.set(method)
+            started = time.monotonic()
+            try:
+                return await func(self, *args, **kwargs)
+            finally:
+                self.metrics.observe_call(method, time.monotonic() - started)
+                _current_method.reset(token)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        token = _current_method.set(method)
+        started = time.monotonic()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self.metrics.observe_call(method, time.monotonic() - started)
+            _current_method.reset(token)
+    return wrapper
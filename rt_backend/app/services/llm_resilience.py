@@ -0,0 +1,258 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LLMUnavailableError(Exception):
+    """Raised instead of calling the LLM backend while its circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the LLM backend is down.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    are rejected immediately. Once `reset_timeout` seconds have passed, a
+    single probe call is let through (half-open); its success closes the
+    circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = None, reset_timeout: float = None):
+        self.failure_threshold = failure_threshold or settings.LLM_BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or settings.LLM_BREAKER_RESET_TIMEOUT
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._rejected = 0
+        self._times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may go to the backend right now."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("LLM circuit breaker closed: backend recovered")
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(f"LLM circuit breaker opened after {self._consecutive_failures} consecutive failures")
+                    self._times_opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe whose call was cancelled before it had an outcome."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            retry_in = None
+            if self._state == OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 2)
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_seconds": self.reset_timeout,
+                "retry_in_seconds": retry_in,
+                "rejected_calls": self._rejected,
+                "times_opened": self._times_opened,
+            }
+
+    def _maybe_half_open(self) -> None:
+        # Caller holds the lock
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+
+
+class AdaptiveTimeouts:
+    """
+    Per-task read timeouts derived from observed latencies.
+
+    Until a task has `min_samples` successful calls its configured default is
+    used. After that the timeout is the chosen latency percentile times a
+    safety multiplier, clamped between `min_timeout` and the task default, so
+    short score-only prompts stop waiting as long as full ranking prompts.
+    """
+
+    def __init__(
+        self,
+        defaults: Dict[str, float],
+        percentile: float = None,
+        multiplier: float = None,
+        min_timeout: float = None,
+        min_samples: int = 20,
+        window: int = 500,
+    ):
+        self.defaults = defaults
+        self.percentile = percentile or settings.LLM_TIMEOUT_PERCENTILE
+        self.multiplier = multiplier or settings.LLM_TIMEOUT_MULTIPLIER
+        self.min_timeout = min_timeout or settings.LLM_TIMEOUT_MIN
+        self.min_samples = min_samples
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, task: str, latency: float) -> None:
+        with self._lock:
+            self._samples.setdefault(task, deque(maxlen=self.window)).append(latency)
+
+    def latency(self, task: str, percentile: float) -> Optional[float]:
+        """Observed latency percentile for a task, or None until it has `min_samples` calls."""
+        with self._lock:
+            samples = sorted(self._samples.get(task, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(percentile * len(samples)))]
+
+    def timeout(self, task: str) -> float:
+        default = self.defaults.get(task, settings.OLLAMA_READ_TIMEOUT)
+        observed = self.latency(task, self.percentile)
+        if observed is None:
+            return default
+        return max(self.min_timeout, min(default, observed * self.multiplier))
+
+    def stats(self) -> Dict[str, Any]:
+        tasks = set(self.defaults)
+        with self._lock:
+            tasks.update(self._samples)
+            counts = {task: len(self._samples.get(task, ())) for task in tasks}
+        return {
+            task: {"samples": counts[task], "timeout_seconds": round(self.timeout(task), 3)}
+            for task in sorted(tasks)
+        }
+
+
+class RetryPolicy:
+    """
+    Retries for failed LLM requests with exponential backoff and full
+    jitter: retry n waits a random time between 0 and
+    min(max_delay, base_delay * 2**(n-1)), so callers that failed together
+    do not retry together.
+
+    Timeouts, connection errors, HTTP 429 and 5xx are retried; other HTTP
+    errors are the request's fault and are not.
+    """
+
+    def __init__(self, attempts: int = None, base_delay: float = None, max_delay: float = None, seed: Optional[int] = None):
+        self.attempts = settings.LLM_RETRY_ATTEMPTS if attempts is None else attempts
+        self.base_delay = settings.LLM_RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = settings.LLM_RETRY_MAX_DELAY if max_delay is None else max_delay
+        self._random = random.Random(seed)
+
+    @staticmethod
+    def retryable_status(status_code: int) -> bool:
+        return status_code == 429 or status_code >= 500
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before retry number `retry` (1-based)."""
+        return self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+
+class HedgeBudget:
+    """
+    Global cap on hedged (duplicate) requests.
+
+    Every primary request earns `ratio` of a hedge, up to `burst` saved
+    hedges, and each hedge spends one, so hedges stay at most about `ratio`
+    of all requests even while the backend is slow everywhere and every
+    request would qualify for one.
+    """
+
+    def __init__(self, ratio: float = None, burst: float = 10.0):
+        self.ratio = settings.LLM_HEDGE_BUDGET if ratio is None else ratio
+        self.burst = burst
+        self._tokens = burst
+        self._requests = 0
+        self._hedges = 0
+        self._denied = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._requests += 1
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self._hedges += 1
+                return True
+            self._denied += 1
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ratio": self.ratio,
+                "available": round(self._tokens, 2),
+                "requests": self._requests,
+                "hedges": self._hedges,
+                "denied": self._denied,
+            }
+
+
+_breaker: Optional[CircuitBreaker] = None
+_breaker_lock = threading.Lock()
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Return the process-wide breaker shared by every Ollama client."""
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker()
+    return _breaker
+
+
+_hedge_budget: Optional[HedgeBudget] = None
+
+def get_hedge_budget() -> HedgeBudget:
+    """Return the process-wide hedge budget shared by every Ollama client."""
+    global _hedge_budget
+    if _hedge_budget is None:
+        with _breaker_lock:
+            if _hedge_budget is None:
+                _hedge_budget = HedgeBudget()
+    return _hedge_budget
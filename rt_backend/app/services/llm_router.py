@@ -0,0 +1,279 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.services.llm_resilience import OPEN, AdaptiveTimeouts, CircuitBreaker
+from app.services.llm_scheduler import LLMScheduler
+from app.services.ollama_endpoints import EndpointPool
+from app.services.ollama_service import (
+    DEFAULT_TASK_TIMEOUTS, TASK_BATCH_JD_SCORE, TASK_COMPARE, TASK_EXTRACT_DETAILS, TASK_EXTRACT_EMAIL,
+    TASK_JD_SCORE, TASK_RANK, AsyncOllamaClient, OllamaClient, get_async_ollama_client, get_ollama_client,
+)
+
+logger = logging.getLogger(__name__)
+
+# Backends, and the per-task route that lets the router choose between them
+LOCAL = "local"
+REMOTE = "remote"
+AUTO = "auto"
+ROUTES = (LOCAL, REMOTE, AUTO)
+
+# Task type of every public client method, which decides its route
+METHOD_TASKS = {
+    "extract_email_from_resume": TASK_EXTRACT_EMAIL,
+    "extract_candidate_details": TASK_EXTRACT_DETAILS,
+    "compare_candidate_with_jd": TASK_JD_SCORE,
+    "score_candidates_with_jd": TASK_BATCH_JD_SCORE,
+    "compare_candidates": TASK_COMPARE,
+    "rank_resumes": TASK_RANK,
+}
+
+
+def parse_task_map(spec: str, cast: Callable[[str], Any] = str) -> Dict[str, Any]:
+    """
+    Parse "task=value,task=value" (e.g. LLM_ROUTES, LLM_ROUTER_LATENCY_BUDGETS).
+
+    Raises:
+        ValueError: For an unknown task or a malformed entry
+    """
+    result = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        task, sep, value = entry.partition("=")
+        task = task.strip()
+        if not sep or task not in DEFAULT_TASK_TIMEOUTS:
+            raise ValueError(f"Invalid task setting {entry!r}; tasks are {', '.join(DEFAULT_TASK_TIMEOUTS)}")
+        result[task] = cast(value.strip())
+    return result
+
+
+class _OpenAICompatible:
+    """Talks to an OpenAI-compatible chat completions server instead of Ollama."""
+
+    def _transport_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        # keep_alive is Ollama-only, and OpenAI rejects unknown parameters
+        payload = {**payload, "stream": self.stream}
+        if self.stream:
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+
+_remote_lock = threading.Lock()
+_remote_shared: Dict[str, Any] = {}
+
+def _remote_defaults(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Client arguments for the remote backend. The sync and async remote
+    clients share one endpoint, scheduler, circuit breaker and set of
+    adaptive timeouts, all separate from the local ones.
+    """
+    with _remote_lock:
+        if not _remote_shared:
+            _remote_shared.update(
+                endpoints=EndpointPool([(settings.LLM_REMOTE_BASE_URL.rstrip("/"), 1)]),
+                scheduler=LLMScheduler(max_concurrency=settings.LLM_REMOTE_CONCURRENCY),
+                circuit_breaker=CircuitBreaker(),
+                timeouts=AdaptiveTimeouts(DEFAULT_TASK_TIMEOUTS),
+            )
+    defaults = dict(_remote_shared, model=settings.LLM_REMOTE_MODEL or settings.OPENAI_MODEL, pool_size=settings.LLM_REMOTE_CONCURRENCY)
+    defaults.update(kwargs)
+    return defaults
+
+
+class RemoteLLMClient(_OpenAICompatible, OllamaClient):
+    """OllamaClient for an OpenAI-compatible backend (OpenAI by default)."""
+
+    def __init__(self, api_key: str = None, **kwargs):
+        super().__init__(**_remote_defaults(kwargs))
+        api_key = api_key or settings.OPENAI_API_KEY
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+
+class AsyncRemoteLLMClient(_OpenAICompatible, AsyncOllamaClient):
+    """Async version of RemoteLLMClient."""
+
+    def __init__(self, api_key: str = None, **kwargs):
+        super().__init__(**_remote_defaults(kwargs))
+        api_key = api_key or settings.OPENAI_API_KEY
+        if api_key:
+            self.http.headers["Authorization"] = f"Bearer {api_key}"
+
+
+Client = Union[OllamaClient, AsyncOllamaClient]
+
+
+class LLMRouter:
+    """
+    One client interface over the local Ollama backend and an optional
+    OpenAI-compatible remote.
+
+    The router has the public methods of OllamaClient (or of
+    AsyncOllamaClient, when built from async clients) and sends each call to
+    a backend picked by its task type. A task routed "local" or "remote"
+    always goes there. A task routed "auto" stays local unless the local
+    scheduler has `overflow_queue_depth` or more requests waiting, the
+    task's observed local p95 latency exceeds its latency budget, or the
+    local circuit is open. The remote is only used while it is within
+    `remote_max_per_minute` calls (the cost budget) and its own circuit is
+    not open; otherwise the call stays local.
+    """
+
+    def __init__(
+        self,
+        local: Client,
+        remote: Optional[Client] = None,
+        routes: Dict[str, str] = None,
+        default_route: str = None,
+        latency_budgets: Dict[str, float] = None,
+        overflow_queue_depth: int = None,
+        remote_max_per_minute: int = None,
+    ):
+        self.local = local
+        self.remote = remote
+        self.routes = parse_task_map(settings.LLM_ROUTES) if routes is None else routes
+        self.default_route = default_route or settings.LLM_ROUTE_DEFAULT
+        for route in [self.default_route, *self.routes.values()]:
+            if route not in ROUTES:
+                raise ValueError(f"Unknown LLM route {route!r}; use one of {', '.join(ROUTES)}")
+        self.latency_budgets = (
+            parse_task_map(settings.LLM_ROUTER_LATENCY_BUDGETS, float) if latency_budgets is None else latency_budgets
+        )
+        self.overflow_queue_depth = (
+            settings.LLM_ROUTER_OVERFLOW_QUEUE_DEPTH if overflow_queue_depth is None else overflow_queue_depth
+        )
+        self.remote_max_per_minute = (
+            settings.LLM_ROUTER_REMOTE_MAX_PER_MINUTE if remote_max_per_minute is None else remote_max_per_minute
+        )
+        self._remote_calls: Deque[float] = deque()
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._reasons: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _overflow_reason(self, task: str) -> Optional[str]:
+        """Why an auto-routed task should leave the local backend, or None."""
+        if self.local.circuit_breaker.state == OPEN:
+            return "local_circuit_open"
+        if self.overflow_queue_depth and self.local.scheduler.queue_depth() >= self.overflow_queue_depth:
+            return "local_queue_depth"
+        budget = self.latency_budgets.get(task)
+        if budget is not None:
+            p95 = self.local.timeouts.latency(task, 0.95)
+            if p95 is not None and p95 > budget:
+                return "local_latency_budget"
+        return None
+
+    def _take_remote_budget(self) -> bool:
+        # Caller holds the lock
+        if not self.remote_max_per_minute:
+            return True
+        now = time.monotonic()
+        while self._remote_calls and now - self._remote_calls[0] >= 60.0:
+            self._remote_calls.popleft()
+        if len(self._remote_calls) >= self.remote_max_per_minute:
+            return False
+        self._remote_calls.append(now)
+        return True
+
+    def route(self, task: str) -> Tuple[str, str]:
+        """Pick the backend for one call of a task: (backend, reason)."""
+        route = self.routes.get(task, self.default_route)
+        if self.remote is None or route == LOCAL:
+            backend, reason = LOCAL, "configured" if self.remote is not None else "no_remote"
+        elif route == REMOTE:
+            backend, reason = REMOTE, "configured"
+        else:
+            reason = self._overflow_reason(task)
+            backend, reason = (REMOTE, reason) if reason else (LOCAL, "auto")
+
+        with self._lock:
+            if backend == REMOTE:
+                if self.remote.circuit_breaker.state == OPEN:
+                    backend, reason = LOCAL, "remote_circuit_open"
+                elif not self._take_remote_budget():
+                    backend, reason = LOCAL, "remote_budget_exhausted"
+            counts = self._counts.setdefault(task, {LOCAL: 0, REMOTE: 0})
+            counts[backend] += 1
+            self._reasons[reason] = self._reasons.get(reason, 0) + 1
+        return backend, reason
+
+    def client_for(self, task: str) -> Client:
+        backend, reason = self.route(task)
+        if backend == REMOTE:
+            logger.info(f"Routing {task} to the remote LLM backend ({reason})")
+            return self.remote
+        return self.local
+
+    def scoring_concurrency(self, concurrency: Optional[int] = None) -> int:
+        """Fan-out width of the local backend, which takes every call the remote cannot."""
+        return self.local.scoring_concurrency(concurrency)
+
+    def __getattr__(self, name: str):
+        task = METHOD_TASKS.get(name)
+        if task is None:
+            raise AttributeError(f"{type(self).__name__} has no attribute {name!r}")
+        return getattr(self.client_for(task), name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "remote_enabled": self.remote is not None,
+                "routes": {task: self.routes.get(task, self.default_route) for task in DEFAULT_TASK_TIMEOUTS},
+                "latency_budgets_seconds": dict(self.latency_budgets),
+                "overflow_queue_depth": self.overflow_queue_depth,
+                "remote_max_per_minute": self.remote_max_per_minute,
+                "remote_calls_last_minute": sum(1 for t in self._remote_calls if time.monotonic() - t < 60.0),
+                "calls": {task: dict(counts) for task, counts in sorted(self._counts.items())},
+                "reasons": dict(sorted(self._reasons.items())),
+            }
+
+
+_router: Optional[LLMRouter] = None
+_async_router: Optional[LLMRouter] = None
+_router_lock = threading.Lock()
+
+def get_llm_router() -> LLMRouter:
+    """
+    Return the process-wide router over the shared sync clients. Without
+    LLM_REMOTE_ENABLED every call goes to the local Ollama client.
+    """
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                remote = RemoteLLMClient() if settings.LLM_REMOTE_ENABLED else None
+                _router = LLMRouter(get_ollama_client(), remote)
+    return _router
+
+def get_async_llm_router() -> LLMRouter:
+    """Return the process-wide router over the shared async clients."""
+    global _async_router
+    if _async_router is None:
+        with _router_lock:
+            if _async_router is None:
+                remote = AsyncRemoteLLMClient() if settings.LLM_REMOTE_ENABLED else None
+                _async_router = LLMRouter(get_async_ollama_client(), remote)
+    return _async_router
+
+def router_stats() -> Dict[str, Any]:
+    """Routing decisions of whichever routers exist so far."""
+    return {
+        "sync": _router.stats() if _router is not None else None,
+        "async": _async_router.stats() if _async_router is not None else None,
+    }
+
+async def close_llm_routers() -> None:
+    """Release the remote clients' pooled connections and forget the routers (app shutdown)."""
+    global _router, _async_router
+    with _router_lock:
+        router, async_router = _router, _async_router
+        _router = _async_router = None
+    if async_router is not None and async_router.remote is not None:
+        await async_router.remote.aclose()
+    if router is not None and router.remote is not None:
+        router.remote.close()
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Deque, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+
+class _Waiter:
+    def __init__(self, lane: str, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.lane = lane
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.future = loop.create_future()
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+            return
+        def resolve():
+            if not self.future.done():
+                self.future.set_result(None)
+        try:
+            self.loop.call_soon_threadsafe(resolve)
+        except RuntimeError:
+            # Event loop already closed; the waiter is gone
+            pass
+
+
+class _LaneStats:
+    def __init__(self, weight: int):
+        self.weight = weight
+        self.current_weight = 0
+        self.queue: Deque[_Waiter] = deque()
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=1000)
+
+    def record_wait(self, wait: float) -> None:
+        self.granted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.recent_waits.append(wait)
+
+    def snapshot(self) -> Dict[str, Any]:
+        waits = sorted(self.recent_waits)
+        def pct(p):
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 4) if waits else 0.0
+        return {
+            "weight": self.weight,
+            "queue_depth": len(self.queue),
+            "granted": self.granted,
+            "avg_wait_seconds": round(self.total_wait / self.granted, 4) if self.granted else 0.0,
+            "p50_wait_seconds": pct(0.50),
+            "p95_wait_seconds": pct(0.95),
+            "max_wait_seconds": round(self.max_wait, 4),
+        }
+
+
+class LLMScheduler:
+    """
+    Central admission control for LLM requests.
+
+    At most `max_concurrency` requests run at once (match it to Ollama's
+    OLLAMA_NUM_PARALLEL). When the cap is reached, callers queue in a priority
+    lane and freed slots are handed out by smooth weighted round-robin, so the
+    interactive lane is served first without starving bulk work. Works for
+    both threads and asyncio tasks.
+    """
+
+    def __init__(self, max_concurrency: int = None, lane_weights: Dict[str, int] = None):
+        self.max_concurrency = max_concurrency or settings.OLLAMA_NUM_PARALLEL
+        lane_weights = lane_weights or {
+            INTERACTIVE: settings.LLM_INTERACTIVE_WEIGHT,
+            BULK: settings.LLM_BULK_WEIGHT,
+        }
+        self._lanes = {lane: _LaneStats(weight) for lane, weight in lane_weights.items()}
+        self._active = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, lane: str = INTERACTIVE):
+        """Block the calling thread until a slot in `lane` is granted."""
+        waiter = self._enqueue(lane, None)
+        if waiter is not None:
+            waiter.event.wait()
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def async_slot(self, lane: str = INTERACTIVE):
+        """Await a slot in `lane` without blocking the event loop."""
+        waiter = self._enqueue(lane, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                with self._lock:
+                    granted = waiter.granted
+                    if not granted:
+                        self._lanes[waiter.lane].queue.remove(waiter)
+                if granted:
+                    self._release()
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def try_slot(self, lane: str = INTERACTIVE) -> bool:
+        """Take a slot in `lane` only if one is free right now; give it back with release()."""
+        if lane not in self._lanes:
+            raise ValueError(f"Unknown scheduler lane: {lane}")
+        with self._lock:
+            return self._grant_now(lane)
+
+    def release(self) -> None:
+        """Give back a slot taken with try_slot()."""
+        self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "active": self._active,
+                "lanes": {lane: s.snapshot() for lane, s in self._lanes.items()},
+            }
+
+    def queue_depth(self, lane: Optional[str] = None) -> int:
+        """Number of requests waiting, in one lane or across all lanes."""
+        with self._lock:
+            if lane is not None:
+                return len(self._lanes[lane].queue)
+            return sum(len(s.queue) for s in self._lanes.values())
+
+    def _enqueue(self, lane: str, loop: Optional[asyncio.AbstractEventLoop]) -> Optional[_Waiter]:
+        """Grant immediately (returns None) or queue and return the waiter."""
+        if lane not in self._lanes:
+            raise ValueError(f"Unknown scheduler lane: {lane}")
+        with self._lock:
+            if self._grant_now(lane):
+                return None
+            waiter = _Waiter(lane, loop)
+            self._lanes[lane].queue.append(waiter)
+            return waiter
+
+    def _grant_now(self, lane: str) -> bool:
+        # Caller holds the lock; nobody jumps the queue
+        if self._active < self.max_concurrency and not any(s.queue for s in self._lanes.values()):
+            self._active += 1
+            self._lanes[lane].record_wait(0.0)
+            return True
+        return False
+
+    def _release(self) -> None:
+        to_wake = []
+        with self._lock:
+            self._active -= 1
+            while self._active < self.max_concurrency:
+                waiter = self._next_waiter()
+                if waiter is None:
+                    break
+                waiter.granted = True
+                self._active += 1
+                self._lanes[waiter.lane].record_wait(time.monotonic() - waiter.enqueued_at)
+                to_wake.append(waiter)
+        for waiter in to_wake:
+            waiter.wake()
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        # Smooth weighted round-robin over lanes that have someone waiting
+        waiting = [s for s in self._lanes.values() if s.queue]
+        if not waiting:
+            return None
+        total = 0
+        for s in waiting:
+            s.current_weight += s.weight
+            total += s.weight
+        chosen = max(waiting, key=lambda s: s.current_weight)
+        chosen.current_weight -= total
+        return chosen.queue.popleft()
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Return the process-wide scheduler shared by every LLM client."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler()
+    return _scheduler
@@ -0,0 +1,95 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StreamAccumulator:
+    """
+    Rebuild a chat completion from a streamed (SSE) response.
+
+    Deltas are scanned as they arrive; once the first top-level JSON object
+    in the content closes, `complete` is set and anything the model writes
+    afterwards (explanations, trailing whitespace) is ignored, so the caller
+    can drop the connection instead of waiting for the rest.
+
+    Otherwise the stream is read to its end: a finish_reason is followed by
+    the chunk carrying the token usage, so `finished` is only set once
+    that usage (or [DONE]) has arrived.
+    """
+
+    def __init__(self):
+        self.complete = False
+        self.finished = False
+        self.finish_reason: Optional[str] = None
+        self.usage: Optional[Dict[str, Any]] = None
+        self.chunks = 0
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def done(self) -> bool:
+        return self.complete or self.finished
+
+    @property
+    def content(self) -> str:
+        return "".join(self._parts)
+
+    def feed_line(self, line: str) -> bool:
+        """Consume one SSE line; returns True once nothing more is needed."""
+        if not line.startswith("data:"):
+            return self.done
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            self.finished = True
+            return True
+
+        chunk = json.loads(data)
+        self.chunks += 1
+        if chunk.get("usage"):
+            self.usage = chunk["usage"]
+        choices = chunk.get("choices") or []
+        if choices:
+            self._scan(choices[0].get("delta", {}).get("content") or "")
+            if choices[0].get("finish_reason"):
+                self.finish_reason = choices[0]["finish_reason"]
+        # The usage chunk comes after the finish_reason and is the last one needed
+        if self.finish_reason is not None and self.usage is not None:
+            self.finished = True
+        return self.done
+
+    def response(self) -> Dict[str, Any]:
+        """The accumulated stream in the shape of a non-streamed chat completion."""
+        response = {
+            "choices": [{
+                "message": {"role": "assistant", "content": self.content},
+                "finish_reason": self.finish_reason or ("stop" if self.complete else None),
+            }],
+        }
+        if self.usage is not None:
+            response["usage"] = self.usage
+        return response
+
+    def _scan(self, text: str) -> None:
+        for char in text:
+            if self.complete:
+                return
+            self._parts.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"' and self._depth > 0:
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0 and char == "}":
+                    self.complete = True
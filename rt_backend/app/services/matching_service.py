@@ -7,10 +7,8 @@ from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.db.models import Candidate, Job, CandidateJobMatch
 from app.schemas.candidate import CandidateWithScores
-from app.services.ollama_service import OllamaClient
-
-# Initialize Ollama client
-ollama_client = OllamaClient()
+from app.services.llm_scheduler import BULK
+from app.services.llm_router import get_llm_router
 
 def compare_candidate_with_jd(candidate: Candidate, job: Job) -> float:
     """
@@ -26,7 +24,7 @@ def compare_candidate_with_jd(candidate: Candidate, job: Job) -> float:
     
     # Prepare candidate info as dictionary
     candidate_info = {
-        "id": candidate.id,
+        "id": candidate.email,
         "name": candidate.name,
         "resume_text": candidate.resume_text,
         "current_ctc": candidate.current_ctc,
@@ -43,22 +41,58 @@ def compare_candidate_with_jd(candidate: Candidate, job: Job) -> float:
         "max_budget": job.max_budget
     }
     
-    # Use Ollama client to get match score
-    score = ollama_client.compare_candidate_with_jd(candidate_info, job_info)
+    # Use the LLM router to get match score
+    score = get_llm_router().compare_candidate_with_jd(candidate_info, job_info, priority=BULK)
     
     return score
 
-def compare_candidates(candidates: List[Candidate], job: Job) -> Dict[int, float]:
+def score_candidates_with_jd(candidates: List[Candidate], job: Job) -> Dict[str, float]:
+    """
+    Score candidates against a job description, several per LLM request.
+    Returns scores keyed by candidate email.
+    """
+    candidates_info = []
+    for c in candidates:
+        additional_info = {}
+        if c.additional_info:
+            try:
+                additional_info = json.loads(c.additional_info)
+            except:
+                additional_info = {"data": c.additional_info}
+
+        candidates_info.append({
+            "id": c.email,
+            "name": c.name,
+            "resume_text": c.resume_text,
+            "current_ctc": c.current_ctc,
+            "expected_ctc": c.expected_ctc,
+            "additional_info": additional_info
+        })
+
+    # Prepare job info as dictionary
+    job_info = {
+        "id": job.id,
+        "title": job.title,
+        "jd_text": job.jd_text,
+        "min_budget": job.min_budget,
+        "max_budget": job.max_budget
+    }
+
+    # Use the LLM router to score packed batches of candidates
+    return get_llm_router().score_candidates_with_jd(candidates_info, job_info, priority=BULK)
+
+def compare_candidates(candidates: List[Candidate], job: Job) -> Dict[str, float]:
     """
-    Compare candidates with each other in context of a job and return comparative scores.
+    Compare candidates with each other in context of a job and return comparative scores,
+    keyed by candidate email.
     """
     # If no candidates or only one candidate, return early
     if not candidates or len(candidates) <= 1:
-        return {c.id: 0.5 for c in candidates}
+        return {c.email: 0.5 for c in candidates}
     
-    # Prepare candidate information
+    # Prepare candidate information; the prompt numbers candidates 1..n
     candidates_info = []
-    for c in candidates:
+    for number, c in enumerate(candidates, start=1):
         additional_info = {}
         if c.additional_info:
             try:
@@ -67,7 +101,7 @@ def compare_candidates(candidates: List[Candidate], job: Job) -> Dict[int, float
                 additional_info = {"data": c.additional_info}
         
         candidates_info.append({
-            "id": c.id,
+            "id": number,
             "name": c.name,
             "resume_text": c.resume_text,
             "current_ctc": c.current_ctc,
@@ -84,10 +118,10 @@ def compare_candidates(candidates: List[Candidate], job: Job) -> Dict[int, float
         "max_budget": job.max_budget
     }
     
-    # Use Ollama client to get comparative scores
-    scores = ollama_client.compare_candidates(candidates_info, job_info)
+    # Use the LLM router to get comparative scores
+    scores = get_llm_router().compare_candidates(candidates_info, job_info, priority=BULK)
     
-    return scores
+    return {c.email: scores.get(number, 0.5) for number, c in enumerate(candidates, start=1)}
 
 def match_candidates_with_job(db: Session, job_id: int) -> Tuple[List[CandidateWithScores], List[CandidateWithScores]]:
     """
@@ -105,11 +139,8 @@ def match_candidates_with_job(db: Session, job_id: int) -> Tuple[List[CandidateW
     if not candidates:
         return [], []
     
-    # For each candidate, compare with JD
-    jd_scores = {}
-    for candidate in candidates:
-        score = compare_candidate_with_jd(candidate, job)
-        jd_scores[candidate.id] = score
+    # Compare candidates with JD, batching as many per request as fit
+    jd_scores = score_candidates_with_jd(candidates, job)
     
     # Compare candidates with each other
     comparative_scores = compare_candidates(candidates, job)
@@ -124,16 +155,16 @@ def match_candidates_with_job(db: Session, job_id: int) -> Tuple[List[CandidateW
         
         if match_record:
             # Update existing record
-            match_record.jd_match_score = jd_scores.get(candidate.id, 0)
-            match_record.comparative_score = comparative_scores.get(candidate.id, 0)
+            match_record.jd_match_score = jd_scores.get(candidate.email, 0)
+            match_record.comparative_score = comparative_scores.get(candidate.email, 0)
             db.add(match_record)
         else:
             # Insert new record
             match_record = CandidateJobMatch(
                 candidate_email=candidate.email,
                 job_id=job.id,
-                jd_match_score=jd_scores.get(candidate.id, 0),
-                comparative_score=comparative_scores.get(candidate.id, 0)
+                jd_match_score=jd_scores.get(candidate.email, 0),
+                comparative_score=comparative_scores.get(candidate.email, 0)
             )
             db.add(match_record)
     
@@ -146,12 +177,12 @@ def match_candidates_with_job(db: Session, job_id: int) -> Tuple[List[CandidateW
     for candidate in candidates:
         candidate_with_jd_score = CandidateWithScores(
             **{c.name: getattr(candidate, c.name) for c in candidate.__table__.columns},
-            jd_match_score=jd_scores.get(candidate.id, 0)
+            jd_match_score=jd_scores.get(candidate.email, 0)
         )
         
         candidate_with_comparative_score = CandidateWithScores(
             **{c.name: getattr(candidate, c.name) for c in candidate.__table__.columns},
-            comparative_score=comparative_scores.get(candidate.id, 0)
+            comparative_score=comparative_scores.get(candidate.email, 0)
         )
         
         jd_matches.append(candidate_with_jd_score)
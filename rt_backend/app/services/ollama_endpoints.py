@@ -0,0 +1,219 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def parse_endpoints(spec: str) -> List[Tuple[str, int]]:
+    """
+    Parse an endpoint list such as "http://gpu1:11434|3,http://cpu1:11434".
+
+    Each entry is a base URL with an optional "|weight" suffix (default 1).
+    """
+    endpoints = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        url, _, weight = entry.partition("|")
+        endpoints.append((url.strip().rstrip("/"), int(weight) if weight.strip() else 1))
+    return endpoints
+
+
+class OllamaEndpoint:
+    """One Ollama node and its routing state."""
+
+    def __init__(self, url: str, weight: int = 1):
+        self.url = url
+        self.weight = max(1, weight)
+        self.outstanding = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.total_requests = 0
+        self.total_failures = 0
+        self.last_error: Optional[str] = None
+        self.last_probe: Optional[float] = None
+
+    @property
+    def completions_url(self) -> str:
+        return f"{self.url}/v1/chat/completions"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "weight": self.weight,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "consecutive_failures": self.consecutive_failures,
+            "total_requests": self.total_requests,
+            "total_failures": self.total_failures,
+            "last_error": self.last_error,
+            "last_probe": self.last_probe,
+        }
+
+
+def _rendezvous_score(key: str, endpoint: OllamaEndpoint) -> float:
+    digest = hashlib.sha256(f"{key}|{endpoint.url}".encode("utf-8")).digest()
+    # Uniform in (0, 1); -weight / ln(u) gives each node a share proportional to its weight
+    u = (int.from_bytes(digest[:8], "big") + 1) / (2 ** 64 + 1)
+    return -endpoint.weight / math.log(u)
+
+
+class EndpointPool:
+    """
+    Spread requests over several Ollama nodes.
+
+    Requests go to the healthy node with the fewest outstanding requests
+    relative to its weight, or, with an affinity key, to the key's node
+    unless that node already has `affinity_max_outstanding` requests in
+    flight (0 = no limit). A node is ejected after `failure_threshold`
+    consecutive request failures or a failed health probe, and re-admitted
+    once a background probe succeeds again.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[Tuple[str, int]],
+        failure_threshold: int = None,
+        probe_interval: float = None,
+        affinity_max_outstanding: int = None,
+    ):
+        if not endpoints:
+            raise ValueError("At least one Ollama endpoint is required")
+        self.endpoints = [OllamaEndpoint(url, weight) for url, weight in endpoints]
+        self.failure_threshold = failure_threshold or settings.OLLAMA_EJECT_AFTER_FAILURES
+        self.probe_interval = probe_interval or settings.OLLAMA_HEALTH_CHECK_INTERVAL
+        self.affinity_max_outstanding = (
+            settings.LLM_PREFIX_AFFINITY_MAX_OUTSTANDING if affinity_max_outstanding is None else affinity_max_outstanding
+        )
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._probe_thread: Optional[threading.Thread] = None
+        self._probe_session = requests.Session()
+
+    def acquire(self, affinity: Optional[str] = None, exclude: Optional[OllamaEndpoint] = None) -> OllamaEndpoint:
+        """
+        Pick a node for the next request and count it as outstanding.
+
+        Requests with the same `affinity` key go to the same healthy node
+        (weighted rendezvous hashing), so a node keeps serving the prompts
+        whose prefix it already has cached, until that node is saturated;
+        others go to the least-loaded node.
+        `exclude` steers a hedged request away from the node already working
+        on it, unless no other node is available.
+        """
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.healthy]
+            if not candidates:
+                # Every node is ejected; keep trying rather than failing outright
+                candidates = self.endpoints
+            if exclude is not None and len(candidates) > 1:
+                candidates = [e for e in candidates if e is not exclude]
+            endpoint = None
+            if affinity is not None:
+                endpoint = max(candidates, key=lambda e: _rendezvous_score(affinity, e))
+                if 0 < self.affinity_max_outstanding <= endpoint.outstanding:
+                    # A cache hit is not worth queueing behind a busy node
+                    endpoint = None
+            if endpoint is None:
+                # Ties (e.g. sequential callers) are broken by lifetime share of requests
+                endpoint = min(candidates, key=lambda e: ((e.outstanding + 1) / e.weight, e.total_requests / e.weight))
+            endpoint.outstanding += 1
+            endpoint.total_requests += 1
+            return endpoint
+
+    def release(self, endpoint: OllamaEndpoint, success: Optional[bool], error: Optional[str] = None) -> None:
+        """
+        Finish a request started with acquire() and update the node's health.
+        success=None marks a request abandoned by the client (a hedge that
+        lost), which says nothing about the node.
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            if success is None:
+                return
+            if success:
+                endpoint.consecutive_failures = 0
+                return
+            endpoint.total_failures += 1
+            endpoint.consecutive_failures += 1
+            endpoint.last_error = error
+            if endpoint.healthy and endpoint.consecutive_failures >= self.failure_threshold:
+                endpoint.healthy = False
+                logger.warning(f"Ejecting Ollama endpoint {endpoint.url} after {endpoint.consecutive_failures} consecutive failures")
+
+    def probe(self, endpoint: OllamaEndpoint) -> bool:
+        """Check a node's liveness and eject or re-admit it accordingly."""
+        try:
+            response = self._probe_session.get(f"{endpoint.url}/api/version", timeout=settings.OLLAMA_CONNECT_TIMEOUT)
+            ok = response.status_code == 200
+            error = None if ok else f"HTTP {response.status_code}"
+        except requests.exceptions.RequestException as e:
+            ok, error = False, str(e)
+
+        with self._lock:
+            endpoint.last_probe = time.time()
+            if ok:
+                if not endpoint.healthy:
+                    logger.info(f"Re-admitting Ollama endpoint {endpoint.url}")
+                endpoint.healthy = True
+                endpoint.consecutive_failures = 0
+            else:
+                if endpoint.healthy:
+                    logger.warning(f"Ejecting Ollama endpoint {endpoint.url}: health probe failed ({error})")
+                endpoint.healthy = False
+                endpoint.last_error = error
+        return ok
+
+    def probe_all(self) -> None:
+        for endpoint in self.endpoints:
+            self.probe(endpoint)
+
+    def start_health_checks(self) -> None:
+        """Start probing every node in a background thread."""
+        if self._probe_thread is not None and self._probe_thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.probe_interval):
+                self.probe_all()
+
+        self._probe_thread = threading.Thread(target=loop, name="ollama-health-checks", daemon=True)
+        self._probe_thread.start()
+
+    def stop_health_checks(self) -> None:
+        self._stop.set()
+        if self._probe_thread is not None:
+            self._probe_thread.join(timeout=self.probe_interval)
+            self._probe_thread = None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [e.to_dict() for e in self.endpoints]
+
+
+_pool: Optional[EndpointPool] = None
+_pool_lock = threading.Lock()
+
+def get_endpoint_pool() -> EndpointPool:
+    """
+    Return the process-wide endpoint pool built from OLLAMA_ENDPOINTS,
+    falling back to the single OLLAMA_BASE_URL.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                endpoints = parse_endpoints(settings.OLLAMA_ENDPOINTS) or [(settings.OLLAMA_BASE_URL.rstrip("/"), 1)]
+                _pool = EndpointPool(endpoints)
+                logger.info(f"Ollama endpoints: {[url for url, _ in endpoints]}")
+    return _pool
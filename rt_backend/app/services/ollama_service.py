@@ -1,144 +1,395 @@
+import asyncio
+import contextvars
 import requests
+import hashlib
+import httpx
 import json
 import logging
-from typing import Optional, Dict, List, Any
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional, Dict, List, Any, Tuple, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+from requests.adapters import HTTPAdapter
 from app.core.config import settings
+from app.schemas.llm import BatchJDScores, CandidateDetails, ComparativeScores, EmailExtraction, JDScore, RankingAnalysis
+from app.services.llm_cache import LLMCache, get_llm_cache, make_cache_key
+from app.services.llm_fanout import gather_bounded, map_bounded
+from app.services.llm_metrics import (
+    CIRCUIT_OPEN, CLAMP, CONNECTION_ERROR, HTTP_ERROR, PARSE, TIMEOUT, LLMMetrics, get_llm_metrics, instrumented,
+)
+from app.services.prompt_builder import EXTRACTION_PRIORITY, Prompt, PromptBuilder, get_prompt_builder, pack_batches
+from app.services.ollama_endpoints import EndpointPool, OllamaEndpoint, get_endpoint_pool
+from app.services.ollama_warmup import parse_keep_alive
+from app.services.llm_resilience import (
+    HALF_OPEN, AdaptiveTimeouts, CircuitBreaker, HedgeBudget, LLMUnavailableError, RetryPolicy, get_circuit_breaker, get_hedge_budget,
+)
+from app.services.llm_scheduler import INTERACTIVE, LLMScheduler, get_llm_scheduler
+from app.services.llm_streaming import StreamAccumulator
+from app.services.llm_singleflight import AsyncSingleFlight, SingleFlight
 
 logger = logging.getLogger(__name__)
 
-class OllamaClient:
-    """Client for interacting with a local Ollama instance."""
-    
-    def __init__(self, base_url: str = None, model: str = None):
-        self.base_url = base_url or settings.OLLAMA_BASE_URL
+# Bump whenever a prompt template changes so cached responses are not reused
+PROMPT_TEMPLATE_VERSION = "2"
+
+# Task types, used for per-task timeouts
+TASK_EXTRACT_EMAIL = "extract_email"
+TASK_EXTRACT_DETAILS = "extract_details"
+TASK_JD_SCORE = "jd_score"
+TASK_BATCH_JD_SCORE = "batch_jd_score"
+TASK_COMPARE = "compare_candidates"
+TASK_RANK = "rank_resumes"
+
+# Upper bound on the read timeout per task; adaptive timeouts only tighten these
+DEFAULT_TASK_TIMEOUTS = {
+    TASK_EXTRACT_EMAIL: settings.OLLAMA_READ_TIMEOUT,
+    TASK_EXTRACT_DETAILS: settings.OLLAMA_READ_TIMEOUT,
+    TASK_JD_SCORE: settings.OLLAMA_READ_TIMEOUT,
+    TASK_BATCH_JD_SCORE: settings.OLLAMA_READ_TIMEOUT * 2,
+    TASK_COMPARE: settings.OLLAMA_READ_TIMEOUT * 2,
+    TASK_RANK: settings.OLLAMA_READ_TIMEOUT * 4,
+}
+
+# Cap on answer tokens per task (max_tokens), also kept free in the prompt
+# budget: (base, per candidate/resume)
+TASK_OUTPUT_TOKENS = {
+    TASK_EXTRACT_EMAIL: (64, 0),
+    TASK_EXTRACT_DETAILS: (512, 0),
+    TASK_JD_SCORE: (32, 0),
+    TASK_BATCH_JD_SCORE: (32, 24),
+    TASK_COMPARE: (32, 24),
+    TASK_RANK: (128, 256),
+}
+
+# Single-field answers never need a blank line; stop a model that starts
+# explaining. Only sent without a schema: constrained JSON may be pretty-printed
+TASK_STOP_SEQUENCES = {
+    TASK_EXTRACT_EMAIL: ["\n\n"],
+    TASK_JD_SCORE: ["\n\n"],
+}
+
+_task_timeouts: Optional[AdaptiveTimeouts] = None
+
+def get_task_timeouts() -> AdaptiveTimeouts:
+    """Return the process-wide adaptive timeouts shared by the sync and async clients."""
+    global _task_timeouts
+    if _task_timeouts is None:
+        _task_timeouts = AdaptiveTimeouts(DEFAULT_TASK_TIMEOUTS)
+    return _task_timeouts
+
+StructuredOutput = TypeVar("StructuredOutput", bound=BaseModel)
+
+class ParseStats:
+    """Per-task counts of schema-valid and schema-invalid structured responses."""
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, task: str, success: bool, retried: bool = False) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(task, {"valid": 0, "invalid": 0, "retried": 0, "exhausted": 0})
+            if success:
+                counts["valid"] += 1
+                return
+            counts["invalid"] += 1
+            counts["retried" if retried else "exhausted"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {task: dict(counts) for task, counts in sorted(self._counts.items())}
+
+_parse_stats: Optional[ParseStats] = None
+
+def get_parse_stats() -> ParseStats:
+    """Return the process-wide parse counters shared by the sync and async clients."""
+    global _parse_stats
+    if _parse_stats is None:
+        _parse_stats = ParseStats()
+    return _parse_stats
+
+class BaseOllamaClient:
+    """
+    Shared configuration, prompt construction and response parsing for the
+    sync and async Ollama clients. Subclasses only differ in how they send
+    the request.
+    """
+
+    def __init__(
+        self,
+        base_url: str = None,
+        model: str = None,
+        pool_size: int = None,
+        connect_timeout: float = None,
+        read_timeout: float = None,
+        cache: Optional[LLMCache] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        endpoints: Optional[EndpointPool] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        timeouts: Optional[AdaptiveTimeouts] = None,
+        parse_stats: Optional[ParseStats] = None,
+        prompt_builder: Optional[PromptBuilder] = None,
+        metrics: Optional[LLMMetrics] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedge_budget: Optional[HedgeBudget] = None,
+    ):
+        # An explicit base_url pins the client to that node; otherwise requests
+        # are balanced over the configured endpoint pool
+        if endpoints is None:
+            endpoints = EndpointPool([(base_url.rstrip("/"), 1)]) if base_url else get_endpoint_pool()
+        self.endpoints = endpoints
+        self.base_url = endpoints.endpoints[0].url
         self.model = model or settings.OLLAMA_MODEL
-        self.completions_endpoint = f"{self.base_url}/v1/chat/completions"
-        
-        logger.info(f"Initialized Ollama client with base_url: {self.base_url}, model: {self.model}")
-    
-    def extract_email_from_resume(self, resume_text: str) -> Optional[str]:
+        self.pool_size = pool_size or settings.OLLAMA_POOL_SIZE
+        self.connect_timeout = connect_timeout or settings.OLLAMA_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or settings.OLLAMA_READ_TIMEOUT
+        self.keep_alive = parse_keep_alive(settings.OLLAMA_KEEP_ALIVE)
+        self.stream = settings.LLM_STREAMING_ENABLED
+        self.cache = cache if cache is not None else get_llm_cache()
+        self.scheduler = scheduler or get_llm_scheduler()
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker()
+        self.timeouts = timeouts or get_task_timeouts()
+        self.parse_stats = parse_stats or get_parse_stats()
+        self.metrics = metrics or get_llm_metrics()
+        self.retry = retry_policy or RetryPolicy()
+        self.hedge = settings.LLM_HEDGE_ENABLED
+        self.hedge_budget = hedge_budget or get_hedge_budget()
+        # Prompts are budgeted in this model's tokens against OLLAMA_NUM_CTX
+        self.prompts = prompt_builder or get_prompt_builder(self.model)
+
+    def _build_payload(
+        self,
+        prompt: Prompt,
+        schema: Optional[Type[BaseModel]] = None,
+        max_tokens: Optional[int] = None,
+        stop: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        if isinstance(prompt, str):
+            messages = [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+        else:
+            messages = prompt
+        payload = {
+            "model": self.model,
+            "messages": messages
+        }
+        if schema is not None:
+            # Constrain decoding to the schema so the model returns bare JSON
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": schema.__name__, "schema": schema.model_json_schema()},
+            }
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        if stop and schema is None:
+            payload["stop"] = stop
+        return payload
+
+    def _request_key(self, payload: Dict[str, Any]) -> str:
+        """Content-addressed key shared by the response cache and single-flight."""
+        return make_cache_key(self.model, PROMPT_TEMPLATE_VERSION, payload)
+
+    def _cache_lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.cache is None:
+            return None
+        return self.cache.get(key)
+
+    def _cache_store(self, key: str, response: Dict[str, Any]) -> None:
+        if self.cache is not None and response:
+            self.cache.set(key, response)
+
+    def _check_circuit(self) -> bool:
+        """Reject the call while the circuit is open; True if it goes out as the half-open probe."""
+        probe = self.circuit_breaker.state == HALF_OPEN
+        if not self.circuit_breaker.allow():
+            self.metrics.record_failure(CIRCUIT_OPEN, "circuit open; call rejected")
+            raise LLMUnavailableError("Ollama is unavailable (circuit open); failing fast")
+        return probe
+
+    def _record_outcome(self, task: str, started: float, success: bool) -> None:
+        """Feed a finished request into the circuit breaker and latency tracker."""
+        if success:
+            self.timeouts.record(task, time.monotonic() - started)
+            self.circuit_breaker.record_success()
+        else:
+            self.circuit_breaker.record_failure()
+
+    def _record_usage(self, payload: Dict[str, Any], response: Dict[str, Any]) -> None:
+        """Count tokens from the response's usage, or estimate them if a stream was cut before it."""
+        usage = response.get("usage")
+        if usage:
+            self.metrics.record_usage(usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+            return
+        self.metrics.record_usage(
+            self.prompts.count_prompt(payload["messages"]),
+            self.prompts.counter.count(self._response_content(response) or ""),
+            estimated=True,
+        )
+
+    def scoring_concurrency(self, concurrency: Optional[int] = None) -> int:
+        """Requests a fan-out keeps in flight: as many as the scheduler runs at once unless configured."""
+        return concurrency or settings.LLM_SCORING_CONCURRENCY or self.scheduler.max_concurrency
+
+    def _take_hedge_slot(self, priority: str) -> bool:
+        """Take a free scheduler slot for a hedge, if the hedge budget also allows one."""
+        if not self.scheduler.try_slot(priority):
+            return False
+        if self.hedge_budget.try_spend():
+            return True
+        self.scheduler.release()
+        return False
+
+    def _hedge_delay(self, task: str) -> Optional[float]:
+        """Seconds after which a request is hedged, or None (hedging off, or too few samples yet)."""
+        if not self.hedge:
+            return None
+        return self.timeouts.latency(task, settings.LLM_HEDGE_PERCENTILE)
+
+    @staticmethod
+    def _failure_cause(error: Exception) -> str:
+        if isinstance(error, (requests.exceptions.Timeout, httpx.TimeoutException)):
+            return TIMEOUT
+        if isinstance(error, ValueError):
+            # Response body that is not valid JSON / SSE
+            return PARSE
+        return CONNECTION_ERROR
+
+    def _clamp_score(self, score: float) -> float:
+        """Clamp a score into [0, 1], counting values the model put outside it."""
+        if not 0.0 <= score <= 1.0:
+            self.metrics.record_failure(CLAMP, f"score {score} outside [0, 1]")
+        return max(0.0, min(1.0, score))
+
+    @staticmethod
+    def _max_tokens(task: str, items: int = 1) -> int:
+        base, per_item = TASK_OUTPUT_TOKENS[task]
+        return base + per_item * items
+
+    def _affinity_key(self, payload: Dict[str, Any]) -> Optional[str]:
         """
-        Extract email address from resume text using Ollama LLM.
-        
-        Args:
-            resume_text: The text content of the resume
-            
-        Returns:
-            Extracted email address or None if not found
+        Requests sharing a system message (a job's stable prompt prefix) are
+        pinned to one node, where Ollama can reuse that prefix's KV cache.
         """
-        if not resume_text or not resume_text.strip():
-            logger.info("Email extraction skipped: input text is empty or whitespace.")
+        if not settings.LLM_PREFIX_AFFINITY:
             return None
-        
-        # Truncate text if it's too long to avoid token limits
-        truncated_text = resume_text[:4000]  # Using a conservative limit
-        
-        prompt = f"""
-        Extract the email address from the following resume text. Return ONLY the email address.
-        If no email is found, respond with "No email found".
-        
-        Resume text:
-        {truncated_text}
+        system = next((m["content"] for m in payload["messages"] if m["role"] == "system"), None)
+        if system is None:
+            return None
+        return hashlib.sha256(f"{self.model}\n{system}".encode("utf-8")).hexdigest()
+
+    def _transport_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Add per-request transport options that stay out of the cache key."""
+        payload = {**payload, "keep_alive": self.keep_alive, "stream": self.stream}
+        if self.stream:
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    def _parse_attempts(self, schema: Optional[Type[BaseModel]]) -> int:
+        return 1 + settings.LLM_PARSE_RETRIES if schema is not None else 1
+
+    def _accept(self, response: Dict[str, Any], schema: Optional[Type[BaseModel]], task: str, attempt: int) -> bool:
         """
-        
-        try:
-            response = self._call_ollama(prompt)
-            
-            # Extract the content from the response
-            if response and "choices" in response:
-                content = response["choices"][0]["message"]["content"].strip()
-                
-                # Check if the response indicates no email was found
-                if content.lower() == "no email found":
-                    return None
-                
-                # Basic email validation - not comprehensive but helps filter obvious non-emails
-                if "@" in content and "." in content:
-                    # Extract just the email if there's additional text
-                    import re
-                    email_match = re.search(r'[\w.+-]+@[\w-]+\.[\w.-]+', content)
-                    if email_match:
-                        return email_match.group(0)
-                    return content
-                
-                return None
-            
+        Decide whether a response is final. Transport failures (empty response)
+        are final so the caller's default applies; a schema-invalid response is
+        counted and retried until the attempts run out.
+        """
+        if not response:
+            self.metrics.record_fallback()
+            return True
+        if schema is None:
+            return True
+        if self._structured(response, schema) is not None:
+            self.parse_stats.record(task, success=True)
+            return True
+        last = attempt + 1 >= self._parse_attempts(schema)
+        self.parse_stats.record(task, success=False, retried=not last)
+        self.metrics.record_failure(PARSE, f"{task}: output does not match {schema.__name__}: {(self._response_content(response) or '')[:200]}")
+        if last:
+            self.metrics.record_fallback()
+        logger.warning(f"Ollama returned output that does not match {schema.__name__} (attempt {attempt + 1}, task {task})")
+        return False
+
+    @staticmethod
+    def _response_content(response: Dict[str, Any]) -> Optional[str]:
+        """Return the stripped message content of a chat completion, if any."""
+        if response and "choices" in response:
+            return response["choices"][0]["message"]["content"].strip()
+        return None
+
+    @classmethod
+    def _structured(cls, response: Dict[str, Any], schema: Type[StructuredOutput]) -> Optional[StructuredOutput]:
+        """Validate a chat completion's content against `schema`, or None if it does not match."""
+        content = cls._response_content(response)
+        if content is None:
             return None
-        
-        except Exception as e:
-            logger.error(f"Error extracting email with Ollama: {e}", exc_info=True)
+        try:
+            return schema.model_validate_json(content)
+        except ValidationError:
             return None
-    
-    def extract_candidate_details(self, resume_text: str) -> Dict[str, Any]:
-        """
-        Extract comprehensive candidate details from resume text.
-        
-        Args:
-            resume_text: The text content of the resume
-            
-        Returns:
-            Dictionary containing extracted details like name, email, skills, experience, etc.
+
+    # ---- Email extraction ----
+
+    def _email_prompt(self, resume_text: str) -> str:
+        def render(jd: str, resumes: List[str]) -> str:
+            return f"""
+        Extract the email address from the following resume text.
+        Respond with JSON: {{"email": "<address>"}}, or {{"email": null}} if no email is found.
+
+        Resume text:
+        {resumes[0]}
         """
-        if not resume_text or not resume_text.strip():
-            logger.info("Candidate extraction skipped: input text is empty or whitespace.")
-            return {}
-        
-        # Truncate text if it's too long
-        truncated_text = resume_text[:4000]
-        
-        prompt = f"""
-        Extract the following information from this resume and return as JSON:
-        1. Full name
-        2. Email address
-        3. Phone number
-        4. Skills (as an array)
-        5. Years of experience (as a number)
-        6. Education (highest degree)
-        
+
+        return self.prompts.build(render, self._max_tokens(TASK_EXTRACT_EMAIL), resumes=[resume_text], priority=EXTRACTION_PRIORITY)
+
+    @staticmethod
+    def _clean_email(value: Optional[str]) -> Optional[str]:
+        if not value:
+            return None
+
+        # Basic email validation - not comprehensive but helps filter obvious non-emails
+        email_match = re.search(r'[\w.+-]+@[\w-]+\.[\w.-]+', value)
+        return email_match.group(0) if email_match else None
+
+    def _parse_email(self, response: Dict[str, Any]) -> Optional[str]:
+        result = self._structured(response, EmailExtraction)
+        if result is None:
+            return None
+        return self._clean_email(result.email)
+
+    # ---- Candidate details ----
+
+    def _details_prompt(self, resume_text: str) -> str:
+        def render(jd: str, resumes: List[str]) -> str:
+            return f"""
+        Extract the following information from this resume as JSON:
+        full_name, email, phone, skills (array of strings),
+        years_of_experience (number) and education (highest degree).
+
         For any field where information isn't found, use null.
-        
+
         Resume text:
-        {truncated_text}
+        {resumes[0]}
         """
-        
-        try:
-            response = self._call_ollama(prompt)
-            
-            if response and "choices" in response:
-                content = response["choices"][0]["message"]["content"].strip()
-                
-                # Try to parse the JSON response
-                try:
-                    # Find JSON in the response (handles cases where the model outputs extra text)
-                    import re
-                    json_match = re.search(r'({[\s\S]*})', content)
-                    if json_match:
-                        parsed_json = json.loads(json_match.group(1))
-                        return parsed_json
-                    
-                    # If no JSON pattern found, try parsing the whole content
-                    return json.loads(content)
-                except json.JSONDecodeError:
-                    logger.error("Failed to parse JSON from Ollama response")
-                    return {"error": "Failed to parse candidate details"}
-            
-            return {}
-        
-        except Exception as e:
-            logger.error(f"Error extracting candidate details with Ollama: {e}", exc_info=True)
+
+        return self.prompts.build(render, self._max_tokens(TASK_EXTRACT_DETAILS), resumes=[resume_text], priority=EXTRACTION_PRIORITY)
+
+    def _parse_details(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        result = self._structured(response, CandidateDetails)
+        if result is None:
             return {}
-    
-    def compare_candidate_with_jd(self, candidate_info: Dict[str, Any], job_info: Dict[str, Any]) -> float:
-        """
-        Compare a candidate with a job description and return a match score.
-        
-        Args:
-            candidate_info: Dictionary containing candidate details
-            job_info: Dictionary containing job details
-            
-        Returns:
-            Match score between 0 and 1
-        """
+        details = result.model_dump()
+        details["email"] = self._clean_email(result.email)
+        return details
+
+    # ---- Candidate vs JD score ----
+
+    def _jd_score_prompt(self, candidate_info: Dict[str, Any], job_info: Dict[str, Any]) -> List[Dict[str, str]]:
         # Prepare additional info for prompt
         additional_info = candidate_info.get("additional_info", {})
         if isinstance(additional_info, str):
@@ -146,66 +397,134 @@ class OllamaClient:
                 additional_info = json.loads(additional_info)
             except:
                 additional_info = {"data": additional_info}
-        
-        # Prepare prompt for Ollama
-        prompt = f"""
-        You are a skilled HR talent matcher. I'm going to give you information about a job and a candidate.
-        
+
+        # The system message holds everything job-specific and is byte-identical
+        # for every candidate of a job, so Ollama reuses its KV cache across the
+        # run and only evaluates the candidate message
+        def render(jd: str, resumes: List[str]) -> List[Dict[str, str]]:
+            system = f"""
+        You are a skilled HR talent matcher. You will be given information about a candidate for this job.
+
         JOB DESCRIPTION:
-        {job_info.get('jd_text', '')}
-        
+        {jd}
+
         JOB TITLE: {job_info.get('title', '')}
         BUDGET RANGE: {job_info.get('min_budget', '')} - {job_info.get('max_budget', '')}
-        
+
+        Evaluate how well the candidate matches the job requirements on a scale of 0 to 1.0.
+        Consider skills, experience, salary expectations vs. budget, and all other relevant factors.
+
+        Respond with JSON: {{"score": <number between 0 and 1.0>}}
+        """
+            user = f"""
         CANDIDATE INFORMATION:
         Name: {candidate_info.get('name', '')}
-        Resume: {candidate_info.get('resume_text', '')}
+        Resume: {resumes[0]}
         Current CTC: {candidate_info.get('current_ctc', '')}
         Expected CTC: {candidate_info.get('expected_ctc', '')}
         Additional Information: {json.dumps(additional_info, indent=2)}
-        
-        Based on this information, evaluate how well the candidate matches the job requirements on a scale of 0 to 1.0.
+        """
+            return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+        return self.prompts.build(
+            render,
+            self._max_tokens(TASK_JD_SCORE),
+            jd=job_info.get('jd_text', '') or '',
+            resumes=[candidate_info.get('resume_text', '') or ''],
+            stable_jd=True,
+        )
+
+    def _parse_jd_score(self, response: Dict[str, Any]) -> Optional[float]:
+        """The score, or None when the answer does not match JDScore."""
+        result = self._structured(response, JDScore)
+        if result is None:
+            return None
+
+        # Ensure score is between 0 and 1
+        return self._clamp_score(result.score)
+
+    # ---- Batched candidate vs JD scores ----
+
+    @staticmethod
+    def _batch_candidate_block(number: int, candidate_info: Dict[str, Any], resume: str) -> str:
+        additional_info = candidate_info.get("additional_info", {})
+        if isinstance(additional_info, str):
+            try:
+                additional_info = json.loads(additional_info)
+            except:
+                additional_info = {"data": additional_info}
+
+        return f"""
+        CANDIDATE {number}:
+        Name: {candidate_info.get('name', '')}
+        Current CTC: {candidate_info.get('current_ctc', '')}
+        Expected CTC: {candidate_info.get('expected_ctc', '')}
+        Additional Information: {json.dumps(additional_info)}
+        Resume:
+        {resume}
+        """
+
+    def _batch_jd_score_prompt(self, candidates_info: List[Dict[str, Any]], job_info: Dict[str, Any], max_batch: int) -> List[Dict[str, str]]:
+        # Candidates are numbered by position in the batch; the caller maps the
+        # numbers back to its own ids. The system message (and the answer
+        # reserve for a full batch) is the same for every batch of a job
+        def render(jd: str, resumes: List[str]) -> List[Dict[str, str]]:
+            system = f"""
+        You are a skilled HR talent matcher. You will be given several candidates for this job.
+
+        JOB DESCRIPTION:
+        {jd}
+
+        JOB TITLE: {job_info.get('title', '')}
+        BUDGET RANGE: {job_info.get('min_budget', '')} - {job_info.get('max_budget', '')}
+
+        Evaluate how well each candidate, on their own, matches the job requirements on a scale of 0 to 1.0.
         Consider skills, experience, salary expectations vs. budget, and all other relevant factors.
-        
-        Return just the numerical score between 0 and 1.0 without any explanation.
+
+        Respond with JSON: {{"scores": [{{"id": <candidate number>, "score": <number between 0 and 1.0>}}, ...]}}
+        with one entry per candidate.
         """
-        
-        try:
-            response = self._call_ollama(prompt)
-            
-            # Extract score from response
-            if response and "choices" in response:
-                score_text = response["choices"][0]["message"]["content"].strip()
-                try:
-                    score = float(score_text)
-                    # Ensure score is between 0 and 1
-                    score = max(0.0, min(1.0, score))
-                    return score
-                except ValueError:
-                    logger.error(f"Failed to parse score from Ollama response: {score_text}")
-                    return 0.5
-            
-            return 0.5
-        
-        except Exception as e:
-            logger.error(f"Error comparing candidate with JD using Ollama: {e}", exc_info=True)
-            return 0.5
-    
-    def compare_candidates(self, candidates_info: List[Dict[str, Any]], job_info: Dict[str, Any]) -> Dict[int, float]:
+            user = "".join(
+                self._batch_candidate_block(i + 1, c, resume)
+                for i, (c, resume) in enumerate(zip(candidates_info, resumes))
+            )
+            return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+        return self.prompts.build(
+            render,
+            self._max_tokens(TASK_BATCH_JD_SCORE, max_batch),
+            jd=job_info.get('jd_text', '') or '',
+            resumes=[c.get('resume_text', '') or '' for c in candidates_info],
+            stable_jd=True,
+        )
+
+    def _plan_jd_batches(self, candidates_info: List[Dict[str, Any]], job_info: Dict[str, Any], max_batch: int) -> List[List[int]]:
         """
-        Compare candidates with each other in context of a job and return comparative scores.
-        
-        Args:
-            candidates_info: List of dictionaries containing candidate details
-            job_info: Dictionary containing job details
-            
-        Returns:
-            Dictionary with candidate IDs as keys and comparative scores as values
+        Pack candidates into batches whose prompt fits the context window
+        with every resume intact, using each candidate's token count.
         """
-        # If no candidates or only one candidate, return early
-        if not candidates_info or len(candidates_info) <= 1:
-            return {c.get('id', i): 0.5 for i, c in enumerate(candidates_info)}
-        
+        if max_batch <= 1:
+            return [[i] for i in range(len(candidates_info))]
+        fixed = self.prompts.count_prompt(self._batch_jd_score_prompt([], job_info, max_batch))
+        budget = self.prompts.limit - self._max_tokens(TASK_BATCH_JD_SCORE, max_batch) - fixed
+        item_tokens = [
+            self.prompts.counter.count(self._batch_candidate_block(i + 1, c, c.get('resume_text', '') or ''))
+            for i, c in enumerate(candidates_info)
+        ]
+        return pack_batches(item_tokens, budget, max_batch)
+
+    def _parse_batch_jd_scores(self, response: Dict[str, Any], count: int) -> Dict[int, float]:
+        """Scores by 1-based candidate number; numbers the model skipped are left out."""
+        result = self._structured(response, BatchJDScores)
+        if result is None:
+            return {}
+
+        # Ensure scores are between 0 and 1
+        return {s.id: self._clamp_score(s.score) for s in result.scores if 1 <= s.id <= count}
+
+    # ---- Comparative scores ----
+
+    def _compare_prompt(self, candidates_info: List[Dict[str, Any]], job_info: Dict[str, Any]) -> str:
         # Prepare candidate information for the prompt
         prompt_candidates = []
         for c in candidates_info:
@@ -216,194 +535,920 @@ class OllamaClient:
                     additional_info = json.loads(additional_info)
                 except:
                     additional_info = {"data": additional_info}
-            
-            # Get resume text and truncate if too long
-            resume_text = c.get('resume_text', '')
-            truncated_resume = resume_text[:1000] + "..." if len(resume_text) > 1000 else resume_text
-            
+
             prompt_candidates.append({
                 "id": c.get('id'),
                 "name": c.get('name', ''),
-                "resume": truncated_resume,
                 "current_ctc": c.get('current_ctc', ''),
                 "expected_ctc": c.get('expected_ctc', ''),
                 "additional_info": additional_info
             })
-        
-        # Prepare prompt for Ollama
-        prompt = f"""
+
+        def render(jd: str, resumes: List[str]) -> str:
+            # Resumes go in as plain text (not JSON-escaped) so their budgeted
+            # token counts hold in the final prompt
+            candidates = "".join(
+                f"""
+        CANDIDATE {c['id']}: {json.dumps(c)}
+        Resume:
+        {resume}
+        """
+                for c, resume in zip(prompt_candidates, resumes)
+            )
+            return f"""
         You are a skilled HR talent matcher. I'm going to give you information about a job and multiple candidates.
-        
+
         JOB DESCRIPTION:
-        {job_info.get('jd_text', '')}
-        
+        {jd}
+
         JOB TITLE: {job_info.get('title', '')}
         BUDGET RANGE: {job_info.get('min_budget', '')} - {job_info.get('max_budget', '')}
-        
+
         CANDIDATES:
-        {json.dumps(prompt_candidates, indent=2)}
-        
-        Compare the candidates with each other in the context of this job. Rank them based on their qualifications, 
+        {candidates}
+
+        Compare the candidates with each other in the context of this job. Rank them based on their qualifications,
         experience, skills, and salary expectations.
-        
-        Return a JSON object with candidate IDs as keys and scores between 0 and 1.0 as values, representing their 
-        comparative ranking. Higher scores indicate better candidates.
-        
-        Example output format:
-        {{"1": 0.9, "2": 0.7, "3": 0.85}}
-        
-        Return only the JSON object without any explanation.
-        """
-        
+
+        Respond with JSON: {{"scores": [{{"id": <candidate id>, "score": <number between 0 and 1.0>}}, ...]}}
+        with one entry per candidate. Higher scores indicate better candidates.
+        """
+
+        return self.prompts.build(
+            render,
+            self._max_tokens(TASK_COMPARE, len(candidates_info)),
+            jd=job_info.get('jd_text', '') or '',
+            resumes=[c.get('resume_text', '') or '' for c in candidates_info],
+        )
+
+    @staticmethod
+    def _default_comparative_scores(candidates_info: List[Dict[str, Any]]) -> Dict[int, float]:
+        return {c.get('id', i): 0.5 for i, c in enumerate(candidates_info)}
+
+    def _parse_compare(self, response: Dict[str, Any], candidates_info: List[Dict[str, Any]]) -> Dict[int, float]:
+        # Candidates the model left out keep the neutral default
+        scores = self._default_comparative_scores(candidates_info)
+        result = self._structured(response, ComparativeScores)
+        if result is None:
+            return scores
+
+        # Ensure scores are between 0 and 1
+        scores.update({s.id: self._clamp_score(s.score) for s in result.scores})
+        return scores
+
+    # ---- Resume ranking ----
+
+    def _rank_prompt(self, job_description: str, resumes: List[str]) -> str:
+        def render(jd: str, fitted_resumes: List[str]) -> str:
+            prompt = f"""
+        You are a skilled HR talent matcher. I'm going to give you a job description and {len(fitted_resumes)} resumes.
+
+        JOB DESCRIPTION:
+        {jd}
+
+        """
+
+            # Add each resume to the prompt
+            for i, resume in enumerate(fitted_resumes):
+                prompt += f"""
+            RESUME {i+1}:
+            {resume}
+
+            """
+
+            prompt += """
+        Analyze each resume against the job description and respond with JSON containing:
+        - "rankings": one entry per resume with resume_id (1-based), overall_score, skills_match and
+          experience_match (each between 0 and 1.0), strengths, weaknesses and a brief recommendation
+        - "comparative_analysis": best_match (a resume_id) and a brief reasoning
+        """
+            return prompt
+
+        return self.prompts.build(render, self._max_tokens(TASK_RANK, len(resumes)), jd=job_description, resumes=resumes)
+
+    def _parse_rank(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        if not response:
+            return {}
+
+        result = self._structured(response, RankingAnalysis)
+        if result is None:
+            return {"error": "Failed to parse ranking analysis"}
+        return result.model_dump()
+
+    # ---- Request bodies for offline batch runs ----
+
+    def jd_score_request(self, candidate_info: Dict[str, Any], job_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Chat completion body scoring one candidate against a job; parse the answer with parse_jd_score()."""
+        return self._build_payload(
+            self._jd_score_prompt(candidate_info, job_info), JDScore,
+            self._max_tokens(TASK_JD_SCORE), TASK_STOP_SEQUENCES.get(TASK_JD_SCORE),
+        )
+
+    def parse_jd_score(self, response: Dict[str, Any], default: Optional[float] = 0.5) -> Optional[float]:
+        """The score in a jd_score_request() answer, or `default` when it does not match JDScore."""
+        score = self._parse_jd_score(response)
+        return default if score is None else score
+
+    def details_request(self, resume_text: str) -> Dict[str, Any]:
+        """Chat completion body extracting candidate details; parse the answer with parse_candidate_details()."""
+        return self._build_payload(self._details_prompt(resume_text), CandidateDetails, self._max_tokens(TASK_EXTRACT_DETAILS))
+
+    def parse_candidate_details(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        return self._parse_details(response)
+
+
+class OllamaClient(BaseOllamaClient):
+    """Client for interacting with a local Ollama instance."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Keep-alive session so consecutive prompts reuse pooled TCP connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        # Identical prompts already in flight share one request
+        self._inflight = SingleFlight()
+        # Runs the primary and hedge of a hedged request side by side
+        self._hedge_pool = ThreadPoolExecutor(max_workers=self.pool_size * 2, thread_name_prefix="ollama-hedge")
+
+        logger.info(f"Initialized Ollama client with endpoints: {[e.url for e in self.endpoints.endpoints]}, model: {self.model}, pool_size: {self.pool_size}")
+
+    def close(self) -> None:
+        """Close the underlying HTTP session and its pooled connections."""
+        self._hedge_pool.shutdown(wait=False)
+        self.session.close()
+
+    @instrumented
+    def extract_email_from_resume(self, resume_text: str, priority: str = INTERACTIVE) -> Optional[str]:
+        """
+        Extract email address from resume text using Ollama LLM.
+
+        Args:
+            resume_text: The text content of the resume
+            priority: Scheduler lane for the request (interactive or bulk)
+
+        Returns:
+            Extracted email address or None if not found
+        """
+        if not resume_text or not resume_text.strip():
+            logger.info("Email extraction skipped: input text is empty or whitespace.")
+            return None
+
+        try:
+            response = self._call_ollama(self._email_prompt(resume_text), priority, TASK_EXTRACT_EMAIL, EmailExtraction)
+            return self._parse_email(response)
+
+        except LLMUnavailableError:
+            raise
+
+        except Exception as e:
+            logger.error(f"Error extracting email with Ollama: {e}", exc_info=True)
+            return None
+
+    @instrumented
+    def extract_candidate_details(self, resume_text: str, priority: str = INTERACTIVE) -> Dict[str, Any]:
+        """
+        Extract comprehensive candidate details from resume text.
+
+        Email, name, phone, skills, experience and education come back from a
+        single structured call, so ingest needs one LLM round trip per resume
+        rather than a separate email prompt.
+
+        Args:
+            resume_text: The text content of the resume
+            priority: Scheduler lane for the request (interactive or bulk)
+
+        Returns:
+            Dictionary with full_name, email, phone, skills, years_of_experience
+            and education (None where not found), or {} if extraction failed
+        """
+        if not resume_text or not resume_text.strip():
+            logger.info("Candidate extraction skipped: input text is empty or whitespace.")
+            return {}
+
         try:
-            response = self._call_ollama(prompt)
-            
-            # Extract scores from response
-            if response and "choices" in response:
-                score_text = response["choices"][0]["message"]["content"].strip()
+            response = self._call_ollama(self._details_prompt(resume_text), priority, TASK_EXTRACT_DETAILS, CandidateDetails)
+            return self._parse_details(response)
+
+        except LLMUnavailableError:
+            raise
+
+        except Exception as e:
+            logger.error(f"Error extracting candidate details with Ollama: {e}", exc_info=True)
+            return {}
+
+    @instrumented
+    def compare_candidate_with_jd(
+        self, candidate_info: Dict[str, Any], job_info: Dict[str, Any], priority: str = INTERACTIVE,
+        default: Optional[float] = 0.5,
+    ) -> Optional[float]:
+        """
+        Compare a candidate with a job description and return a match score.
+
+        Args:
+            candidate_info: Dictionary containing candidate details
+            job_info: Dictionary containing job details
+            priority: Scheduler lane for the request (interactive or bulk)
+            default: Returned when no valid score comes back (None lets the caller tell)
+
+        Returns:
+            Match score between 0 and 1, or `default`
+        """
+        try:
+            response = self._call_ollama(self._jd_score_prompt(candidate_info, job_info), priority, TASK_JD_SCORE, JDScore)
+            score = self._parse_jd_score(response)
+            return default if score is None else score
+
+        except LLMUnavailableError:
+            raise
+
+        except Exception as e:
+            logger.error(f"Error comparing candidate with JD using Ollama: {e}", exc_info=True)
+            return default
+
+    @instrumented
+    def score_candidates_with_jd(
+        self,
+        candidates_info: List[Dict[str, Any]],
+        job_info: Dict[str, Any],
+        priority: str = INTERACTIVE,
+        max_batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        default: Optional[float] = 0.5,
+    ) -> Dict[Any, Optional[float]]:
+        """
+        Score many candidates against a job description, packing as many as
+        fit the context window into each request instead of sending the JD
+        once per candidate.
+
+        Candidates the batched answer leaves out (or a batch whose answer
+        fails to parse) are scored one at a time with compare_candidate_with_jd.
+        Batches are sent concurrently. A candidate with no valid score (the
+        request errored or its answer never parsed) gets `default` rather
+        than failing the run; pass None to tell those candidates apart.
+
+        Args:
+            candidates_info: Dictionaries containing candidate details and an 'id'
+            job_info: Dictionary containing job details
+            priority: Scheduler lane for the requests (interactive or bulk)
+            max_batch_size: Most candidates per request (defaults to LLM_BATCH_MAX_CANDIDATES)
+            concurrency: Most batches in flight at once (defaults to LLM_SCORING_CONCURRENCY,
+                or the scheduler's slot count when that is 0)
+            default: Score of candidates that could not be scored
+
+        Returns:
+            Dictionary with candidate IDs as keys and match scores between 0 and 1 (or `default`) as values
+        """
+        max_batch = max_batch_size or settings.LLM_BATCH_MAX_CANDIDATES
+
+        def score_batch(batch: List[int]) -> List[Optional[float]]:
+            members = [candidates_info[i] for i in batch]
+            batch_scores = {}
+            if len(members) > 1:
                 try:
-                    # Find JSON in the response (handles cases where the model outputs extra text)
-                    import re
-                    json_match = re.search(r'({[\s\S]*})', score_text)
-                    if json_match:
-                        scores = json.loads(json_match.group(1))
-                    else:
-                        # If no JSON pattern found, try parsing the whole content
-                        scores = json.loads(score_text)
-                    
-                    # Convert string keys to integers and ensure scores are between 0 and 1
-                    return {int(k): max(0.0, min(1.0, float(v))) for k, v in scores.items()}
-                except (ValueError, json.JSONDecodeError) as e:
-                    logger.error(f"Failed to parse scores from Ollama response: {e}")
-                    return {c.get('id', i): 0.5 for i, c in enumerate(candidates_info)}
-            
-            # Default scores if API call failed
-            return {c.get('id', i): 0.5 for i, c in enumerate(candidates_info)}
-        
+                    response = self._call_ollama(
+                        self._batch_jd_score_prompt(members, job_info, max_batch), priority, TASK_BATCH_JD_SCORE, BatchJDScores,
+                        max_tokens=self._max_tokens(TASK_BATCH_JD_SCORE, len(members)),
+                    )
+                    batch_scores = self._parse_batch_jd_scores(response, len(members))
+
+                except LLMUnavailableError:
+                    raise
+
+                except Exception as e:
+                    logger.error(f"Error scoring candidate batch with Ollama: {e}", exc_info=True)
+                if len(batch_scores) < len(members):
+                    logger.warning(f"Batch JD scoring returned {len(batch_scores)}/{len(members)} scores; scoring the rest one by one")
+
+            return [
+                batch_scores[number] if number in batch_scores
+                else self.compare_candidate_with_jd(candidate_info, job_info, priority=priority, default=default)
+                for number, candidate_info in enumerate(members, 1)
+            ]
+
+        # Batches run side by side, as many as the backend has slots for
+        batches = self._plan_jd_batches(candidates_info, job_info, max_batch)
+        results = map_bounded(batches, score_batch, self.scoring_concurrency(concurrency), lambda batch: [default] * len(batch))
+        return {
+            candidates_info[i].get('id'): score
+            for batch, batch_scores in zip(batches, results)
+            for i, score in zip(batch, batch_scores)
+        }
+
+    @instrumented
+    def compare_candidates(self, candidates_info: List[Dict[str, Any]], job_info: Dict[str, Any], priority: str = INTERACTIVE) -> Dict[int, float]:
+        """
+        Compare candidates with each other in context of a job and return comparative scores.
+
+        Args:
+            candidates_info: List of dictionaries containing candidate details
+            job_info: Dictionary containing job details
+            priority: Scheduler lane for the request (interactive or bulk)
+
+        Returns:
+            Dictionary with candidate IDs as keys and comparative scores as values
+        """
+        # If no candidates or only one candidate, return early
+        if not candidates_info or len(candidates_info) <= 1:
+            return self._default_comparative_scores(candidates_info)
+
+        try:
+            response = self._call_ollama(
+                self._compare_prompt(candidates_info, job_info), priority, TASK_COMPARE, ComparativeScores,
+                max_tokens=self._max_tokens(TASK_COMPARE, len(candidates_info)),
+            )
+            return self._parse_compare(response, candidates_info)
+
+        except LLMUnavailableError:
+            raise
+
         except Exception as e:
             logger.error(f"Error comparing candidates using Ollama: {e}", exc_info=True)
-            return {c.get('id', i): 0.5 for i, c in enumerate(candidates_info)}
-    
-    def rank_resumes(self, job_description: str, resumes: List[str]) -> Dict[str, Any]:
+            return self._default_comparative_scores(candidates_info)
+
+    @instrumented
+    def rank_resumes(self, job_description: str, resumes: List[str], priority: str = INTERACTIVE) -> Dict[str, Any]:
         """
         Rank multiple resumes against a job description.
-        
+
         Args:
             job_description: The job description text
             resumes: List of resume texts
-            
+            priority: Scheduler lane for the request (interactive or bulk)
+
         Returns:
             Dictionary with detailed analysis of each resume
         """
         if not job_description or not resumes:
             return {}
-        
-        # Truncate texts to avoid token limits
-        truncated_jd = job_description[:2000]
-        truncated_resumes = [r[:2000] + "..." if len(r) > 2000 else r for r in resumes]
-        
-        # Prepare the prompt
-        prompt = f"""
-        You are a skilled HR talent matcher. I'm going to give you a job description and {len(resumes)} resumes.
-        
-        JOB DESCRIPTION:
-        {truncated_jd}
-        
-        """
-        
-        # Add each resume to the prompt
-        for i, resume in enumerate(truncated_resumes):
-            prompt += f"""
-            RESUME {i+1}:
-            {resume}
-            
-            """
-        
-        prompt += f"""
-        Analyze each resume against the job description and provide a detailed analysis in JSON format with the following structure:
-        {{
-            "rankings": [
-                {{
-                    "resume_id": 1,
-                    "overall_score": 0.85,
-                    "skills_match": 0.80,
-                    "experience_match": 0.90,
-                    "strengths": ["strength1", "strength2"],
-                    "weaknesses": ["weakness1", "weakness2"],
-                    "recommendation": "Brief hiring recommendation"
-                }},
-                ...
-            ],
-            "comparative_analysis": {{
-                "best_match": 1,
-                "reasoning": "Brief explanation for best match"
-            }}
-        }}
-        
-        Provide only the JSON response, no additional text.
-        """
-        
+
         try:
-            response = self._call_ollama(prompt)
-            
-            if response and "choices" in response:
-                content = response["choices"][0]["message"]["content"].strip()
-                
-                # Try to parse the JSON response
-                try:
-                    # Find JSON in the response (handles cases where the model outputs extra text)
-                    import re
-                    json_match = re.search(r'({[\s\S]*})', content)
-                    if json_match:
-                        parsed_json = json.loads(json_match.group(1))
-                        return parsed_json
-                    
-                    # If no JSON pattern found, try parsing the whole content
-                    return json.loads(content)
-                except json.JSONDecodeError:
-                    logger.error("Failed to parse JSON from Ollama response for resume ranking")
-                    return {"error": "Failed to parse ranking analysis"}
-            
-            return {}
-        
+            response = self._call_ollama(
+                self._rank_prompt(job_description, resumes), priority, TASK_RANK, RankingAnalysis,
+                max_tokens=self._max_tokens(TASK_RANK, len(resumes)),
+            )
+            return self._parse_rank(response)
+
+        except LLMUnavailableError:
+            raise
+
         except Exception as e:
             logger.error(f"Error ranking resumes with Ollama: {e}", exc_info=True)
             return {"error": f"Failed to rank resumes: {str(e)}"}
-    
-    def _call_ollama(self, prompt: str) -> Dict[str, Any]:
+
+    def _call_ollama(
+        self,
+        prompt: Prompt,
+        priority: str = INTERACTIVE,
+        task: str = TASK_JD_SCORE,
+        schema: Optional[Type[BaseModel]] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Dict[str, Any]:
         """
-        Make a call to the Ollama API.
-        
+        Make a call to the Ollama API, serving repeated prompts from the cache,
+        sharing one request between concurrent identical prompts and waiting
+        for a scheduler slot before going to the network.
+
         Args:
-            prompt: The user prompt to send to the model
-            
+            prompt: The user prompt, or a list of chat messages
+            priority: Scheduler lane the request waits in for a free slot
+            task: Task type, used to pick the adaptive read timeout
+            schema: Pydantic model the response must match; invalid
+                responses are retried up to LLM_PARSE_RETRIES times
+            max_tokens: Cap on answer tokens; defaults to the task's cap
+
         Returns:
             API response as a dictionary
+
+        Raises:
+            LLMUnavailableError: If the circuit breaker is open
         """
-        payload = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
+        payload = self._build_payload(
+            prompt,
+            schema,
+            max_tokens or self._max_tokens(task),
+            TASK_STOP_SEQUENCES.get(task),
+        )
+        key = self._request_key(payload)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            return cached
+
+        def send() -> Dict[str, Any]:
+            self._check_circuit()
+            for attempt in range(self._parse_attempts(schema)):
+                response = self._request(payload, task, priority)
+                if self._accept(response, schema, task, attempt):
+                    self._cache_store(key, response)
+                    return response
+            return {}
+
+        return self._inflight.do(key, send)
+
+    def _request(self, payload: Dict[str, Any], task: str, priority: str) -> Dict[str, Any]:
+        """
+        Send a payload, retrying timeouts, connection errors, 429s and 5xxs
+        with jittered exponential backoff. Every try waits for its own
+        scheduler slot, so a backoff never holds one.
+        """
+        for retry in range(self.retry.attempts + 1):
+            if retry:
+                delay = self.retry.delay(retry)
+                logger.warning(f"Retrying {task} request in {delay:.2f}s (retry {retry} of {self.retry.attempts})")
+                self.metrics.record_retry()
+                time.sleep(delay)
+                self._check_circuit()
+            with self.scheduler.slot(priority):
+                response, retryable = self._hedged_send(payload, task, priority)
+            if response or not retryable:
+                break
+        return response
+
+    def _hedged_send(self, payload: Dict[str, Any], task: str, priority: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Send a payload; if hedging is on and it is still running after the
+        task's hedge delay, send a duplicate to another node (or another slot
+        on the same one) while the hedge budget allows, and take whichever
+        answers first. The loser is told to hang up. The duplicate needs a
+        scheduler slot of its own in `priority`'s lane: a saturated scheduler
+        is not hedged.
+        """
+        endpoint = self.endpoints.acquire(self._affinity_key(payload))
+        delay = self._hedge_delay(task)
+        if delay is None:
+            return self._send(payload, task, endpoint)
+
+        self.hedge_budget.record_request()
+        cancels = {}
+        primary_cancel = threading.Event()
+        primary = self._hedge_pool.submit(contextvars.copy_context().run, self._send, payload, task, endpoint, primary_cancel)
+        cancels[primary] = primary_cancel
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_hedge_slot(priority):
+            return primary.result()
+
+        logger.info(f"Hedging {task} request after {delay:.2f}s")
+        self.metrics.record_hedge()
+        hedge_cancel = threading.Event()
+        hedge = self._hedge_pool.submit(
+            contextvars.copy_context().run, self._send, payload, task, self.endpoints.acquire(exclude=endpoint), hedge_cancel,
+        )
+        # The slot is held until the hedge has actually hung up
+        hedge.add_done_callback(lambda _: self.scheduler.release())
+        cancels[hedge] = hedge_cancel
+        pending = set(cancels)
+        result: Tuple[Dict[str, Any], bool] = ({}, True)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result[0]:
+                    for loser in pending:
+                        cancels[loser].set()
+                    if future is hedge:
+                        self.metrics.record_hedge_win()
+                    return result
+        return result
+
+    def _send(
+        self,
+        payload: Dict[str, Any],
+        task: str,
+        endpoint: Optional[OllamaEndpoint] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        POST a chat completion payload to an Ollama node (the least-loaded
+        healthy one unless `endpoint` is given).
+
+        In streaming mode the connection is closed as soon as the answer's
+        JSON object is complete, which also stops generation on the server,
+        or as soon as `cancel` is set.
+
+        Returns:
+            (response, retryable): the response is {} on failure, and
+            retryable says whether trying again could help
+        """
+        endpoint = endpoint or self.endpoints.acquire(self._affinity_key(payload))
+        started = time.monotonic()
+        try:
+            with self.session.post(
+                endpoint.completions_url,
+                json=self._transport_payload(payload),
+                # (connect, read); read timeout adapts to the task's observed latency
+                timeout=(self.connect_timeout, self.timeouts.timeout(task)),
+                stream=self.stream,
+            ) as response:
+                if response.status_code == 200:
+                    if self.stream:
+                        stream = StreamAccumulator()
+                        for line in response.iter_lines(decode_unicode=True):
+                            if cancel is not None and cancel.is_set():
+                                break
+                            if line and stream.feed_line(line):
+                                break
+                        body = stream.response()
+                    else:
+                        body = response.json()
+                    if cancel is not None and cancel.is_set():
+                        # Lost a hedge race; the answer is not needed
+                        self.endpoints.release(endpoint, success=None)
+                        return {}, False
+                    self.endpoints.release(endpoint, success=True)
+                    self._record_outcome(task, started, success=True)
+                    self._record_usage(payload, body)
+                    return body, False
+                else:
+                    logger.error(f"Ollama API error from {endpoint.url}: {response.status_code} - {response.text}")
+                    self.endpoints.release(endpoint, success=False, error=f"HTTP {response.status_code}")
+                    self.metrics.record_failure(HTTP_ERROR, f"{endpoint.url}: HTTP {response.status_code} {response.text[:200]}")
+                    self._record_outcome(task, started, success=False)
+                    return {}, self.retry.retryable_status(response.status_code)
+
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"Request to Ollama at {endpoint.url} failed: {e}", exc_info=True)
+            self.endpoints.release(endpoint, success=False, error=str(e))
+            self.metrics.record_failure(self._failure_cause(e), f"{endpoint.url}: {e}")
+            self._record_outcome(task, started, success=False)
+            return {}, self._failure_cause(e) != PARSE
+
+
+class AsyncOllamaClient(BaseOllamaClient):
+    """
+    Asyncio twin of OllamaClient for use inside async FastAPI routes.
+
+    Requests go through a pooled httpx.AsyncClient, so awaiting an LLM call
+    yields the event loop to other requests instead of blocking the worker.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+            ),
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            headers={"Content-Type": "application/json"},
+        )
+
+        # Identical prompts already in flight share one request
+        self._inflight = AsyncSingleFlight()
+
+        logger.info(f"Initialized async Ollama client with endpoints: {[e.url for e in self.endpoints.endpoints]}, model: {self.model}, pool_size: {self.pool_size}")
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client and its pooled connections."""
+        await self.http.aclose()
+
+    @instrumented
+    async def extract_email_from_resume(self, resume_text: str, priority: str = INTERACTIVE) -> Optional[str]:
+        """Async version of OllamaClient.extract_email_from_resume."""
+        if not resume_text or not resume_text.strip():
+            logger.info("Email extraction skipped: input text is empty or whitespace.")
+            return None
+
+        try:
+            response = await self._call_ollama(self._email_prompt(resume_text), priority, TASK_EXTRACT_EMAIL, EmailExtraction)
+            return self._parse_email(response)
+
+        except LLMUnavailableError:
+            raise
+
+        except Exception as e:
+            logger.error(f"Error extracting email with Ollama: {e}", exc_info=True)
+            return None
+
+    @instrumented
+    async def extract_candidate_details(self, resume_text: str, priority: str = INTERACTIVE) -> Dict[str, Any]:
+        """Async version of OllamaClient.extract_candidate_details."""
+        if not resume_text or not resume_text.strip():
+            logger.info("Candidate extraction skipped: input text is empty or whitespace.")
+            return {}
+
+        try:
+            response = await self._call_ollama(self._details_prompt(resume_text), priority, TASK_EXTRACT_DETAILS, CandidateDetails)
+            return self._parse_details(response)
+
+        except LLMUnavailableError:
+            raise
+
+        except Exception as e:
+            logger.error(f"Error extracting candidate details with Ollama: {e}", exc_info=True)
+            return {}
+
+    @instrumented
+    async def compare_candidate_with_jd(
+        self, candidate_info: Dict[str, Any], job_info: Dict[str, Any], priority: str = INTERACTIVE,
+        default: Optional[float] = 0.5,
+    ) -> Optional[float]:
+        """Async version of OllamaClient.compare_candidate_with_jd."""
+        try:
+            response = await self._call_ollama(self._jd_score_prompt(candidate_info, job_info), priority, TASK_JD_SCORE, JDScore)
+            score = self._parse_jd_score(response)
+            return default if score is None else score
+
+        except LLMUnavailableError:
+            raise
+
+        except Exception as e:
+            logger.error(f"Error comparing candidate with JD using Ollama: {e}", exc_info=True)
+            return default
+
+    @instrumented
+    async def score_candidates_with_jd(
+        self,
+        candidates_info: List[Dict[str, Any]],
+        job_info: Dict[str, Any],
+        priority: str = INTERACTIVE,
+        max_batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        default: Optional[float] = 0.5,
+    ) -> Dict[Any, Optional[float]]:
+        """Async version of OllamaClient.score_candidates_with_jd."""
+        max_batch = max_batch_size or settings.LLM_BATCH_MAX_CANDIDATES
+
+        async def score_batch(batch: List[int]) -> List[Optional[float]]:
+            members = [candidates_info[i] for i in batch]
+            batch_scores = {}
+            if len(members) > 1:
+                try:
+                    response = await self._call_ollama(
+                        self._batch_jd_score_prompt(members, job_info, max_batch), priority, TASK_BATCH_JD_SCORE, BatchJDScores,
+                        max_tokens=self._max_tokens(TASK_BATCH_JD_SCORE, len(members)),
+                    )
+                    batch_scores = self._parse_batch_jd_scores(response, len(members))
+
+                except LLMUnavailableError:
+                    raise
+
+                except Exception as e:
+                    logger.error(f"Error scoring candidate batch with Ollama: {e}", exc_info=True)
+                if len(batch_scores) < len(members):
+                    logger.warning(f"Batch JD scoring returned {len(batch_scores)}/{len(members)} scores; scoring the rest one by one")
+
+            return [
+                batch_scores[number] if number in batch_scores
+                else await self.compare_candidate_with_jd(candidate_info, job_info, priority=priority, default=default)
+                for number, candidate_info in enumerate(members, 1)
             ]
+
+        batches = self._plan_jd_batches(candidates_info, job_info, max_batch)
+        results = await gather_bounded(batches, score_batch, self.scoring_concurrency(concurrency), lambda batch: [default] * len(batch))
+        return {
+            candidates_info[i].get('id'): score
+            for batch, batch_scores in zip(batches, results)
+            for i, score in zip(batch, batch_scores)
         }
-        
+
+    @instrumented
+    async def compare_candidates(self, candidates_info: List[Dict[str, Any]], job_info: Dict[str, Any], priority: str = INTERACTIVE) -> Dict[int, float]:
+        """Async version of OllamaClient.compare_candidates."""
+        # If no candidates or only one candidate, return early
+        if not candidates_info or len(candidates_info) <= 1:
+            return self._default_comparative_scores(candidates_info)
+
+        try:
+            response = await self._call_ollama(
+                self._compare_prompt(candidates_info, job_info), priority, TASK_COMPARE, ComparativeScores,
+                max_tokens=self._max_tokens(TASK_COMPARE, len(candidates_info)),
+            )
+            return self._parse_compare(response, candidates_info)
+
+        except LLMUnavailableError:
+            raise
+
+        except Exception as e:
+            logger.error(f"Error comparing candidates using Ollama: {e}", exc_info=True)
+            return self._default_comparative_scores(candidates_info)
+
+    @instrumented
+    async def rank_resumes(self, job_description: str, resumes: List[str], priority: str = INTERACTIVE) -> Dict[str, Any]:
+        """Async version of OllamaClient.rank_resumes."""
+        if not job_description or not resumes:
+            return {}
+
         try:
-            response = requests.post(
-                self.completions_endpoint,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=30  # Add timeout to prevent hanging
+            response = await self._call_ollama(
+                self._rank_prompt(job_description, resumes), priority, TASK_RANK, RankingAnalysis,
+                max_tokens=self._max_tokens(TASK_RANK, len(resumes)),
             )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"Ollama API error: {response.status_code} - {response.text}")
+            return self._parse_rank(response)
+
+        except LLMUnavailableError:
+            raise
+
+        except Exception as e:
+            logger.error(f"Error ranking resumes with Ollama: {e}", exc_info=True)
+            return {"error": f"Failed to rank resumes: {str(e)}"}
+
+    async def _call_ollama(
+        self,
+        prompt: Prompt,
+        priority: str = INTERACTIVE,
+        task: str = TASK_JD_SCORE,
+        schema: Optional[Type[BaseModel]] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Make a non-blocking call to the Ollama API, serving repeated prompts
+        from the cache, sharing one request between concurrent identical
+        prompts and waiting for a scheduler slot before going to the network.
+
+        Args:
+            prompt: The user prompt, or a list of chat messages
+            priority: Scheduler lane the request waits in for a free slot
+            task: Task type, used to pick the adaptive read timeout
+            schema: Pydantic model the response must match; invalid
+                responses are retried up to LLM_PARSE_RETRIES times
+            max_tokens: Cap on answer tokens; defaults to the task's cap
+
+        Returns:
+            API response as a dictionary
+
+        Raises:
+            LLMUnavailableError: If the circuit breaker is open
+        """
+        payload = self._build_payload(
+            prompt,
+            schema,
+            max_tokens or self._max_tokens(task),
+            TASK_STOP_SEQUENCES.get(task),
+        )
+        key = self._request_key(payload)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            return cached
+
+        async def send() -> Dict[str, Any]:
+            probe = self._check_circuit()
+            try:
+                for attempt in range(self._parse_attempts(schema)):
+                    response = await self._request(payload, task, priority)
+                    if self._accept(response, schema, task, attempt):
+                        self._cache_store(key, response)
+                        return response
                 return {}
-        
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request to Ollama failed: {e}", exc_info=True)
-            return {} 
\ No newline at end of file
+            except asyncio.CancelledError:
+                if probe:
+                    # A cancelled probe never reports back; without this the circuit stays half-open for good
+                    self.circuit_breaker.release_probe()
+                raise
+
+        return await self._inflight.do(key, send)
+
+    async def _request(self, payload: Dict[str, Any], task: str, priority: str) -> Dict[str, Any]:
+        """Async version of OllamaClient._request."""
+        for retry in range(self.retry.attempts + 1):
+            if retry:
+                delay = self.retry.delay(retry)
+                logger.warning(f"Retrying {task} request in {delay:.2f}s (retry {retry} of {self.retry.attempts})")
+                self.metrics.record_retry()
+                await asyncio.sleep(delay)
+                self._check_circuit()
+            async with self.scheduler.async_slot(priority):
+                response, retryable = await self._hedged_send(payload, task, priority)
+            if response or not retryable:
+                break
+        return response
+
+    async def _hedged_send(self, payload: Dict[str, Any], task: str, priority: str) -> Tuple[Dict[str, Any], bool]:
+        """Async version of OllamaClient._hedged_send; the losing request is cancelled."""
+        endpoint = self.endpoints.acquire(self._affinity_key(payload))
+        delay = self._hedge_delay(task)
+        if delay is None:
+            return await self._send(payload, task, endpoint)
+
+        self.hedge_budget.record_request()
+        primary = asyncio.ensure_future(self._send(payload, task, endpoint))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done or not self._take_hedge_slot(priority):
+                return await primary
+
+            logger.info(f"Hedging {task} request after {delay:.2f}s")
+            self.metrics.record_hedge()
+            hedge = asyncio.ensure_future(self._send(payload, task, self.endpoints.acquire(exclude=endpoint)))
+            # The slot is held until the hedge has actually hung up
+            hedge.add_done_callback(lambda _: self.scheduler.release())
+            pending = {primary, hedge}
+            result: Tuple[Dict[str, Any], bool] = ({}, True)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result[0]:
+                        if future is hedge:
+                            self.metrics.record_hedge_win()
+                        return result
+            return result
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def _send(
+        self,
+        payload: Dict[str, Any],
+        task: str,
+        endpoint: Optional[OllamaEndpoint] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        POST a chat completion payload to an Ollama node without blocking the
+        event loop, stopping a streamed answer as soon as its JSON object is
+        complete. Cancelling the call hangs up on the node.
+
+        Returns:
+            (response, retryable), as OllamaClient._send
+        """
+        endpoint = endpoint or self.endpoints.acquire(self._affinity_key(payload))
+        started = time.monotonic()
+        try:
+            async with self.http.stream(
+                "POST",
+                endpoint.completions_url,
+                json=self._transport_payload(payload),
+                # Read timeout adapts to the task's observed latency
+                timeout=httpx.Timeout(self.timeouts.timeout(task), connect=self.connect_timeout),
+            ) as response:
+                if response.status_code == 200:
+                    if self.stream:
+                        stream = StreamAccumulator()
+                        async for line in response.aiter_lines():
+                            if line and stream.feed_line(line):
+                                break
+                        body = stream.response()
+                    else:
+                        body = json.loads(await response.aread())
+                    self.endpoints.release(endpoint, success=True)
+                    self._record_outcome(task, started, success=True)
+                    self._record_usage(payload, body)
+                    return body, False
+                else:
+                    await response.aread()
+                    logger.error(f"Ollama API error from {endpoint.url}: {response.status_code} - {response.text}")
+                    self.endpoints.release(endpoint, success=False, error=f"HTTP {response.status_code}")
+                    self.metrics.record_failure(HTTP_ERROR, f"{endpoint.url}: HTTP {response.status_code} {response.text[:200]}")
+                    self._record_outcome(task, started, success=False)
+                    return {}, self.retry.retryable_status(response.status_code)
+
+        except asyncio.CancelledError:
+            # Lost a hedge race (or the caller went away)
+            self.endpoints.release(endpoint, success=None)
+            raise
+
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"Request to Ollama at {endpoint.url} failed: {e}", exc_info=True)
+            self.endpoints.release(endpoint, success=False, error=str(e))
+            self.metrics.record_failure(self._failure_cause(e), f"{endpoint.url}: {e}")
+            self._record_outcome(task, started, success=False)
+            return {}, self._failure_cause(e) != PARSE
+
+
+_clients: Dict[str, OllamaClient] = {}
+_async_clients: Dict[str, AsyncOllamaClient] = {}
+_client_lock = threading.Lock()
+
+def get_ollama_client(model: str = None) -> OllamaClient:
+    """
+    Return the process-wide Ollama client for a model (OLLAMA_MODEL by
+    default), creating it on first use.
+
+    Sharing one client means every caller draws from the same keep-alive
+    connection pool instead of opening a new TCP connection per prompt.
+    """
+    model = model or settings.OLLAMA_MODEL
+    client = _clients.get(model)
+    if client is None:
+        with _client_lock:
+            client = _clients.get(model)
+            if client is None:
+                client = _clients[model] = OllamaClient(model=model)
+    return client
+
+def get_async_ollama_client(model: str = None) -> AsyncOllamaClient:
+    """Return the process-wide async Ollama client for a model, creating it on first use."""
+    model = model or settings.OLLAMA_MODEL
+    client = _async_clients.get(model)
+    if client is None:
+        with _client_lock:
+            client = _async_clients.get(model)
+            if client is None:
+                client = _async_clients[model] = AsyncOllamaClient(model=model)
+    return client
+
+async def close_ollama_clients() -> None:
+    """Release pooled connections held by the shared clients (app shutdown)."""
+    with _client_lock:
+        async_clients = list(_async_clients.values())
+        clients = list(_clients.values())
+        _async_clients.clear()
+        _clients.clear()
+    for async_client in async_clients:
+        await async_client.aclose()
+    for client in clients:
+        client.close()
@@ -0,0 +1,135 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+import requests
+
+from app.core.config import settings
+from app.services.ollama_endpoints import EndpointPool, OllamaEndpoint, get_endpoint_pool
+
+logger = logging.getLogger(__name__)
+
+
+def parse_keep_alive(value: str) -> Union[str, int]:
+    """Ollama takes keep_alive as a duration ("30m") or seconds (-1 = forever)."""
+    value = value.strip()
+    return int(value) if value.lstrip("-").isdigit() else value
+
+
+class ModelWarmer:
+    """
+    Keep the models (OLLAMA_MODEL and any cascade model) loaded on every
+    Ollama node.
+
+    At startup each node is asked to load the model (an empty /api/generate
+    request), then the same request is repeated every `ping_interval`
+    seconds so Ollama's keep_alive timer never expires while the backend is
+    up. A node is ready once its last load or ping succeeded.
+    """
+
+    def __init__(
+        self,
+        endpoints: EndpointPool = None,
+        models: List[str] = None,
+        keep_alive: str = None,
+        ping_interval: float = None,
+        load_timeout: float = None,
+    ):
+        self.endpoints = endpoints or get_endpoint_pool()
+        self.models = models or [m for m in (settings.OLLAMA_MODEL, settings.LLM_CASCADE_MODEL) if m]
+        self.keep_alive = parse_keep_alive(keep_alive or settings.OLLAMA_KEEP_ALIVE)
+        self.ping_interval = ping_interval or settings.OLLAMA_KEEP_ALIVE_PING_INTERVAL
+        self.load_timeout = load_timeout or settings.OLLAMA_WARMUP_TIMEOUT
+        self._status: Dict[tuple, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._session = requests.Session()
+
+    def warm(self, endpoint: OllamaEndpoint, model: str) -> bool:
+        """Load (or keep loaded) `model` on one node."""
+        started = time.monotonic()
+        try:
+            response = self._session.post(
+                f"{endpoint.url}/api/generate",
+                json={"model": model, "keep_alive": self.keep_alive},
+                timeout=(settings.OLLAMA_CONNECT_TIMEOUT, self.load_timeout),
+            )
+            ok = response.status_code == 200
+            error = None if ok else f"HTTP {response.status_code}: {response.text[:200]}"
+        except requests.exceptions.RequestException as e:
+            ok, error = False, str(e)
+
+        elapsed = time.monotonic() - started
+        with self._lock:
+            status = self._status.setdefault((endpoint.url, model), {"url": endpoint.url, "model": model, "ready": False})
+            if ok and not status["ready"]:
+                logger.info(f"Model {model} loaded on {endpoint.url} in {elapsed:.1f}s")
+            elif not ok:
+                logger.warning(f"Could not load model {model} on {endpoint.url}: {error}")
+            status.update({
+                "ready": ok,
+                "last_ping": time.time(),
+                "last_ping_seconds": round(elapsed, 3),
+                "last_error": error,
+            })
+        return ok
+
+    def warm_all(self) -> bool:
+        """Warm every model on every node; True if each one is now loaded."""
+        results = [self.warm(endpoint, model) for endpoint in self.endpoints.endpoints for model in self.models]
+        return all(results)
+
+    def start(self) -> None:
+        """Load the models now and keep them loaded from a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            self.warm_all()
+            while not self._stop.wait(self.ping_interval):
+                self.warm_all()
+
+        self._thread = threading.Thread(target=loop, name="ollama-keep-alive", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        """True once every model is loaded on at least one node."""
+        with self._lock:
+            return all(
+                any(s["ready"] for (_, model), s in self._status.items() if model == m)
+                for m in self.models
+            )
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            nodes = [dict(s) for s in self._status.values()]
+        return {
+            "ready": self.ready,
+            "models": self.models,
+            "keep_alive": self.keep_alive,
+            "ping_interval_seconds": self.ping_interval,
+            "nodes": nodes,
+        }
+
+
+_warmer: Optional[ModelWarmer] = None
+_warmer_lock = threading.Lock()
+
+def get_model_warmer() -> ModelWarmer:
+    """Return the process-wide model warmer."""
+    global _warmer
+    if _warmer is None:
+        with _warmer_lock:
+            if _warmer is None:
+                _warmer = ModelWarmer()
+    return _warmer
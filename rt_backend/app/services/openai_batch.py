@@ -0,0 +1,402 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.services.ollama_service import BaseOllamaClient, get_ollama_client
+from app.services.ranking_service import match_inputs
+
+logger = logging.getLogger(__name__)
+
+# Kinds of request in a batch file; each custom_id starts with one
+SCORE = "score"
+EXTRACT = "extract"
+
+CHAT_COMPLETIONS = "/v1/chat/completions"
+
+# Batch states after which polling stops
+TERMINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+def score_custom_id(job_id: int, email: str) -> str:
+    return f"{SCORE}:{job_id}:{email}"
+
+
+def extract_custom_id(email: str) -> str:
+    return f"{EXTRACT}:{email}"
+
+
+class BatchBackend(ABC):
+    """
+    Runs batch files of chat completion requests (OpenAI Batch API JSONL:
+    one {"custom_id", "method", "url", "body"} object per line).
+
+    status() returns {"id", "status", "total", "completed", "failed"};
+    results() returns the output lines, each {"custom_id", "response":
+    {"status_code", "body"}, "error"}.
+    """
+
+    @abstractmethod
+    def submit(self, path: str, metadata: Optional[Dict[str, str]] = None) -> str:
+        """Start running the batch file at `path`; returns the batch id."""
+
+    @abstractmethod
+    def status(self, batch_id: str) -> Dict[str, Any]:
+        """The batch's state and request counts."""
+
+    @abstractmethod
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        """Output lines of a finished batch."""
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """The OpenAI Batch API, through the process-wide OpenAI client."""
+
+    def __init__(self, client=None, completion_window: str = None):
+        if client is None:
+            # Imported here: openai_service pulls in extract_emails and its browser dependencies
+            from app.services.openai_service import get_openai_client
+            client = get_openai_client()
+        self.client = client
+        self.completion_window = completion_window or settings.OPENAI_BATCH_COMPLETION_WINDOW
+
+    def submit(self, path: str, metadata: Optional[Dict[str, str]] = None) -> str:
+        with open(path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=CHAT_COMPLETIONS,
+            completion_window=self.completion_window,
+            metadata=metadata,
+        )
+        logger.info(f"Submitted OpenAI batch {batch.id} from {path}")
+        return batch.id
+
+    def status(self, batch_id: str) -> Dict[str, Any]:
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {
+            "id": batch.id,
+            "status": batch.status,
+            "total": counts.total if counts else 0,
+            "completed": counts.completed if counts else 0,
+            "failed": counts.failed if counts else 0,
+        }
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        batch = self.client.batches.retrieve(batch_id)
+        lines = []
+        # Successful requests land in the output file, rejected ones in the error file
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                text = self.client.files.content(file_id).text
+                lines.extend(json.loads(line) for line in text.splitlines() if line.strip())
+        return lines
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    Stand-in for the Batch API that runs a batch file at submit time.
+
+    Each request body goes to `responder`, which returns the chat completion
+    (or {} on failure); by default the body is sent to Ollama's
+    OpenAI-compatible endpoint at `base_url` with the Ollama model.
+    """
+
+    def __init__(self, responder: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None, base_url: str = None):
+        self.base_url = (base_url or settings.OLLAMA_BASE_URL).rstrip("/")
+        self.responder = responder or self._ollama
+        self._session = requests.Session()
+        self._batches: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _ollama(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        body = {**body, "model": settings.OLLAMA_MODEL, "stream": False}
+        response = self._session.post(
+            f"{self.base_url}{CHAT_COMPLETIONS}", json=body,
+            timeout=(settings.OLLAMA_CONNECT_TIMEOUT, settings.OLLAMA_READ_TIMEOUT),
+        )
+        if response.status_code != 200:
+            logger.error(f"Local batch request failed: {response.status_code} - {response.text}")
+            return {}
+        return response.json()
+
+    def submit(self, path: str, metadata: Optional[Dict[str, str]] = None) -> str:
+        batch_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        outputs = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                output = {"id": f"local_req_{uuid.uuid4().hex[:12]}", "custom_id": request["custom_id"], "response": None, "error": None}
+                try:
+                    body = self.responder(request["body"])
+                    if body:
+                        output["response"] = {"status_code": 200, "body": body}
+                    else:
+                        output["error"] = {"message": "empty response"}
+                except Exception as e:
+                    output["error"] = {"message": str(e)}
+                outputs.append(output)
+        with self._lock:
+            self._batches[batch_id] = outputs
+        logger.info(f"Ran local batch {batch_id} from {path}: {len(outputs)} requests")
+        return batch_id
+
+    def status(self, batch_id: str) -> Dict[str, Any]:
+        with self._lock:
+            outputs = self._batches.get(batch_id)
+        if outputs is None:
+            raise KeyError(f"Unknown batch {batch_id}")
+        failed = sum(1 for o in outputs if o["error"])
+        return {"id": batch_id, "status": "completed", "total": len(outputs), "completed": len(outputs) - failed, "failed": failed}
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._batches[batch_id])
+
+
+_backend: Optional[BatchBackend] = None
+_backend_lock = threading.Lock()
+
+def get_batch_backend() -> BatchBackend:
+    """Return the process-wide batch backend chosen by OPENAI_BATCH_BACKEND."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                kind = settings.OPENAI_BATCH_BACKEND.lower()
+                if kind == "openai":
+                    _backend = OpenAIBatchBackend()
+                elif kind == "local":
+                    _backend = LocalBatchBackend()
+                else:
+                    raise ValueError(f"Unknown OPENAI_BATCH_BACKEND: {settings.OPENAI_BATCH_BACKEND}")
+    return _backend
+
+
+def _candidate_info(candidate: models.Candidate) -> Dict[str, Any]:
+    return {
+        "id": candidate.email,
+        "name": candidate.name,
+        "resume_text": candidate.resume_text or "",
+        "current_ctc": candidate.current_ctc or 0,
+        "expected_ctc": candidate.expected_ctc or 0,
+    }
+
+
+def _job_info(job: models.Job) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "title": job.title or "",
+        "jd_text": job.description or job.jd_text or "",
+        "min_budget": job.min_budget or 0,
+        "max_budget": job.max_budget or 0,
+    }
+
+
+def build_batch_requests(
+    db: Session,
+    job_ids: Optional[List[int]] = None,
+    extract: bool = False,
+    client: Optional[BaseOllamaClient] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Batch file lines scoring every candidate against each job (all active
+    jobs unless `job_ids` is given), plus one details extraction per
+    candidate with `extract`. Prompts are the ones the online path uses.
+    """
+    client = client or get_ollama_client()
+    query = db.query(models.Job)
+    query = query.filter(models.Job.id.in_(job_ids)) if job_ids is not None else query.filter(models.Job.status == "active")
+    jobs = query.order_by(models.Job.id).all()
+    candidates = db.query(models.Candidate).order_by(models.Candidate.email).all()
+
+    def line(custom_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        return {"custom_id": custom_id, "method": "POST", "url": CHAT_COMPLETIONS, "body": {**body, "model": settings.OPENAI_MODEL}}
+
+    lines = []
+    for job in jobs:
+        job_info = _job_info(job)
+        for candidate in candidates:
+            lines.append(line(score_custom_id(job.id, candidate.email), client.jd_score_request(_candidate_info(candidate), job_info)))
+    if extract:
+        for candidate in candidates:
+            if candidate.resume_text and candidate.resume_text.strip():
+                lines.append(line(extract_custom_id(candidate.email), client.details_request(candidate.resume_text)))
+    return lines
+
+
+def write_batch_file(lines: List[Dict[str, Any]], path: str = None) -> str:
+    """Write batch lines as JSONL (under OPENAI_BATCH_DIR by default) and return the path."""
+    if path is None:
+        os.makedirs(settings.OPENAI_BATCH_DIR, exist_ok=True)
+        path = os.path.join(settings.OPENAI_BATCH_DIR, f"batch-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for item in lines:
+            f.write(json.dumps(item) + "\n")
+    return path
+
+
+def wait_for_batch(
+    batch_id: str,
+    backend: Optional[BatchBackend] = None,
+    poll_interval: float = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Poll a batch until it reaches a terminal state and return its status.
+
+    Raises:
+        TimeoutError: If `timeout` seconds pass first
+    """
+    backend = backend or get_batch_backend()
+    poll_interval = settings.OPENAI_BATCH_POLL_INTERVAL if poll_interval is None else poll_interval
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        status = backend.status(batch_id)
+        if status["status"] in TERMINAL_STATES:
+            return status
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"Batch {batch_id} still {status['status']} after {timeout}s")
+        logger.info(f"Batch {batch_id} {status['status']}: {status['completed']}/{status['total']} done")
+        time.sleep(poll_interval)
+
+
+def _salary_match(candidate: models.Candidate, job: models.Job) -> float:
+    budget = job.max_budget or 1
+    salary_ratio = (candidate.expected_ctc or 0) / budget if budget > 0 else 0
+    return max(0.0, min(1.0, 1.0 - abs(1.0 - salary_ratio)))
+
+
+def _store_score(db: Session, job_id: int, email: str, score: float, model: str) -> bool:
+    candidate = db.query(models.Candidate).filter(models.Candidate.email == email).first()
+    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    if candidate is None or job is None:
+        # Deleted since the batch was written
+        return False
+
+    match = db.query(models.CandidateJobMatch).filter_by(candidate_email=email, job_id=job_id).first()
+    if match is None:
+        match = models.CandidateJobMatch(candidate_email=email, job_id=job_id, status="active")
+        db.add(match)
+    comparative = match.comparative_score if match.comparative_score is not None else 0.5
+    salary_match = match.salary_match_score if match.salary_match_score is not None else _salary_match(candidate, job)
+
+    # Same weights as rank-by-job: 40% JD match + 30% comparative + 30% salary
+    match.jd_match_score = round(score, 3)
+    match.technical_match_score = round(score, 3)
+    match.salary_match_score = round(salary_match, 3)
+    match.overall_score = round((score * 0.4) + (comparative * 0.3) + (salary_match * 0.3), 3)
+    # Recorded against the model that answered: rank-by-job reuses the score if that is its own
+    # model (LocalBatchBackend answers with OLLAMA_MODEL) and treats the row as stale otherwise
+    for column, value in match_inputs(candidate, job, model).items():
+        setattr(match, column, value)
+    match.jd_score_fallback = False
+    return True
+
+
+def _store_details(db: Session, email: str, details: Dict[str, Any]) -> bool:
+    candidate = db.query(models.Candidate).filter(models.Candidate.email == email).first()
+    if candidate is None:
+        return False
+    if details.get("full_name") and not candidate.name:
+        candidate.name = details["full_name"]
+
+    additional_info = {}
+    if candidate.additional_info:
+        try:
+            additional_info = json.loads(candidate.additional_info)
+        except ValueError:
+            additional_info = {"data": candidate.additional_info}
+    for field in ("phone", "skills", "years_of_experience", "education"):
+        if details.get(field) is not None:
+            additional_info[field] = details[field]
+    candidate.additional_info = json.dumps(additional_info) if additional_info else None
+    return True
+
+
+def ingest_batch_results(
+    db: Session,
+    batch_id: str,
+    backend: Optional[BatchBackend] = None,
+    client: Optional[BaseOllamaClient] = None,
+) -> Dict[str, int]:
+    """
+    Store a finished batch: scores into CandidateJobMatch (overall score
+    recomputed with the existing comparative and salary scores) and
+    extracted details into the candidate. Failed requests, and answers
+    that do not parse, leave the stored values untouched.
+
+    Returns:
+        Counts of scored, extracted, failed (including unparseable answers)
+        and skipped (candidate or job deleted since) requests
+    """
+    backend = backend or get_batch_backend()
+    client = client or get_ollama_client()
+    counts = {"scored": 0, "extracted": 0, "failed": 0, "skipped": 0}
+
+    for output in backend.results(batch_id):
+        custom_id = output.get("custom_id", "")
+        response = output.get("response") or {}
+        body = response.get("body") if response.get("status_code") == 200 else None
+        if output.get("error") or not body:
+            logger.warning(f"Batch {batch_id} request {custom_id} failed: {output.get('error') or response}")
+            counts["failed"] += 1
+            continue
+
+        kind, _, rest = custom_id.partition(":")
+        if kind == SCORE:
+            job_id, _, email = rest.partition(":")
+            score = client.parse_jd_score(body, default=None)
+            if score is None:
+                logger.warning(f"Batch {batch_id} request {custom_id}: no valid score in the answer")
+                counts["failed"] += 1
+                continue
+            model = body.get("model") or settings.OPENAI_MODEL
+            stored = _store_score(db, int(job_id), email, score, model)
+            counts["scored" if stored else "skipped"] += 1
+        elif kind == EXTRACT:
+            details = client.parse_candidate_details(body)
+            if not details:
+                counts["failed"] += 1
+                continue
+            counts["extracted" if _store_details(db, rest, details) else "skipped"] += 1
+        else:
+            logger.warning(f"Batch {batch_id}: unknown request {custom_id}")
+            counts["skipped"] += 1
+
+    db.commit()
+    logger.info(f"Ingested batch {batch_id}: {counts}")
+    return counts
+
+
+def run_batch(
+    db: Session,
+    job_ids: Optional[List[int]] = None,
+    extract: bool = False,
+    backend: Optional[BatchBackend] = None,
+    poll_interval: float = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Write, submit, wait for and ingest one batch; returns its final status and ingest counts."""
+    backend = backend or get_batch_backend()
+    lines = build_batch_requests(db, job_ids, extract)
+    if not lines:
+        return {"id": None, "status": "empty", "ingested": {}}
+    path = write_batch_file(lines)
+    batch_id = backend.submit(path, metadata={"source": "resume-tracker"})
+    status = wait_for_batch(batch_id, backend, poll_interval, timeout)
+    # An expired batch still has results for the requests it finished
+    status["ingested"] = ingest_batch_results(db, batch_id, backend) if status["status"] in ("completed", "expired") else {}
+    return status
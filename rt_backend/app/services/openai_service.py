@@ -2,15 +2,33 @@ import openai
 from app.core.config import settings
 import json
 import logging
+import threading
 from typing import Optional, Dict
 import re
 import extract_emails
 
 logger = logging.getLogger(__name__)
 
-def get_openai_client():
-    """Initializes and returns an OpenAI client."""
-    return openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+_client: Optional[openai.OpenAI] = None
+_client_lock = threading.Lock()
+
+def get_openai_client() -> openai.OpenAI:
+    """
+    Return the process-wide OpenAI client, creating it on first use.
+
+    The client owns an HTTP connection pool, so sharing one keeps
+    connections alive across calls instead of reconnecting every time.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = openai.OpenAI(
+                    api_key=settings.OPENAI_API_KEY,
+                    timeout=settings.OPENAI_TIMEOUT,
+                    max_retries=settings.OPENAI_MAX_RETRIES,
+                )
+    return _client
 
 def extract_candidate_details_from_text(client: openai.OpenAI, resume_text: str) -> Optional[Dict[str, str]]:
     """Extracts candidate details (like name and email) from resume text using OpenAI."""
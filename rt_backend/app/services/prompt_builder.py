@@ -0,0 +1,275 @@
+import logging
+import re
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Characters per token assumed when no tokenizer is available. Deliberately
+# low so the estimate overcounts and prompts stay inside the context window.
+HEURISTIC_CHARS_PER_TOKEN = 3.0
+
+# Tokens the chat template wraps around a message (role headers, BOS/EOT)
+CHAT_TEMPLATE_TOKENS = 16
+
+# A rendered prompt: one user message, or a list of chat messages
+Prompt = Union[str, List[Dict[str, str]]]
+
+# Resume sections in the order they receive budget
+SCORING_PRIORITY = ("skills", "experience", "projects", "education", "certifications", "summary", "header", "other")
+# Extraction needs the contact block at the top of the resume first
+EXTRACTION_PRIORITY = ("header", "skills", "experience", "education", "certifications", "projects", "summary", "other")
+
+SECTION_HEADINGS = {
+    "skills": ("skills", "technical skills", "key skills", "core skills", "core competencies", "technologies", "tech stack", "tools"),
+    "experience": ("experience", "work experience", "professional experience", "employment", "employment history", "work history", "career history"),
+    "projects": ("projects", "key projects", "personal projects", "academic projects"),
+    "education": ("education", "academic background", "academics", "qualifications", "educational qualifications"),
+    "certifications": ("certifications", "certificates", "licenses", "courses", "training"),
+    "summary": ("summary", "profile", "professional summary", "objective", "career objective", "about me", "about"),
+}
+_HEADING_TO_SECTION = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """
+    Split resume text into (section, text) pairs in document order.
+
+    A section starts at a short line matching a known heading ("Skills",
+    "WORK EXPERIENCE:", ...). Text before the first heading is the "header"
+    (name and contact details); sections without a known heading are "other".
+    """
+    sections: List[Tuple[str, List[str]]] = [("header", [])]
+    for line in text.splitlines(keepends=True):
+        key = re.sub(r"\s+", " ", line.strip().strip("#*-•:|").strip()).lower()
+        section = _HEADING_TO_SECTION.get(key) if len(key) <= 40 else None
+        if section is not None:
+            sections.append((section, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(name, "".join(lines)) for name, lines in sections if "".join(lines).strip()]
+
+
+class TokenCounter:
+    """
+    Count and truncate text in the configured model's tokens.
+
+    `tokenizer` selects the implementation: a Hugging Face tokenizer name or
+    tokenizer.json path (exact, needs the `tokenizers` package),
+    "tiktoken:<encoding>", "heuristic", or "" to pick automatically from the
+    model name. Anything that fails to load falls back to a conservative
+    character-based estimate.
+    """
+
+    def __init__(self, model: str = None, tokenizer: str = None):
+        self.model = model or settings.OLLAMA_MODEL
+        spec = settings.LLM_TOKENIZER if tokenizer is None else tokenizer
+        self.name, self.exact, self._encode, self._decode = self._load(spec)
+        logger.info(f"Token counter for {self.model}: {self.name}{'' if self.exact else ' (approximate)'}")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encode is None:
+            return int(len(text) / HEURISTIC_CHARS_PER_TOKEN) + 1
+        return len(self._encode(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Keep the leading `max_tokens` tokens of `text`."""
+        if max_tokens <= 0 or not text:
+            return ""
+        if self._encode is None:
+            return text[:int(max_tokens * HEURISTIC_CHARS_PER_TOKEN)]
+        tokens = self._encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return self._decode(tokens[:max_tokens])
+
+    def _load(self, spec: str):
+        if spec == "heuristic":
+            return "heuristic", False, None, None
+        if spec and not spec.startswith("tiktoken:"):
+            try:
+                from tokenizers import Tokenizer
+                hf = Tokenizer.from_file(spec) if spec.endswith(".json") else Tokenizer.from_pretrained(spec)
+                return spec, True, lambda text: hf.encode(text, add_special_tokens=False).ids, hf.decode
+            except Exception as e:
+                logger.warning(f"Could not load tokenizer {spec}: {e}")
+        try:
+            import tiktoken
+            if spec.startswith("tiktoken:"):
+                encoding, exact = tiktoken.get_encoding(spec.split(":", 1)[1]), True
+            elif self.model.startswith(("gpt-", "o1", "o3", "o4")):
+                encoding, exact = tiktoken.encoding_for_model(self.model), True
+            else:
+                # Llama 3, Qwen and Mistral BPE vocabularies tokenize English
+                # text at a density close to cl100k
+                encoding, exact = tiktoken.get_encoding("cl100k_base"), False
+            return f"tiktoken:{encoding.name}", exact, encoding.encode_ordinary, encoding.decode
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, estimating tokens from characters: {e}")
+        return "heuristic", False, None, None
+
+
+class PromptBuilder:
+    """
+    Fit a job description and one or more resumes into a prompt template
+    without exceeding the model's context window (`num_ctx`).
+
+    The budget left after the template and the tokens reserved for the answer
+    is shared between the JD (up to `jd_share` of it, more if the resumes need
+    less) and the resumes (split evenly, short resumes donating their surplus).
+    A resume that does not fit keeps its highest-priority sections — skills
+    and experience first when scoring — instead of simply losing its tail.
+    """
+
+    def __init__(self, counter: TokenCounter = None, num_ctx: int = None, jd_share: float = 0.4):
+        self.counter = counter or TokenCounter()
+        self.num_ctx = num_ctx or settings.OLLAMA_NUM_CTX
+        self.jd_share = jd_share
+
+    @property
+    def limit(self) -> int:
+        """Usable prompt+answer tokens; approximate counters keep a 10% margin."""
+        usable = self.num_ctx if self.counter.exact else int(self.num_ctx * 0.9)
+        return usable - CHAT_TEMPLATE_TOKENS
+
+    def build(
+        self,
+        render: Callable[[str, List[str]], Prompt],
+        reserve: int,
+        jd: str = "",
+        resumes: Sequence[str] = (),
+        priority: Sequence[str] = SCORING_PRIORITY,
+        stable_jd: bool = False,
+    ) -> Prompt:
+        """
+        Render a prompt with the JD and resumes trimmed to fit.
+
+        Args:
+            render: Builds the prompt (a string or chat messages) from
+                (jd, resumes); everything else it adds counts as fixed
+                template overhead
+            reserve: Tokens kept free for the model's answer
+            jd: Job description text
+            resumes: Resume texts, passed to `render` in the same order
+            priority: Resume section order used when a resume must be cut
+            stable_jd: Trim the JD independently of the resumes, so the JD
+                text is byte-identical for every candidate of a job
+
+        Returns:
+            The rendered prompt
+        """
+        overhead = self.count_prompt(render("", ["" for _ in resumes]))
+        available = self.limit - reserve - overhead
+        jd_tokens = self.counter.count(jd)
+        resume_tokens = [self.counter.count(r) for r in resumes]
+        if stable_jd:
+            # Depends on nothing candidate-specific, so the JD is cut identically every time
+            jd_budget = min(jd_tokens, int((self.limit - reserve) * self.jd_share))
+            resume_budgets = _water_fill(max(0, available - jd_budget), resume_tokens)
+        else:
+            jd_budget, resume_budgets = self._allocate(available, jd_tokens, resume_tokens)
+        prompt = render(
+            self.counter.truncate(jd, jd_budget),
+            [self.fit(r, budget, priority) for r, budget in zip(resumes, resume_budgets)],
+        )
+        if self.count_prompt(prompt) + reserve > self.limit:
+            logger.warning(f"Prompt exceeds the {self.num_ctx} token context; its fixed template alone needs {overhead} tokens")
+        return prompt
+
+    def count_prompt(self, prompt: Prompt) -> int:
+        if isinstance(prompt, str):
+            return self.counter.count(prompt)
+        # Each extra message adds its own role header
+        return sum(self.counter.count(m["content"]) for m in prompt) + CHAT_TEMPLATE_TOKENS * (len(prompt) - 1)
+
+    def fit(self, text: str, max_tokens: int, priority: Sequence[str] = SCORING_PRIORITY) -> str:
+        """Trim resume text to `max_tokens`, keeping sections in priority order."""
+        if self.counter.count(text) <= max_tokens:
+            return text
+        sections = split_sections(text)
+        if len(sections) <= 1:
+            return self.counter.truncate(text, max_tokens)
+
+        rank = {name: i for i, name in enumerate(priority)}
+        order = sorted(range(len(sections)), key=lambda i: (rank.get(sections[i][0], len(priority)), i))
+        kept: Dict[int, str] = {}
+        left = max_tokens
+        for i in order:
+            if left <= 0:
+                break
+            section_text = sections[i][1]
+            tokens = self.counter.count(section_text)
+            kept[i] = section_text if tokens <= left else self.counter.truncate(section_text, left)
+            left -= min(tokens, left)
+
+        # Reassemble in document order so the model still reads a resume
+        fitted = "".join(kept[i] if kept[i].endswith("\n") else kept[i] + "\n" for i in sorted(kept))
+        return self.counter.truncate(fitted, max_tokens)
+
+    def _allocate(self, available: int, jd_tokens: int, resume_tokens: List[int]) -> Tuple[int, List[int]]:
+        if available <= 0:
+            return 0, [0 for _ in resume_tokens]
+        resume_need = sum(resume_tokens)
+        if jd_tokens + resume_need <= available:
+            return jd_tokens, resume_tokens
+        if resume_tokens:
+            jd_budget = min(jd_tokens, max(int(available * self.jd_share), available - resume_need))
+        else:
+            jd_budget = available
+        return jd_budget, _water_fill(available - jd_budget, resume_tokens)
+
+
+def _water_fill(budget: int, needs: List[int]) -> List[int]:
+    """Split `budget` evenly, letting items that need less give the rest away."""
+    allocations = [0 for _ in needs]
+    order = sorted(range(len(needs)), key=lambda i: needs[i])
+    for k, i in enumerate(order):
+        allocations[i] = min(needs[i], budget // (len(order) - k))
+        budget -= allocations[i]
+    return allocations
+
+
+def pack_batches(item_tokens: List[int], budget: int, max_items: int) -> List[List[int]]:
+    """
+    Group items into consecutive batches of at most `max_items` whose token
+    counts sum to at most `budget`.
+
+    Items keep their order, so results map back deterministically. An item
+    too large to share a prompt ends up in a batch of its own.
+
+    Returns:
+        Batches as lists of indexes into `item_tokens`
+    """
+    max_items = max(1, max_items)
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    used = 0
+    for i, tokens in enumerate(item_tokens):
+        if batch and (len(batch) >= max_items or used + tokens > budget):
+            batches.append(batch)
+            batch, used = [], 0
+        batch.append(i)
+        used += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+_builders: Dict[str, PromptBuilder] = {}
+_builders_lock = threading.Lock()
+
+
+def get_prompt_builder(model: str = None) -> PromptBuilder:
+    """Return the process-wide prompt builder for a model (tokenizers load once)."""
+    model = model or settings.OLLAMA_MODEL
+    builder = _builders.get(model)
+    if builder is None:
+        with _builders_lock:
+            builder = _builders.get(model)
+            if builder is None:
+                builder = _builders[model] = PromptBuilder(TokenCounter(model))
+    return builder
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Callable, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# This server process, as recorded on the locks it holds and the runs it executes
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class JobRankingLocked(Exception):
+    """The job is already being ranked by another request or run."""
+
+    def __init__(self, job_id: int, run_id: Optional[str] = None):
+        self.job_id = job_id
+        self.run_id = run_id
+        detail = f"Job {job_id} is already being ranked"
+        super().__init__(f"{detail} (run {run_id})" if run_id else detail)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def heartbeat_expiry() -> datetime:
+    """Heartbeats older than this belong to holders whose process is gone."""
+    return _now() - timedelta(seconds=settings.RANKING_HEARTBEAT_TIMEOUT)
+
+
+class JobRankingLock:
+    """
+    Lock on ranking one job, shared by every server process through its
+    RankingLock row.
+
+    acquire() is a conditional UPDATE that only succeeds on a free (or
+    expired) lock, so of several requests or workers racing for the job
+    exactly one gets it. The holder refreshes the heartbeat while it ranks
+    (see held()); a holder whose process died loses the lock once
+    RANKING_HEARTBEAT_TIMEOUT passes without a heartbeat.
+    """
+
+    def __init__(self, job_id: int, session_factory: Callable[[], Session] = SessionLocal, run_id: Optional[str] = None):
+        self.job_id = job_id
+        self.session_factory = session_factory
+        self.run_id = run_id
+        self.token = uuid.uuid4().hex
+
+    def acquire(self) -> None:
+        """Take the lock; raises JobRankingLocked if someone else holds it."""
+        Lock = models.RankingLock
+        db = self.session_factory()
+        try:
+            if db.get(Lock, self.job_id) is None:
+                try:
+                    db.add(Lock(job_id=self.job_id))
+                    db.commit()
+                except IntegrityError:
+                    # Another process created the row first; the UPDATE below decides
+                    db.rollback()
+
+            now = _now()
+            taken = (
+                db.query(Lock)
+                .filter(Lock.job_id == self.job_id, or_(Lock.token.is_(None), Lock.heartbeat_at < heartbeat_expiry()))
+                .update(
+                    {"token": self.token, "owner": WORKER_ID, "run_id": self.run_id,
+                     "acquired_at": now, "heartbeat_at": now},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if not taken:
+                holder = db.get(Lock, self.job_id)
+                raise JobRankingLocked(self.job_id, holder.run_id if holder is not None else None)
+        finally:
+            db.close()
+
+    def heartbeat(self) -> bool:
+        """Refresh the lock and its run's heartbeat; False if the lock was lost."""
+        now = _now()
+        db = self.session_factory()
+        try:
+            kept = (
+                db.query(models.RankingLock)
+                .filter(models.RankingLock.job_id == self.job_id, models.RankingLock.token == self.token)
+                .update({"heartbeat_at": now}, synchronize_session=False)
+            )
+            if self.run_id is not None:
+                db.query(models.RankingRun).filter(models.RankingRun.id == self.run_id).update(
+                    {"heartbeat_at": now}, synchronize_session=False,
+                )
+            db.commit()
+            return bool(kept)
+        finally:
+            db.close()
+
+    def release(self) -> None:
+        """Free the lock if this holder still has it; safe to call more than once."""
+        db = self.session_factory()
+        try:
+            (
+                db.query(models.RankingLock)
+                .filter(models.RankingLock.job_id == self.job_id, models.RankingLock.token == self.token)
+                .update({"token": None, "owner": None, "run_id": None}, synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    async def _keep_alive(self) -> None:
+        while True:
+            await asyncio.sleep(settings.RANKING_HEARTBEAT_INTERVAL)
+            try:
+                if not self.heartbeat():
+                    logger.error(f"Lost the ranking lock of job {self.job_id}: its heartbeat expired")
+            except Exception as e:
+                logger.warning(f"Heartbeat of the ranking lock of job {self.job_id} failed: {e}")
+
+    @asynccontextmanager
+    async def held(self) -> AsyncIterator["JobRankingLock"]:
+        """Keep an acquired lock alive while the body runs, then release it."""
+        beat = asyncio.create_task(self._keep_alive())
+        try:
+            yield self
+        finally:
+            beat.cancel()
+            self.release()
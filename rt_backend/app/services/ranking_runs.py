@@ -0,0 +1,287 @@
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.llm_resilience import LLMUnavailableError
+from app.services.ranking_lock import WORKER_ID, JobRankingLock, JobRankingLocked, heartbeat_expiry
+from app.services.ranking_service import RankingProgress, rank_job
+from app.services.scoring_cascade import CascadeConfig
+
+logger = logging.getLogger(__name__)
+
+# Run states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE = (QUEUED, RUNNING)
+
+# Error messages kept per run
+MAX_ERRORS = 50
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _seconds_since(moment: Optional[datetime], until: Optional[datetime] = None) -> Optional[float]:
+    if moment is None:
+        return None
+    # SQLite hands timestamps back without their timezone; they were stored in UTC
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    if until is not None and until.tzinfo is None:
+        until = until.replace(tzinfo=timezone.utc)
+    return max(0.0, ((until or _now()) - moment).total_seconds())
+
+
+def _add_error(run: models.RankingRun, error: str) -> None:
+    errors = json.loads(run.errors) if run.errors else []
+    if len(errors) < MAX_ERRORS:
+        errors.append(error[:500])
+    run.errors = json.dumps(errors)
+
+
+def run_status(run: models.RankingRun) -> Dict[str, Any]:
+    """A run's progress as reported by the status endpoint."""
+    elapsed = _seconds_since(run.started_at, run.finished_at)
+    eta = None
+    if run.status == RUNNING and run.scored and elapsed is not None:
+        # Remaining JD scoring at the rate so far; the comparative pass runs alongside it
+        eta = round(elapsed / run.scored * max(0, run.to_score - run.scored), 1)
+    return {
+        "run_id": run.id,
+        "job_id": run.job_id,
+        "status": run.status,
+        "total_candidates": run.total_candidates or 0,
+        "to_score": run.to_score or 0,
+        "scored": run.scored or 0,
+        "failed": run.failed or 0,
+        "progress": round(run.scored / run.to_score, 3) if run.to_score else (1.0 if run.status == COMPLETED else 0.0),
+        "elapsed_seconds": round(elapsed, 1) if elapsed is not None else None,
+        "eta_seconds": eta,
+        "errors": json.loads(run.errors) if run.errors else [],
+        "summary": json.loads(run.summary) if run.summary else None,
+        "options": json.loads(run.options) if run.options else {},
+        "owner": run.owner,
+        "heartbeat_at": run.heartbeat_at,
+        "created_at": run.created_at,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+    }
+
+
+class _RunProgress(RankingProgress):
+    """Records a ranking's progress on its run row, in the ranking's own session."""
+
+    def __init__(self, db: Session, run: models.RankingRun):
+        self.db = db
+        self.run = run
+
+    def started(self, total: int, to_score: int) -> None:
+        self.run.total_candidates = total
+        self.run.to_score = to_score
+        self.db.commit()
+
+    def scored(self, results: List[Dict[str, Any]]) -> None:
+        self.run.scored += len(results)
+        self.db.commit()
+
+    def failed(self, emails: List[str], error: str) -> None:
+        # Committed now: a run that fails next rolls back before recording why
+        self.run.failed += len(emails)
+        _add_error(self.run, f"{len(emails)} candidates: {error}")
+        self.db.commit()
+
+
+class RankingRunManager:
+    """
+    Runs rank-by-job in the background so a ranking does not depend on the
+    request (or client) that started it.
+
+    A run is an asyncio task on the server's event loop, tracked by a
+    RankingRun row that records its progress; scores are stored as
+    candidates finish (see rank_job), so a cancelled or failed run keeps
+    what it scored and the next run picks up from there.
+
+    A run holds its job's ranking lock (see ranking_lock) from submit()
+    until it finishes, so a job is ranked by one run or request at a time
+    across every server process, and its heartbeat keeps the run row's
+    heartbeat_at fresh. Cancellation works in the process that owns the run.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, llm_client=None):
+        self.session_factory = session_factory
+        self.llm_client = llm_client
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def submit(self, job_id: int, options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Start ranking a job in the background; must be called on the event loop.
+
+        `options` are rank_job's batch_size, concurrency and incremental,
+        plus "cascade" (CascadeConfig arguments, or None). If the job already
+        has an active run, in this process or another, that run is returned
+        instead of starting another.
+
+        Raises:
+            JobRankingLocked: The job is being ranked by a request rather than a run
+        """
+        self.recover(job_id)
+        run_id = uuid.uuid4().hex
+        lock = JobRankingLock(job_id, self.session_factory, run_id=run_id)
+        db = self.session_factory()
+        try:
+            try:
+                lock.acquire()
+            except JobRankingLocked as e:
+                active = db.get(models.RankingRun, e.run_id) if e.run_id else None
+                if active is not None and active.status in ACTIVE:
+                    return run_status(active)
+                raise
+
+            run = models.RankingRun(id=run_id, job_id=job_id, status=QUEUED, options=json.dumps(options),
+                                    scored=0, failed=0, owner=WORKER_ID, heartbeat_at=_now())
+            db.add(run)
+            db.commit()
+            status = run_status(run)
+        except Exception:
+            lock.release()
+            raise
+        finally:
+            db.close()
+
+        task = asyncio.create_task(self._execute(run_id, lock), name=f"ranking-run-{run_id}")
+        self._tasks[run_id] = task
+
+        def finished(_):
+            self._tasks.pop(run_id, None)
+            # Also covers a run cancelled before it started
+            lock.release()
+
+        task.add_done_callback(finished)
+        return status
+
+    async def _execute(self, run_id: str, lock: JobRankingLock) -> None:
+        async with lock.held():
+            await self._rank(run_id)
+
+    async def _rank(self, run_id: str) -> None:
+        db = self.session_factory()
+        try:
+            run = db.get(models.RankingRun, run_id)
+            options = json.loads(run.options)
+            run.status = RUNNING
+            run.started_at = _now()
+            db.commit()
+
+            job = db.get(models.Job, run.job_id)
+            candidates = db.query(models.Candidate).all()
+            if job is None or not candidates:
+                run.status = FAILED
+                _add_error(run, "Job not found" if job is None else "No candidates found")
+            else:
+                cascade = options.get("cascade")
+                result = await rank_job(
+                    db, job, candidates,
+                    cascade_config=CascadeConfig(**cascade) if cascade is not None else None,
+                    batch_size=options.get("batch_size"),
+                    concurrency=options.get("concurrency"),
+                    incremental=options.get("incremental", True),
+                    llm_client=self.llm_client,
+                    progress=_RunProgress(db, run),
+                )
+                run.status = COMPLETED
+                run.summary = json.dumps({"incremental": result["incremental"], "cascade": result["cascade"]})
+        except asyncio.CancelledError:
+            db.rollback()
+            run = db.get(models.RankingRun, run_id)
+            run.status = CANCELLED
+            logger.info(f"Ranking run {run_id} cancelled after {run.scored} of {run.to_score} candidates")
+            # Once finished_at is written below, the task ends cancelled like Task.cancel() promises
+            raise
+        except LLMUnavailableError as e:
+            db.rollback()
+            run = db.get(models.RankingRun, run_id)
+            run.status = FAILED
+            _add_error(run, f"LLM unavailable: {e}")
+        except Exception as e:
+            logger.error(f"Ranking run {run_id} failed: {e}", exc_info=True)
+            db.rollback()
+            run = db.get(models.RankingRun, run_id)
+            run.status = FAILED
+            _add_error(run, str(e))
+        finally:
+            run = db.get(models.RankingRun, run_id)
+            if run is not None:
+                run.finished_at = _now()
+                db.commit()
+            db.close()
+
+    def cancel(self, run_id: str) -> bool:
+        """Cancel a run of this process; False if it is not running here."""
+        task = self._tasks.get(run_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def wait(self, run_id: str) -> None:
+        """Wait until a run of this process has finished."""
+        task = self._tasks.get(run_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
+    def recover(self, job_id: Optional[int] = None) -> int:
+        """
+        Fail active runs (of one job, or all) whose heartbeat expired because
+        the server process running them is gone; returns how many. Runs of
+        other live processes keep their heartbeat fresh and are left alone.
+        """
+        Run = models.RankingRun
+        db = self.session_factory()
+        try:
+            query = db.query(Run).filter(
+                Run.status.in_(ACTIVE), or_(Run.heartbeat_at.is_(None), Run.heartbeat_at < heartbeat_expiry()),
+            )
+            if job_id is not None:
+                query = query.filter(Run.job_id == job_id)
+            orphans = [run for run in query.all() if run.id not in self._tasks]
+            for run in orphans:
+                run.status = FAILED
+                run.finished_at = _now()
+                _add_error(run, f"Interrupted: no heartbeat from {run.owner or 'its server'} since {run.heartbeat_at}")
+            db.commit()
+            return len(orphans)
+        finally:
+            db.close()
+
+    async def shutdown(self) -> None:
+        """Cancel every run of this process and wait for them to record it (app shutdown)."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+_manager: Optional[RankingRunManager] = None
+_manager_lock = threading.Lock()
+
+def get_ranking_runs() -> RankingRunManager:
+    """Return the process-wide manager of background ranking runs."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = RankingRunManager()
+    return _manager
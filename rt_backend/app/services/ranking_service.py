@@ -0,0 +1,486 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.services.llm_fanout import gather_bounded
+from app.services.llm_resilience import LLMUnavailableError
+from app.services.llm_router import get_async_llm_router
+from app.services.llm_scheduler import BULK
+from app.services.ollama_service import PROMPT_TEMPLATE_VERSION
+from app.services.scoring_cascade import CascadeConfig, cascade_jd_scores
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(values: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def candidate_fingerprint(candidate: models.Candidate) -> str:
+    """Hash of every candidate field a JD score depends on."""
+    return _digest({
+        "name": candidate.name,
+        "resume_text": candidate.resume_text or "",
+        "current_ctc": candidate.current_ctc,
+        "expected_ctc": candidate.expected_ctc,
+        "additional_info": candidate.additional_info,
+    })
+
+
+def resume_hash(candidate: models.Candidate) -> str:
+    return hashlib.sha256((candidate.resume_text or "").encode("utf-8")).hexdigest()
+
+
+def jd_hash(job: models.Job) -> str:
+    return _digest({"title": job.title or "", "jd_text": job.description or job.jd_text or ""})
+
+
+def budget_hash(job: models.Job) -> str:
+    return _digest({"min_budget": job.min_budget, "max_budget": job.max_budget})
+
+
+def scoring_model(cascade_config: Optional[CascadeConfig] = None) -> str:
+    """
+    Describe what produces the JD scores: OLLAMA_MODEL, or the cascade's
+    cheap and full models. The cascade thresholds are left out: they only
+    decide which candidates the full model re-checks, so changing them per
+    request must not make every stored score stale.
+    """
+    if cascade_config is None:
+        return settings.OLLAMA_MODEL
+    return f"cascade:{cascade_config.cheap_model}>{settings.OLLAMA_MODEL}"
+
+
+def default_scoring_model() -> str:
+    """The scoring model rank-by-job uses without per-request overrides."""
+    return scoring_model(CascadeConfig() if settings.LLM_CASCADE_MODEL else None)
+
+
+def match_inputs(candidate: models.Candidate, job: models.Job, model: str) -> Dict[str, str]:
+    """CandidateJobMatch input columns for a score computed now with `model`."""
+    return {
+        "candidate_fingerprint": candidate_fingerprint(candidate),
+        "resume_hash": resume_hash(candidate),
+        "jd_hash": jd_hash(job),
+        "budget_hash": budget_hash(job),
+        "model_name": model,
+        "prompt_version": PROMPT_TEMPLATE_VERSION,
+    }
+
+
+def stale_reasons(match: models.CandidateJobMatch, current: Dict[str, str]) -> List[str]:
+    """
+    Which of a match row's inputs differ from `current` (see match_inputs):
+    "resume", "candidate" (CTC or additional info), "jd", "budget", "model"
+    or "prompt_version", or just "fallback" when the stored JD score is the
+    default the LLM fell back to. Empty when the stored score is still
+    valid; rows from before the input columns existed are stale on every input.
+    """
+    if match.jd_score_fallback:
+        return ["fallback"]
+    reasons = []
+    if match.resume_hash != current["resume_hash"]:
+        reasons.append("resume")
+    elif match.candidate_fingerprint != current["candidate_fingerprint"]:
+        reasons.append("candidate")
+    if match.jd_hash != current["jd_hash"]:
+        reasons.append("jd")
+    if match.budget_hash != current["budget_hash"]:
+        reasons.append("budget")
+    if match.model_name != current["model_name"]:
+        reasons.append("model")
+    if match.prompt_version != current["prompt_version"]:
+        reasons.append("prompt_version")
+    return reasons
+
+
+def stale_matches(db: Session, job: models.Job, model: Optional[str] = None) -> List[models.CandidateJobMatch]:
+    """
+    Return the job's match rows whose score no longer reflects its inputs:
+    the resume, CTC or additional info changed, the job's JD or budget
+    changed, the row was scored by another model (OLLAMA_MODEL or the
+    default cascade unless `model` is given) or prompt version, its JD score
+    is a fallback default, or the candidate no longer exists.
+    """
+    model = model or default_scoring_model()
+    Match = models.CandidateJobMatch
+    rows = (
+        db.query(Match, models.Candidate)
+        .outerjoin(models.Candidate, models.Candidate.email == Match.candidate_email)
+        .filter(Match.job_id == job.id)
+        .all()
+    )
+    stale = []
+    for match, candidate in rows:
+        if candidate is None:
+            stale.append(match)
+            continue
+        if stale_reasons(match, match_inputs(candidate, job, model)):
+            stale.append(match)
+    return stale
+
+
+def _job_info(job: models.Job) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "title": job.title or "",
+        "jd_text": job.description or job.jd_text or "",
+        "min_budget": job.min_budget or 0,
+        "max_budget": job.max_budget or 0,
+    }
+
+
+def _candidate_info(candidate: models.Candidate, candidate_id: Any) -> Dict[str, Any]:
+    return {
+        "id": candidate_id,
+        "name": candidate.name,
+        "resume_text": candidate.resume_text or "",
+        "current_ctc": candidate.current_ctc or 0,
+        "expected_ctc": candidate.expected_ctc or 0,
+    }
+
+
+def build_match_values(
+    candidate: models.Candidate, job: models.Job, jd_score: float, comp_score: float,
+) -> Dict[str, Any]:
+    """CandidateJobMatch column values for a candidate's JD and comparative scores."""
+    # Salary match
+    budget = job.max_budget or 1
+    expected = candidate.expected_ctc or 0
+    salary_ratio = expected / budget if budget > 0 else 0
+    salary_match = max(0.0, min(1.0, 1.0 - abs(1.0 - salary_ratio)))
+
+    # Overall = 40% JD match + 30% comparative + 30% salary
+    overall = (jd_score * 0.4) + (comp_score * 0.3) + (salary_match * 0.3)
+
+    # Budget fit
+    if expected <= budget:
+        budget_fit = "Within budget"
+    elif expected <= budget * 1.1:
+        budget_fit = "Slightly above"
+    else:
+        budget_fit = "Above budget"
+
+    salary_gap = round(((expected / budget) - 1) * 100, 2) if budget > 0 else 0
+
+    strengths = ["Technical skills match"] if jd_score >= 0.6 else ["Potential growth candidate"]
+    if salary_match >= 0.8:
+        strengths.append("Good salary fit")
+    weaknesses = []
+    if jd_score < 0.5:
+        weaknesses.append("JD skills mismatch")
+    if salary_match < 0.5:
+        weaknesses.append("Budget constraints")
+    if not weaknesses:
+        weaknesses.append("None identified")
+
+    return {
+        "jd_match_score": round(jd_score, 3),
+        "comparative_score": round(comp_score, 3),
+        "overall_score": round(overall, 3),
+        "salary_match_score": round(salary_match, 3),
+        "technical_match_score": round(jd_score, 3),
+        "experience_match_score": round(comp_score, 3),
+        "strengths": json.dumps(strengths),
+        "weaknesses": json.dumps(weaknesses),
+        "salary_analysis": json.dumps({
+            "current_ctc": candidate.current_ctc,
+            "expected_ctc": candidate.expected_ctc,
+            "budget_fit": budget_fit,
+            "salary_gap_percentage": salary_gap,
+        }),
+        "recommendation": f"{round(jd_score * 100)}% JD match, {round(comp_score * 100)}% comparative",
+    }
+
+
+def match_result(match: models.CandidateJobMatch, candidate: Optional[models.Candidate]) -> Dict[str, Any]:
+    """One ranking entry as returned by the API, from a stored match row."""
+    salary_analysis = json.loads(match.salary_analysis) if match.salary_analysis else {}
+    return {
+        "candidate_email": match.candidate_email,
+        "candidate_name": candidate.name if candidate else match.candidate_email,
+        "current_ctc": candidate.current_ctc if candidate else 0,
+        "expected_ctc": candidate.expected_ctc if candidate else 0,
+        "jd_match_score": match.jd_match_score or 0,
+        "comparative_score": match.comparative_score or 0,
+        "overall_score": match.overall_score or 0,
+        "salary_match_score": match.salary_match_score or 0,
+        "strengths": json.loads(match.strengths) if match.strengths else [],
+        "weaknesses": json.loads(match.weaknesses) if match.weaknesses else [],
+        "budget_fit": salary_analysis.get("budget_fit", "Unknown"),
+        "salary_gap_percentage": salary_analysis.get("salary_gap_percentage", 0),
+        "recommendation": match.recommendation or "",
+        "status": match.status or "active",
+    }
+
+
+def sorted_results(matches: List[models.CandidateJobMatch], candidates: Dict[str, models.Candidate]) -> List[Dict[str, Any]]:
+    results = [match_result(m, candidates.get(m.candidate_email)) for m in matches]
+    results.sort(key=lambda x: x["overall_score"], reverse=True)
+    return results
+
+
+class RankingProgress:
+    """
+    Receives a ranking's progress from rank_job as it runs; every hook is
+    a no-op here. Hooks are called on the event loop and must not block.
+    """
+
+    def started(self, total: int, to_score: int) -> None:
+        """The pool has `total` candidates, of which `to_score` need a JD score."""
+
+    def reused(self, results: List[Dict[str, Any]]) -> None:
+        """Entries of the candidates whose stored JD score is still valid."""
+
+    def scored(self, results: List[Dict[str, Any]]) -> None:
+        """
+        Candidates just got their JD score, already stored. Their entries
+        (as in the final rankings) carry an interim overall score until the
+        comparative pass finishes.
+        """
+
+    def failed(self, emails: List[str], error: str) -> None:
+        """
+        Scoring these candidates failed; they get the neutral default score,
+        stored without their inputs so the next ranking scores them again.
+        """
+
+
+async def rank_job(
+    db: Session,
+    job: models.Job,
+    candidates: List[models.Candidate],
+    cascade_config: Optional[CascadeConfig] = None,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    incremental: bool = True,
+    llm_client=None,
+    progress: Optional[RankingProgress] = None,
+) -> Dict[str, Any]:
+    """
+    Rank candidates against a job and store the results as CandidateJobMatch rows.
+
+    In incremental mode only candidates without a match row, or whose row
+    is stale (see stale_reasons: their resume, CTC or additional info, or
+    the job's JD, budget, scoring model or prompt version changed since it
+    was scored), get a new JD score. If any candidate was re-scored the
+    comparative pass runs again over the whole pool, since it ranks
+    candidates against each other. Existing rows are updated in place (their
+    status is kept) and only columns whose value changed are written.
+
+    A candidate the LLM gives no valid score (the request failed or its
+    answer never parsed) counts as failed: it is ranked with the neutral
+    default score, its row is marked as a fallback and records none of the
+    inputs, so the next ranking scores it again instead of reusing the default.
+
+    JD scores are requested in groups of `batch_size` candidates and each
+    group is stored as soon as it is scored, with its comparative score
+    cleared until the comparative pass finishes; a ranking that is
+    interrupted keeps what it scored, and the next run only has to redo
+    the comparative pass. The cascade scores the whole group at once.
+
+    Args:
+        db: Database session; committed as scores are stored
+        job: The job to rank for
+        candidates: Candidates to rank; match rows of anyone else are removed
+        cascade_config: Score JD matches through the model cascade
+        batch_size: Candidates per JD scoring prompt (without the cascade)
+        concurrency: Most scoring requests in flight at once
+        incremental: False re-scores every candidate
+        llm_client: Async client (defaults to the shared router)
+        progress: Receives progress as candidates are scored
+
+    Returns:
+        The ranking response, with per-run "incremental" statistics
+        (including how many candidates were stale for each reason)
+
+    Raises:
+        LLMUnavailableError: The LLM backend is down; scores stored before
+            it went down are kept
+    """
+    llm_client = llm_client or get_async_llm_router()
+    progress = progress or RankingProgress()
+    job_info = _job_info(job)
+    model = scoring_model(cascade_config)
+    candidates = sorted(candidates, key=lambda c: c.email)
+    by_email = {c.email: c for c in candidates}
+    inputs = {c.email: match_inputs(c, job, model) for c in candidates}
+
+    existing = {
+        m.candidate_email: m
+        for m in db.query(models.CandidateJobMatch).filter(models.CandidateJobMatch.job_id == job.id).all()
+    }
+    removed = [email for email in existing if email not in by_email]
+    for email in removed:
+        db.delete(existing.pop(email))
+
+    stale: Dict[str, int] = {}
+    to_score = []
+    for candidate in candidates:
+        match = existing.get(candidate.email)
+        reasons = ["new"] if match is None else stale_reasons(match, inputs[candidate.email])
+        if not incremental:
+            reasons = reasons or ["full"]
+        for reason in reasons:
+            stale[reason] = stale.get(reason, 0) + 1
+        if reasons:
+            to_score.append(candidate)
+    # An interrupted ranking stored JD scores but never finished the comparative pass
+    compare_pending = any(m.comparative_score is None for m in existing.values())
+
+    stats = {
+        "mode": "incremental" if incremental else "full",
+        "scored": len(to_score),
+        "reused": len(candidates) - len(to_score),
+        "failed": 0,
+        "inserted": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "removed": len(removed),
+        "stale": stale,
+    }
+    progress.started(len(candidates), len(to_score))
+    rescoring = {c.email for c in to_score}
+    reused = [match_result(existing[c.email], c) for c in candidates if c.email not in rescoring]
+    if reused:
+        progress.reused(reused)
+
+    if not to_score and not compare_pending:
+        # Nothing the scores depend on changed: no LLM calls at all
+        stats["unchanged"] = len(existing)
+        if removed:
+            db.commit()
+        logger.info(f"Ranking for job {job.id} is up to date: {stats}")
+        return {
+            "job_id": job.id,
+            "job_title": job.title,
+            "total_candidates": len(existing),
+            "rankings": sorted_results(list(existing.values()), by_email),
+            "cascade": None,
+            "incremental": stats,
+        }
+
+    written = set()
+    # Candidates without a valid JD score this run
+    unscored = set()
+
+    def score_values(candidate: models.Candidate, jd_score: Optional[float], comp_score: float) -> Dict[str, Any]:
+        email = candidate.email
+        if jd_score is None:
+            unscored.add(email)
+        if email in unscored:
+            values = build_match_values(candidate, job, 0.5, comp_score)
+            values.update(dict.fromkeys(inputs[email]), jd_score_fallback=True)
+        else:
+            values = build_match_values(candidate, job, jd_score, comp_score)
+            values.update(inputs[email], jd_score_fallback=False)
+        return values
+
+    def store(candidate: models.Candidate, values: Dict[str, Any]) -> None:
+        email = candidate.email
+        match = existing.get(email)
+        if match is None:
+            match = models.CandidateJobMatch(candidate_email=email, job_id=job.id, status="active", **values)
+            db.add(match)
+            existing[email] = match
+            stats["inserted"] += 1
+        else:
+            changed = {column: value for column, value in values.items() if getattr(match, column) != value}
+            for column, value in changed.items():
+                setattr(match, column, value)
+            if email not in written:
+                stats["updated" if changed else "unchanged"] += 1
+        written.add(email)
+
+    def store_scores(scored: List[models.Candidate], scores: Dict[str, Optional[float]]) -> None:
+        for candidate in scored:
+            jd_score = scores.get(candidate.email)
+            logger.info(f"JD match score for {candidate.email}: {jd_score}")
+            values = score_values(candidate, jd_score, 0.5)
+            values["comparative_score"] = None
+            store(candidate, values)
+        db.commit()
+        progress.scored([match_result(existing[c.email], c) for c in scored])
+
+    # --- Step 1: JD match scores of the new and changed candidates, stored as they arrive ---
+    def failed(group: List[models.Candidate], error: Any) -> Dict[str, Optional[float]]:
+        stats["failed"] += len(group)
+        progress.failed([c.email for c in group], str(error))
+        return {c.email: None for c in group}
+
+    def record_fallbacks(group: List[models.Candidate], scores: Dict[str, Optional[float]]) -> None:
+        fallback = [c for c in group if scores.get(c.email) is None]
+        if fallback:
+            failed(fallback, "No valid score in the LLM's answer")
+
+    async def score_group(group: List[models.Candidate]) -> Dict[str, Optional[float]]:
+        try:
+            scores = await llm_client.score_candidates_with_jd(
+                [_candidate_info(c, c.email) for c in group], job_info, priority=BULK,
+                max_batch_size=batch_size, concurrency=1, default=None,
+            )
+        except LLMUnavailableError as e:
+            failed(group, e)
+            raise
+        except Exception as e:
+            logger.error(f"Error scoring {len(group)} candidates for job {job.id}: {e}", exc_info=True)
+            scores = failed(group, e)
+        else:
+            record_fallbacks(group, scores)
+        store_scores(group, scores)
+        return scores
+
+    async def score_jd():
+        if not to_score:
+            return {}, None
+        if cascade_config is not None:
+            scores, cascade_stats = await cascade_jd_scores(
+                [(c.email, _candidate_info(c, c.email)) for c in to_score], job_info, cascade_config,
+                concurrency=concurrency,
+            )
+            record_fallbacks(to_score, scores)
+            store_scores(to_score, scores)
+            return scores, cascade_stats
+        group_size = batch_size or settings.LLM_BATCH_MAX_CANDIDATES
+        groups = [to_score[i:i + group_size] for i in range(0, len(to_score), group_size)]
+        results = await gather_bounded(groups, score_group, llm_client.scoring_concurrency(concurrency), lambda group: {c.email: None for c in group})
+        return {email: score for scores in results for email, score in scores.items()}, None
+
+    # --- Step 2: comparative scores over the whole pool (numeric ids for the prompt) ---
+    compare_infos = [_candidate_info(c, i) for i, c in enumerate(candidates, start=1)]
+
+    # Both steps only read the candidates, so they share the backend's slots instead of waiting on each other
+    (new_scores, cascade_stats), comparative_raw = await asyncio.gather(
+        score_jd(),
+        llm_client.compare_candidates(compare_infos, job_info, priority=BULK),
+    )
+    comparative_scores = {
+        c.email: comparative_raw.get(i, 0.5) for i, c in enumerate(candidates, start=1)
+    }
+
+    # --- Step 3: final scores; write only what changed ---
+    for candidate in candidates:
+        email = candidate.email
+        if email in new_scores:
+            jd_score = new_scores[email]
+        else:
+            jd_score = existing[email].jd_match_score
+        store(candidate, score_values(candidate, jd_score, comparative_scores[email]))
+
+    db.commit()
+    logger.info(f"Ranked job {job.id}: {stats}")
+
+    return {
+        "job_id": job.id,
+        "job_title": job.title,
+        "total_candidates": len(candidates),
+        "rankings": sorted_results(list(existing.values()), by_email),
+        "cascade": cascade_stats,
+        "incremental": stats,
+    }
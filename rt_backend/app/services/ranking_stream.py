@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.llm_resilience import LLMUnavailableError
+from app.services.ranking_lock import JobRankingLock, JobRankingLocked
+from app.services.ranking_service import RankingProgress, rank_job
+
+logger = logging.getLogger(__name__)
+
+# Seconds without an event before a keep-alive comment, so proxies keep the stream open
+KEEPALIVE_INTERVAL = 15.0
+
+
+def sse(event: str, data: Any) -> str:
+    """One server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class _StreamProgress(RankingProgress):
+    """Queues a ranking's progress as (event, data) pairs."""
+
+    def __init__(self, queue: "asyncio.Queue[Optional[Tuple[str, Any]]]"):
+        self.queue = queue
+
+    def started(self, total: int, to_score: int) -> None:
+        self.queue.put_nowait(("started", {"total_candidates": total, "to_score": to_score}))
+
+    def reused(self, results: List[Dict[str, Any]]) -> None:
+        for result in results:
+            self.queue.put_nowait(("candidate", {**result, "reused": True}))
+
+    def scored(self, results: List[Dict[str, Any]]) -> None:
+        for result in results:
+            self.queue.put_nowait(("candidate", {**result, "reused": False}))
+
+    def failed(self, emails: List[str], error: str) -> None:
+        self.queue.put_nowait(("failed", {"candidate_emails": emails, "error": error}))
+
+
+async def ranking_events(
+    job_id: int,
+    session_factory: Callable[[], Session] = SessionLocal,
+    keepalive: float = KEEPALIVE_INTERVAL,
+    **options: Any,
+) -> AsyncIterator[str]:
+    """
+    Rank a job's candidates (see rank_job; `options` are passed to it) and
+    stream the progress as server-sent events:
+
+    - "started": how many candidates there are and how many need scoring
+    - "candidate": a candidate's ranking entry as soon as its JD score is
+      known, first for candidates whose stored score is reused, then as
+      each group is scored; the overall score is interim until "ranking"
+    - "failed": candidates whose scoring failed (they get the default score)
+    - "ranking": the final response of rank-by-job, with comparative scores
+      and the overall ordering
+    - "error": the ranking failed; status_code is 503 when the LLM is down
+      and 409 when the job is being ranked by another request or run
+
+    The ranking is cancelled if the client goes away; what was scored by
+    then stays stored.
+    """
+    db = session_factory()
+    queue: "asyncio.Queue[Optional[Tuple[str, Any]]]" = asyncio.Queue()
+    task = None
+    try:
+        job = db.get(models.Job, job_id)
+        candidates = db.query(models.Candidate).all()
+        if job is None or not candidates:
+            yield sse("error", {"status_code": 404, "detail": "Job not found" if job is None else "No candidates found"})
+            return
+        lock = JobRankingLock(job_id, session_factory)
+        try:
+            lock.acquire()
+        except JobRankingLocked as e:
+            yield sse("error", {"status_code": 409, "detail": str(e)})
+            return
+
+        async def run():
+            try:
+                async with lock.held():
+                    return await rank_job(db, job, candidates, progress=_StreamProgress(queue), **options)
+            finally:
+                queue.put_nowait(None)
+
+        def finished(_):
+            # Also runs if the task is cancelled before it starts
+            db.close()
+            lock.release()
+
+        # From here on the session belongs to the ranking task: it is closed when
+        # the ranking has finished, even if this stream stops waiting for it
+        task = asyncio.create_task(run())
+        task.add_done_callback(finished)
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            yield sse(*item)
+
+        try:
+            result = await task
+        except LLMUnavailableError as e:
+            db.rollback()
+            yield sse("error", {"status_code": 503, "detail": str(e)})
+            return
+        except Exception as e:
+            logger.error(f"Error streaming the ranking of job {job_id}: {e}", exc_info=True)
+            db.rollback()
+            yield sse("error", {"status_code": 500, "detail": str(e)})
+            return
+        yield sse("ranking", result)
+    finally:
+        if task is None:
+            db.close()
+        elif not task.done():
+            task.cancel()
+            # Unlike gather, wait() leaves the task alone if this wait is cancelled in turn
+            await asyncio.wait({task})
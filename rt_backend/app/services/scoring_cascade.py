@@ -0,0 +1,139 @@
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.llm_fanout import gather_bounded
+from app.services.llm_scheduler import BULK
+from app.services.ollama_service import AsyncOllamaClient, get_async_ollama_client
+
+logger = logging.getLogger(__name__)
+
+
+class CascadeConfig:
+    """
+    Thresholds for one cascade run; anything not given falls back to the
+    LLM_CASCADE_* settings.
+
+    Candidates the cheap model scores inside [band_low, band_high] are
+    ambiguous and get re-scored by the full model, as do the cheap model's
+    `top_k` best candidates, whose exact order matters most.
+    """
+
+    def __init__(
+        self,
+        cheap_model: str = None,
+        band_low: float = None,
+        band_high: float = None,
+        top_k: int = None,
+    ):
+        self.cheap_model = cheap_model or settings.LLM_CASCADE_MODEL
+        self.band_low = settings.LLM_CASCADE_BAND_LOW if band_low is None else band_low
+        self.band_high = settings.LLM_CASCADE_BAND_HIGH if band_high is None else band_high
+        self.top_k = settings.LLM_CASCADE_TOP_K if top_k is None else top_k
+        if not 0.0 <= self.band_low <= self.band_high <= 1.0:
+            raise ValueError("Cascade band must satisfy 0 <= band_low <= band_high <= 1")
+        if self.top_k < 0:
+            raise ValueError("Cascade top_k must not be negative")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cheap_model": self.cheap_model,
+            "band_low": self.band_low,
+            "band_high": self.band_high,
+            "top_k": self.top_k,
+        }
+
+
+def select_for_escalation(scores: Dict[str, float], config: CascadeConfig) -> Tuple[Set[str], Set[str]]:
+    """Return (ambiguous, top_k) keys whose cheap score should be re-checked."""
+    ambiguous = {key for key, score in scores.items() if config.band_low <= score <= config.band_high}
+    ranked = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return ambiguous, set(ranked[:config.top_k])
+
+
+async def cascade_jd_scores(
+    candidates: List[Tuple[str, Dict[str, Any]]],
+    job_info: Dict[str, Any],
+    config: CascadeConfig,
+    cheap_client: Optional[AsyncOllamaClient] = None,
+    full_client: Optional[AsyncOllamaClient] = None,
+    priority: str = BULK,
+    concurrency: Optional[int] = None,
+) -> Tuple[Dict[str, Optional[float]], Dict[str, Any]]:
+    """
+    Score candidates against a JD with the cheap model first and escalate
+    only the ambiguous and top-K ones to the full model.
+
+    Candidates the cheap model fails to score are escalated too. A candidate
+    neither model could score gets None, so the caller can tell it apart
+    from a real score.
+
+    Args:
+        candidates: (key, candidate_info) pairs; keys identify candidates in the result
+        job_info: Dictionary containing job details
+        config: Cascade thresholds
+        cheap_client: Client for the cheap model (defaults to the shared one)
+        full_client: Client for OLLAMA_MODEL (defaults to the shared one)
+        priority: Scheduler lane for every request
+        concurrency: Most requests in flight per stage (defaults to the client's scoring concurrency)
+
+    Returns:
+        (scores by key, None where there is no valid score; per-stage statistics)
+    """
+    cheap_client = cheap_client or get_async_ollama_client(config.cheap_model)
+    full_client = full_client or get_async_ollama_client()
+    infos = dict(candidates)
+
+    # --- Stage 1: cheap model scores everyone ---
+    stage1_started = time.monotonic()
+    results = await gather_bounded(
+        [info for _, info in candidates],
+        lambda info: cheap_client.compare_candidate_with_jd(info, job_info, priority=priority, default=None),
+        cheap_client.scoring_concurrency(concurrency),
+        lambda info: None,
+    )
+    cheap_scores = {key: score for (key, _), score in zip(candidates, results)}
+    unscored = {key for key, score in cheap_scores.items() if score is None}
+    stage1_seconds = time.monotonic() - stage1_started
+
+    # --- Stage 2: full model re-scores the uncertain, the contenders and the unscored ---
+    ambiguous, top = select_for_escalation(
+        {key: score for key, score in cheap_scores.items() if score is not None}, config,
+    )
+    escalate = [key for key, _ in candidates if key in ambiguous or key in top or key in unscored]
+    stage2_started = time.monotonic()
+    scores = dict(cheap_scores)
+    results = await gather_bounded(
+        escalate,
+        lambda key: full_client.compare_candidate_with_jd(infos[key], job_info, priority=priority, default=None),
+        full_client.scoring_concurrency(concurrency),
+        lambda key: None,
+    )
+    for key, score in zip(escalate, results):
+        # Keep the cheap score if the full model had no valid answer
+        if score is not None:
+            scores[key] = score
+        logger.info(f"Cascade escalated {key}: {cheap_scores[key]} -> {score}")
+    stage2_seconds = time.monotonic() - stage2_started
+
+    # Time saved: what the full model would have spent on the candidates it skipped
+    saved = None
+    if escalate:
+        per_candidate = stage2_seconds / len(escalate)
+        saved = round(per_candidate * (len(candidates) - len(escalate)) - stage1_seconds, 3)
+
+    stats = {
+        **config.to_dict(),
+        "full_model": full_client.model,
+        "stage1_scored": len(candidates),
+        "escalated": len(escalate),
+        "escalated_ambiguous": len(ambiguous),
+        "escalated_top_k": len(top),
+        "escalated_unscored": len(unscored),
+        "stage1_seconds": round(stage1_seconds, 3),
+        "stage2_seconds": round(stage2_seconds, 3),
+        "estimated_seconds_saved": saved,
+    }
+    logger.info(f"Cascade for job {job_info.get('id')}: {stats}")
+    return scores, stats
@@ -0,0 +1,174 @@
+"""
+Measure how much prompt evaluation the stable-prefix scoring layout saves.
+
+Scores the same candidates against one job twice through Ollama's native
+/api/chat endpoint, which reports prompt_eval_count/prompt_eval_duration:
+
+  interleaved    - one user message with the candidate ahead of the JD, so no
+                   two prompts share a prefix and the JD is re-evaluated each time
+  stable-prefix  - the layout OllamaClient uses: the job in a byte-identical
+                   system message, the candidate in the user message
+
+Usage:
+    python benchmark_prefix_cache.py --candidates 10
+    python benchmark_prefix_cache.py --job-id 3 --base-url http://gpu1:11434
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.services.ollama_service import OllamaClient, TASK_JD_SCORE
+
+SAMPLE_JD = """
+We are hiring a Senior Backend Engineer to design and run the services behind our
+hiring platform. You will own Python/FastAPI services end to end, model data in
+PostgreSQL, build asynchronous pipelines, and work with ML engineers to serve LLM
+features in production.
+
+Requirements:
+- 5+ years of backend development, at least 3 with Python
+- Strong SQL and data modelling skills; PostgreSQL preferred
+- Experience with FastAPI or Django, REST API design and async programming
+- Docker, Kubernetes and CI/CD; AWS or GCP
+- Experience operating LLM or ML inference services is a strong plus
+
+Responsibilities:
+- Design, build and operate APIs used by recruiters and hiring managers
+- Improve latency, reliability and cost of resume processing and ranking
+- Mentor engineers and review code; contribute to architecture decisions
+""" * 3
+
+SKILLS = ["Python", "FastAPI", "Django", "PostgreSQL", "Redis", "Kafka", "Docker", "Kubernetes",
+          "AWS", "GCP", "React", "Java", "Go", "Terraform", "PyTorch", "Airflow"]
+
+
+def synthetic_candidates(count):
+    candidates = []
+    for i in range(count):
+        skills = ", ".join(SKILLS[(i + k) % len(SKILLS)] for k in range(6))
+        candidates.append({
+            "name": f"Candidate {i + 1}",
+            "resume_text": (
+                f"Candidate {i + 1}\ncandidate{i + 1}@example.com\n\n"
+                f"Skills\n{skills}\n\n"
+                f"Experience\nBackend engineer, {2 + i % 8} years building services with {skills}.\n\n"
+                f"Education\nB.Tech Computer Science\n"
+            ),
+            "current_ctc": 1200000 + 50000 * i,
+            "expected_ctc": 1500000 + 50000 * i,
+        })
+    return candidates
+
+
+def db_candidates_and_job(job_id, limit):
+    from app.db.session import SessionLocal
+    from app.db import models
+
+    db = SessionLocal()
+    try:
+        job = db.query(models.Job).filter(models.Job.id == job_id).first()
+        if job is None:
+            sys.exit(f"Job {job_id} not found")
+        job_info = {
+            "id": job.id,
+            "title": job.title or "",
+            "jd_text": job.description or job.jd_text or "",
+            "min_budget": job.min_budget or 0,
+            "max_budget": job.max_budget or 0,
+        }
+        candidates = [
+            {
+                "name": c.name,
+                "resume_text": c.resume_text or "",
+                "current_ctc": c.current_ctc or 0,
+                "expected_ctc": c.expected_ctc or 0,
+            }
+            for c in db.query(models.Candidate).limit(limit).all()
+        ]
+        return candidates, job_info
+    finally:
+        db.close()
+
+
+def interleaved(messages):
+    """Same content, one user message, candidate first: no shared prefix."""
+    system, user = messages[0]["content"], messages[1]["content"]
+    return [{"role": "user", "content": user + "\n" + system}]
+
+
+def chat(session, base_url, model, messages, num_predict):
+    response = session.post(
+        f"{base_url}/api/chat",
+        json={
+            "model": model,
+            "messages": messages,
+            "stream": False,
+            "keep_alive": settings.OLLAMA_KEEP_ALIVE,
+            "options": {"num_ctx": settings.OLLAMA_NUM_CTX, "num_predict": num_predict, "temperature": 0},
+        },
+        timeout=settings.OLLAMA_WARMUP_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def run(label, prompts, session, base_url, model, num_predict):
+    eval_ms, eval_tokens = [], []
+    started = time.monotonic()
+    for messages in prompts:
+        body = chat(session, base_url, model, messages, num_predict)
+        eval_ms.append(body.get("prompt_eval_duration", 0) / 1e6)
+        eval_tokens.append(body.get("prompt_eval_count", 0))
+    wall = time.monotonic() - started
+    # The first stable-prefix request is cold by design; report warm requests separately
+    warm_ms = eval_ms[1:] or eval_ms
+    print(f"{label:>14}: prompt eval {statistics.mean(eval_ms):8.1f} ms/candidate "
+          f"(warm {statistics.mean(warm_ms):8.1f} ms), "
+          f"{statistics.mean(eval_tokens):7.1f} tokens evaluated/candidate, wall {wall:6.2f}s")
+    return statistics.mean(eval_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=settings.OLLAMA_BASE_URL)
+    parser.add_argument("--model", default=settings.OLLAMA_MODEL)
+    parser.add_argument("--candidates", type=int, default=10, help="number of candidates to score")
+    parser.add_argument("--job-id", type=int, help="use this job and candidates from the database")
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip("/")
+    client = OllamaClient(base_url=base_url, model=args.model)
+    if args.job_id is not None:
+        candidates, job_info = db_candidates_and_job(args.job_id, args.candidates)
+    else:
+        candidates = synthetic_candidates(args.candidates)
+        job_info = {"id": 0, "title": "Senior Backend Engineer", "jd_text": SAMPLE_JD,
+                    "min_budget": 1500000, "max_budget": 2500000}
+    if not candidates:
+        sys.exit("No candidates to score")
+
+    stable = [client._jd_score_prompt(c, job_info) for c in candidates]
+    assert len({p[0]["content"] for p in stable}) == 1, "system prefix is not byte-identical"
+    num_predict = client._max_tokens(TASK_JD_SCORE)
+
+    session = requests.Session()
+    print(f"Scoring {len(candidates)} candidates with {args.model} at {base_url}")
+    # Load the model first so neither layout pays for it
+    chat(session, base_url, args.model, [{"role": "user", "content": "ok"}], 1)
+
+    baseline = run("interleaved", [interleaved(p) for p in stable], session, base_url, args.model, num_predict)
+    prefixed = run("stable-prefix", stable, session, base_url, args.model, num_predict)
+    print(f"{'saved':>14}: {baseline - prefixed:8.1f} ms prompt eval per candidate "
+          f"({(1 - prefixed / baseline) * 100 if baseline else 0:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
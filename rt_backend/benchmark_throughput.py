@@ -0,0 +1,165 @@
+"""
+Benchmark ingest and ranking throughput against the mock Ollama server.
+
+Starts mock_ollama (in-process, or as a subprocess with --subprocess),
+points the backend at it with a throwaway SQLite database, then measures:
+
+  ingest   - candidate detail extraction for every resume, from --workers threads
+  ranking  - POST /api/rank-by-job/{id} through the full FastAPI app, batched
+             and with one JD scoring request per candidate
+
+Because the mock's latency is known, the gap between wall time and the
+simulated inference time is the backend's own overhead.
+
+Usage:
+    python benchmark_throughput.py --candidates 50
+    python benchmark_throughput.py --latency lognormal:-2,0.4 --concurrency 2 --subprocess
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import mock_ollama
+
+SKILLS = ["Python", "FastAPI", "Django", "PostgreSQL", "Redis", "Kafka", "Docker", "Kubernetes",
+          "AWS", "GCP", "React", "Java", "Go", "Terraform", "PyTorch", "Airflow"]
+
+JD = """
+Senior Backend Engineer. Build Python and FastAPI services on PostgreSQL, run them on
+Docker and Kubernetes in AWS, and operate Kafka and Redis based pipelines.
+5+ years of backend experience required.
+"""
+
+
+def resume(i):
+    skills = ", ".join(SKILLS[(i * 3 + k) % len(SKILLS)] for k in range(5))
+    return (
+        f"Candidate {i}\ncandidate{i}@example.com\n\n"
+        f"Skills\n{skills}\n\n"
+        f"Experience\n{2 + i % 9} years building backend services with {skills}.\n\n"
+        f"Education\nB.Tech Computer Science\n"
+    )
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=8, help="threads issuing ingest extractions")
+    parser.add_argument("--latency", default="uniform:0.02,0.08", help="mock time to first token")
+    parser.add_argument("--token-latency", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=4, help="mock (and OLLAMA_NUM_PARALLEL) concurrency")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--subprocess", action="store_true", help="run the mock in a separate process")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    mock, process = None, None
+    if args.subprocess:
+        process, url = mock_ollama.spawn(
+            "--latency", args.latency, "--token-latency", str(args.token_latency),
+            "--concurrency", str(args.concurrency), "--error-rate", str(args.error_rate),
+            "--malformed-rate", str(args.malformed_rate),
+        )
+    else:
+        mock = mock_ollama.MockOllama(
+            latency=args.latency, token_latency=args.token_latency, concurrency=args.concurrency,
+            error_rate=args.error_rate, malformed_rate=args.malformed_rate,
+        ).start()
+        url = mock.url
+
+    # Settings are read at import time, so configure the backend before importing it
+    workdir = tempfile.mkdtemp(prefix="rt-bench-")
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+        "OLLAMA_BASE_URL": url,
+        "OLLAMA_ENDPOINTS": "",
+        "OLLAMA_NUM_PARALLEL": str(args.concurrency),
+        "LLM_CACHE_ENABLED": "false",
+    })
+    from fastapi.testclient import TestClient
+    from app.db import models
+    from app.db.session import SessionLocal
+    from app.services.llm_scheduler import BULK
+    from app.services.ollama_service import get_ollama_client
+    from main import app
+
+    resumes = [resume(i) for i in range(args.candidates)]
+    print(f"Mock Ollama at {url}: latency {args.latency}, concurrency {args.concurrency}, {args.candidates} candidates")
+
+    try:
+        # --- Ingest: one details extraction per resume ---
+        client = get_ollama_client()
+        latencies = []
+
+        def extract(text):
+            started = time.monotonic()
+            details = client.extract_candidate_details(text, priority=BULK)
+            latencies.append(time.monotonic() - started)
+            return details
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            extracted = list(pool.map(extract, resumes))
+        wall = time.monotonic() - started
+        print(f"ingest : {len(resumes) / wall:7.1f} resumes/s, p50 {statistics.median(latencies) * 1000:6.1f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1000:6.1f} ms, {sum(1 for d in extracted if d.get('email'))} emails found")
+
+        # --- Ranking through the API ---
+        db = SessionLocal()
+        job = models.Job(title="Senior Backend Engineer", description=JD, jd_text=JD, min_budget=1500000, max_budget=2500000)
+        db.add(job)
+        for i, (text, details) in enumerate(zip(resumes, extracted)):
+            db.add(models.Candidate(
+                email=details.get("email") or f"candidate{i}@example.com",
+                name=details.get("full_name") or f"Candidate {i}",
+                resume_text=text,
+                current_ctc=1200000 + 10000 * i,
+                expected_ctc=1600000 + 10000 * i,
+            ))
+        db.commit()
+        job_id = job.id
+        db.close()
+
+        with TestClient(app) as api:
+            for label, params in (("batched", {}), ("single", {"batch_size": 1})):
+                before = mock.stats() if mock else None
+                started = time.monotonic()
+                response = api.post(f"/api/rank-by-job/{job_id}", params=params)
+                wall = time.monotonic() - started
+                response.raise_for_status()
+                line = f"ranking ({label:>7}): {args.candidates / wall:7.1f} candidates/s, {wall:6.2f}s wall"
+                if mock:
+                    after = mock.stats()
+                    requests_sent = after["requests"] - before["requests"]
+                    simulated = after["simulated_seconds"] - before["simulated_seconds"]
+                    line += f", {requests_sent} LLM requests, {simulated:6.2f}s simulated inference"
+                print(line)
+
+        if mock:
+            print("mock stats:", json.dumps(mock.stats()))
+    finally:
+        if mock:
+            mock.stop()
+        if process:
+            process.terminate()
+            process.wait(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,52 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from app.api.routes import candidates, jobs, auth
+from app.api.routes import candidates, jobs, auth, llm
 from app.core.config import settings
 from app.db.session import engine
 from app.db import models
+from app.db.migrations import add_missing_columns
+from app.services.llm_resilience import LLMUnavailableError
+from app.services.llm_router import close_llm_routers
+from app.services.ollama_endpoints import get_endpoint_pool
+from app.services.ollama_service import close_ollama_clients
+from app.services.ollama_warmup import get_model_warmer
+from app.services.ranking_runs import get_ranking_runs
 
-# Create database tables
+# Create database tables, and add columns introduced since an existing database was created
 models.Base.metadata.create_all(bind=engine)
+add_missing_columns(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Probe Ollama nodes in the background so failed ones are ejected/re-admitted
+    endpoint_pool = get_endpoint_pool()
+    endpoint_pool.start_health_checks()
+    # Load the model now and keep it resident so no request pays the load time
+    warmer = get_model_warmer() if settings.OLLAMA_WARMUP_ENABLED else None
+    if warmer is not None:
+        warmer.start()
+    # Background ranking runs of dead processes can no longer finish (those whose
+    # heartbeat has yet to expire are failed when their job or status is next requested)
+    ranking_runs = get_ranking_runs()
+    ranking_runs.recover()
+    yield
+    await ranking_runs.shutdown()
+    if warmer is not None:
+        warmer.stop()
+    endpoint_pool.stop_health_checks()
+    # Release pooled LLM connections on shutdown
+    await close_llm_routers()
+    await close_ollama_clients()
 
 app = FastAPI(
     title="Resume Matching System",
     description="API for matching candidates with job descriptions",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -24,10 +58,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable_handler(request: Request, exc: LLMUnavailableError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
 # Include API routes
 app.include_router(auth.router, prefix="/api", tags=["Authentication"])
 app.include_router(candidates.router, prefix="/api", tags=["Candidates"])
 app.include_router(jobs.router, prefix="/api", tags=["Jobs"])
+app.include_router(llm.router, prefix="/api", tags=["LLM"])
 
 @app.get("/")
 async def root():
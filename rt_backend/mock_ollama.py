@@ -0,0 +1,504 @@
+"""
+Stand-in for an Ollama server, for offline tests and throughput benchmarks.
+
+Speaks the OpenAI-compatible /v1/chat/completions API the backend uses
+(streamed and non-streamed), plus /api/version, /api/tags and /api/generate
+for health probes and model warm-up. Answers are deterministic: each
+structured prompt type (picked from the request's JSON schema name) has a
+rule-based responder that reads the prompt, and canned answers or regex
+rules can override them. Latency, failures and concurrency are configurable
+so the backend's own overhead can be measured without a GPU.
+
+In-process:
+    with MockOllama(latency="lognormal:-1.5,0.4", concurrency=4) as mock:
+        client = OllamaClient(base_url=mock.url)
+
+As a subprocess (or from a shell):
+    python mock_ollama.py --port 11435 --latency uniform:0.05,0.2 --error-rate 0.01
+"""
+import argparse
+import hashlib
+import json
+import logging
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+EMAIL_PATTERN = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+CANDIDATE_PATTERN = re.compile(r'CANDIDATE (\d+):')
+RESUME_PATTERN = re.compile(r'RESUME (\d+):')
+YEARS_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\+?\s*(?:years|yrs)', re.IGNORECASE)
+WORD_PATTERN = re.compile(r'[a-z][a-z0-9+#.]{2,}')
+KNOWN_SKILLS = ("python", "java", "javascript", "typescript", "go", "sql", "postgresql", "mysql", "fastapi", "django",
+                "flask", "react", "docker", "kubernetes", "aws", "gcp", "azure", "redis", "kafka", "terraform")
+DEGREES = ("ph.d", "phd", "m.tech", "mtech", "m.s", "msc", "mba", "b.tech", "btech", "b.e", "bsc", "b.s", "bachelor", "master")
+
+# Words too common in prompts to say anything about fit
+STOP_WORDS = {"the", "and", "for", "with", "you", "are", "our", "will", "this", "that", "have", "from", "your", "who",
+              "all", "job", "candidate", "candidates", "resume", "experience", "years", "work", "team", "skills"}
+
+Responder = Callable[[Dict[str, Any]], str]
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Streaming clients hang up as soon as the JSON answer is complete
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class LatencyModel:
+    """
+    Seconds to wait before a response starts, drawn from a distribution
+    given as "<kind>:<params>":
+
+      fixed:0.2             always 0.2s
+      uniform:0.1,0.5       uniform between 0.1s and 0.5s
+      normal:0.3,0.05       mean 0.3s, std-dev 0.05s (clamped at 0)
+      lognormal:-1.5,0.4    exp(N(mu, sigma)), the long-tailed shape real inference has
+      exponential:0.3       mean 0.3s
+    """
+
+    KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+
+    def __init__(self, spec: str = "fixed:0", seed: Optional[int] = None):
+        kind, _, args = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.params = [float(p) for p in args.split(",") if p.strip()]
+        if self.KINDS.get(self.kind) != len(self.params):
+            raise ValueError(f"Invalid latency spec {spec!r}; expected e.g. fixed:0.2, uniform:0.1,0.5 or lognormal:-1.5,0.4")
+        self.spec = spec
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == "fixed":
+                return self.params[0]
+            if self.kind == "uniform":
+                return self._random.uniform(*self.params)
+            if self.kind == "normal":
+                return max(0.0, self._random.gauss(*self.params))
+            if self.kind == "lognormal":
+                return self._random.lognormvariate(*self.params)
+            return self._random.expovariate(1.0 / self.params[0]) if self.params[0] > 0 else 0.0
+
+
+# ---- Rule-based responders, one per structured prompt type ----
+
+def _words(text: str) -> set:
+    return {w.strip(".") for w in WORD_PATTERN.findall(text.lower())} - STOP_WORDS
+
+
+def fit_score(jd: str, candidate: str) -> float:
+    """Share of the JD's vocabulary found in the candidate text, rounded to 0.001."""
+    jd_words = _words(jd)
+    if not jd_words:
+        # No JD to compare against: a stable pseudo-random score per candidate
+        return round(int(hashlib.sha256(candidate.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF, 3)
+    return round(len(jd_words & _words(candidate)) / len(jd_words), 3)
+
+
+def _split_blocks(text: str, pattern: re.Pattern) -> List[Tuple[int, str]]:
+    """Split text at numbered headers ("CANDIDATE 3:") into (number, block) pairs."""
+    matches = list(pattern.finditer(text))
+    return [
+        (int(m.group(1)), text[m.end():matches[i + 1].start() if i + 1 < len(matches) else len(text)])
+        for i, m in enumerate(matches)
+    ]
+
+
+def _jd_and_candidates(body: Dict[str, Any]) -> Tuple[str, str]:
+    """The job part and the candidate part of a scoring prompt."""
+    messages = body.get("messages", [])
+    system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+    user = "\n".join(m["content"] for m in messages if m["role"] != "system")
+    if system:
+        return system, user
+    # Single-message prompts: the JD comes before the first candidate
+    first = re.search(r'CANDIDATE|RESUME \d+:', user)
+    return (user[:first.start()], user[first.start():]) if first else ("", user)
+
+
+def respond_email(body: Dict[str, Any]) -> str:
+    match = EMAIL_PATTERN.search(_jd_and_candidates(body)[1])
+    return json.dumps({"email": match.group(0) if match else None})
+
+
+def respond_details(body: Dict[str, Any]) -> str:
+    resume = _jd_and_candidates(body)[1]
+    resume = resume.split("Resume text:", 1)[-1]
+    lines = [line.strip() for line in resume.splitlines() if line.strip()]
+    lowered = resume.lower()
+    email = EMAIL_PATTERN.search(resume)
+    years = YEARS_PATTERN.search(resume)
+    education = next((line for line in lines if any(d in line.lower() for d in DEGREES)), None)
+    return json.dumps({
+        "full_name": lines[0] if lines and not EMAIL_PATTERN.search(lines[0]) else None,
+        "email": email.group(0) if email else None,
+        "phone": None,
+        "skills": [s for s in KNOWN_SKILLS if re.search(rf'(?<![\w]){re.escape(s)}(?![\w])', lowered)],
+        "years_of_experience": float(years.group(1)) if years else None,
+        "education": education,
+    })
+
+
+def respond_jd_score(body: Dict[str, Any]) -> str:
+    jd, candidate = _jd_and_candidates(body)
+    return json.dumps({"score": fit_score(jd, candidate)})
+
+
+def respond_candidate_scores(body: Dict[str, Any]) -> str:
+    jd, candidates = _jd_and_candidates(body)
+    blocks = _split_blocks(candidates, CANDIDATE_PATTERN)
+    return json.dumps({"scores": [{"id": number, "score": fit_score(jd, block)} for number, block in blocks]})
+
+
+def respond_ranking(body: Dict[str, Any]) -> str:
+    jd, resumes = _jd_and_candidates(body)
+    rankings = []
+    for number, block in _split_blocks(resumes, RESUME_PATTERN):
+        score = fit_score(jd, block)
+        rankings.append({
+            "resume_id": number,
+            "overall_score": score,
+            "skills_match": score,
+            "experience_match": score,
+            "strengths": sorted(_words(jd) & _words(block))[:3],
+            "weaknesses": sorted(_words(jd) - _words(block))[:3],
+            "recommendation": "Shortlist" if score >= 0.5 else "Hold",
+        })
+    best = max(rankings, key=lambda r: r["overall_score"])["resume_id"] if rankings else 1
+    return json.dumps({"rankings": rankings, "comparative_analysis": {"best_match": best, "reasoning": "Highest JD overlap"}})
+
+
+# Keyed by the JSON schema name the backend sends in response_format
+DEFAULT_RESPONDERS: Dict[str, Responder] = {
+    "EmailExtraction": respond_email,
+    "CandidateDetails": respond_details,
+    "JDScore": respond_jd_score,
+    "BatchJDScores": respond_candidate_scores,
+    "ComparativeScores": respond_candidate_scores,
+    "RankingAnalysis": respond_ranking,
+}
+
+
+class MockOllama:
+    """
+    An in-process mock Ollama server on a background thread.
+
+    Args:
+        host, port: Where to listen (port 0 picks a free port)
+        latency: LatencyModel spec for time to first token
+        token_latency: Seconds between streamed chunks (also added per chunk
+            to non-streamed answers)
+        concurrency: Requests processed at once, like OLLAMA_NUM_PARALLEL;
+            the rest wait for a slot
+        max_queue: Waiting requests beyond this get HTTP 503, like OLLAMA_MAX_QUEUE
+        error_rate: Share of requests answered with HTTP 500
+        malformed_rate: Share of answers replaced by text that is not JSON
+        hang_rate: Share of requests that stall for `hang_seconds` first
+            (exercises client read timeouts)
+        responses: Canned answers or responders by schema name ("default"
+            for prompts without a schema), overriding the rule-based ones
+        rules: (regex, answer) pairs checked against the prompt first
+        seed: Seed for latency sampling and error injection
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: str = "fixed:0",
+        token_latency: float = 0.0,
+        concurrency: int = 4,
+        max_queue: int = 512,
+        error_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        hang_seconds: float = 60.0,
+        responses: Optional[Dict[str, Union[str, Responder]]] = None,
+        rules: Optional[List[Tuple[str, str]]] = None,
+        seed: Optional[int] = 0,
+    ):
+        self.latency = LatencyModel(latency, seed)
+        self.token_latency = token_latency
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.responders: Dict[str, Union[str, Responder]] = {**DEFAULT_RESPONDERS, **(responses or {})}
+        self.rules = [(re.compile(pattern, re.IGNORECASE | re.DOTALL), answer) for pattern, answer in (rules or [])]
+
+        self._random = random.Random(seed)
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0, "in_flight": 0, "max_in_flight": 0, "waiting": 0, "rejected": 0,
+            "injected_errors": 0, "malformed": 0, "hung": 0, "aborted_streams": 0,
+            "simulated_seconds": 0.0, "by_schema": {},
+        }
+        self._server = _Server((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def __enter__(self) -> "MockOllama":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "by_schema": dict(self._stats["by_schema"])}
+
+    # ---- Answer generation ----
+
+    def answer(self, body: Dict[str, Any]) -> str:
+        """The assistant content for a chat request: rules, then canned/rule-based by schema."""
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+        for pattern, answer in self.rules:
+            if pattern.search(prompt):
+                return answer
+        responder = self.responders.get(self._schema_name(body), self.responders.get("default", "OK"))
+        return responder(body) if callable(responder) else responder
+
+    @staticmethod
+    def _schema_name(body: Dict[str, Any]) -> str:
+        return ((body.get("response_format") or {}).get("json_schema") or {}).get("name", "default")
+
+    def _roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def _count(self, key: str, amount: Union[int, float] = 1) -> None:
+        with self._lock:
+            self._stats[key] += amount
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                logger.debug("mock ollama: " + format % args)
+
+            def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _read_json(self) -> Dict[str, Any]:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    self._send_json(200, {"version": "0.0.0-mock"})
+                elif self.path == "/api/tags":
+                    self._send_json(200, {"models": []})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                try:
+                    body = self._read_json()
+                except ValueError:
+                    self._send_json(400, {"error": "invalid JSON body"})
+                    return
+                if self.path == "/api/generate":
+                    # Model load / keep-alive ping
+                    self._send_json(200, {"model": body.get("model"), "response": "", "done": True})
+                elif self.path == "/v1/chat/completions":
+                    mock._chat(self, body)
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+        return Handler
+
+    def _chat(self, handler: BaseHTTPRequestHandler, body: Dict[str, Any]) -> None:
+        with self._lock:
+            self._stats["requests"] += 1
+            schema = self._schema_name(body)
+            self._stats["by_schema"][schema] = self._stats["by_schema"].get(schema, 0) + 1
+            if self._stats["waiting"] >= self.max_queue:
+                self._stats["rejected"] += 1
+                rejected = True
+            else:
+                self._stats["waiting"] += 1
+                rejected = False
+        if rejected:
+            handler._send_json(503, {"error": "server busy, please try again. maximum pending requests exceeded"})
+            return
+
+        self._slots.acquire()
+        with self._lock:
+            self._stats["waiting"] -= 1
+            self._stats["in_flight"] += 1
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._stats["in_flight"])
+        try:
+            if self._roll(self.hang_rate):
+                self._count("hung")
+                time.sleep(self.hang_seconds)
+            delay = self.latency.sample()
+            self._count("simulated_seconds", delay)
+            time.sleep(delay)
+            if self._roll(self.error_rate):
+                self._count("injected_errors")
+                handler._send_json(500, {"error": "injected failure"})
+                return
+
+            content = self.answer(body)
+            if self._roll(self.malformed_rate):
+                self._count("malformed")
+                content = "I'm sorry, I can't produce that as JSON."
+            max_tokens = body.get("max_tokens")
+            chunks = [content[i:i + 4] for i in range(0, len(content), 4)]
+            if max_tokens:
+                chunks = chunks[:max_tokens]
+            usage = {
+                "prompt_tokens": sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4,
+                "completion_tokens": len(chunks),
+            }
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            self._count("simulated_seconds", self.token_latency * len(chunks))
+            finish_reason = "length" if max_tokens and len(chunks) < -(-len(content) // 4) else "stop"
+
+            if body.get("stream"):
+                self._stream(handler, body, chunks, usage, finish_reason)
+            else:
+                time.sleep(self.token_latency * len(chunks))
+                handler._send_json(200, {
+                    "id": f"chatcmpl-mock-{self._stats['requests']}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(chunks)},
+                        "finish_reason": finish_reason,
+                    }],
+                    "usage": usage,
+                })
+        except (BrokenPipeError, ConnectionResetError):
+            self._count("aborted_streams")
+        finally:
+            with self._lock:
+                self._stats["in_flight"] -= 1
+            self._slots.release()
+
+    def _stream(self, handler, body: Dict[str, Any], chunks: List[str], usage: Dict[str, int], finish_reason: str) -> None:
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def event(payload: Union[str, Dict[str, Any]]) -> None:
+            data = f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n".encode("utf-8")
+            handler.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            handler.wfile.flush()
+
+        base = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "model": body.get("model")}
+        for chunk in chunks:
+            event({**base, "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]})
+            time.sleep(self.token_latency)
+        event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            event({**base, "choices": [], "usage": usage})
+        event("[DONE]")
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
+
+
+def spawn(*args: str) -> Tuple[subprocess.Popen, str]:
+    """
+    Run the mock in a subprocess (command-line flags as `args`, port
+    defaults to a free one) and return (process, url) once it is listening.
+    """
+    command = [sys.executable, __file__, *args]
+    if "--port" not in args:
+        command += ["--port", "0"]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("Mock Ollama listening on "):
+        process.kill()
+        raise RuntimeError(f"Mock Ollama failed to start: {line!r}")
+    return process, line.rsplit(" ", 1)[-1].strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", default="fixed:0", help="time to first token, e.g. lognormal:-1.5,0.4")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds per streamed chunk")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests processed at once")
+    parser.add_argument("--max-queue", type=int, default=512, help="waiting requests before HTTP 503")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mock = MockOllama(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        token_latency=args.token_latency,
+        concurrency=args.concurrency,
+        max_queue=args.max_queue,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        seed=args.seed,
+    )
+    print(f"Mock Ollama listening on {mock.url}", flush=True)
+    try:
+        mock.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(mock.stats()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
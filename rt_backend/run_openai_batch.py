@@ -0,0 +1,63 @@
+"""
+Bulk offline re-scoring through the OpenAI Batch API.
+
+Writes one JD scoring request per candidate and job (and optionally one
+details extraction per candidate) as JSONL, submits it, and ingests the
+results into candidate_job_match once the batch finishes. With
+OPENAI_BATCH_BACKEND=local the file runs against Ollama instead.
+
+Usage:
+    python run_openai_batch.py run --job-id 3 --job-id 4 --extract
+    python run_openai_batch.py submit
+    python run_openai_batch.py status batch_abc123
+    python run_openai_batch.py ingest batch_abc123
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import SessionLocal
+from app.services.openai_batch import (
+    build_batch_requests, get_batch_backend, ingest_batch_results, run_batch, wait_for_batch, write_batch_file,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("run", "submit"):
+        command = commands.add_parser(name)
+        command.add_argument("--job-id", type=int, action="append", help="job to re-score (default: all active jobs)")
+        command.add_argument("--extract", action="store_true", help="also re-extract candidate details")
+    commands.choices["run"].add_argument("--timeout", type=float, help="seconds to wait for the batch")
+    for name in ("status", "ingest"):
+        commands.add_parser(name).add_argument("batch_id")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    db = SessionLocal()
+    try:
+        backend = get_batch_backend()
+        if args.command == "run":
+            result = run_batch(db, args.job_id, args.extract, backend, timeout=args.timeout)
+        elif args.command == "submit":
+            path = write_batch_file(build_batch_requests(db, args.job_id, args.extract))
+            result = {"id": backend.submit(path, metadata={"source": "resume-tracker"}), "file": path}
+        elif args.command == "status":
+            result = backend.status(args.batch_id)
+        else:
+            status = wait_for_batch(args.batch_id, backend)
+            result = {**status, "ingested": ingest_batch_results(db, args.batch_id, backend)}
+        print(json.dumps(result, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import models
+from app.db.session import Base
+from app.services.llm_metrics import LLMMetrics
+from app.services.llm_resilience import CircuitBreaker, RetryPolicy
+from app.services.ollama_service import AsyncOllamaClient, OllamaClient, ParseStats
+
+JOB = {"id": 1, "title": "Backend Engineer", "jd_text": "Python FastAPI", "min_budget": 10, "max_budget": 20}
+CANDIDATE = {"resume_text": "Skills\nPython, FastAPI"}
+
+
+def client_kwargs(url=None, **overrides):
+    """Client arguments that keep a test off the process-wide cache, stats and breaker, without retries."""
+    kwargs = dict(cache=None, parse_stats=ParseStats(), metrics=LLMMetrics(),
+                  circuit_breaker=CircuitBreaker(failure_threshold=1000), retry_policy=RetryPolicy(attempts=0))
+    if url is not None:
+        kwargs["base_url"] = url
+    kwargs.update(overrides)
+    return kwargs
+
+
+def make_client(url, **overrides) -> OllamaClient:
+    return OllamaClient(**client_kwargs(url, **overrides))
+
+
+def run_with_async_client(url, scenario, **overrides):
+    """Run `scenario(client)` on a new event loop with an AsyncOllamaClient for `url`, closed afterwards."""
+    async def run():
+        client = AsyncOllamaClient(**client_kwargs(url, **overrides))
+        try:
+            return await scenario(client)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def session_factory():
+    """Sessions on an empty in-memory database, one connection shared by every thread."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def job_pool(session_factory):
+    """Job 1 and four alike Python candidates, c0@example.com to c3@example.com."""
+    db = session_factory()
+    db.add(models.Job(id=1, title="Backend Engineer", jd_text="Python FastAPI Docker", max_budget=100))
+    for i in range(4):
+        db.add(models.Candidate(email=f"c{i}@example.com", name=f"C{i}", resume_text="Skills\nPython", expected_ctc=90))
+    db.commit()
+    db.close()
@@ -0,0 +1,55 @@
+import json
+
+from app.services.ollama_service import TASK_BATCH_JD_SCORE, TASK_JD_SCORE, OllamaClient, ParseStats
+from app.services.prompt_builder import PromptBuilder, TokenCounter
+
+JOB = {"id": 1, "title": "Backend Engineer", "jd_text": "Python, FastAPI and SQL. " * 20, "min_budget": 10, "max_budget": 20}
+
+
+def completion(content):
+    return {"choices": [{"message": {"content": content}}]}
+
+
+def make_client(num_ctx=4096, batch_reply=None):
+    builder = PromptBuilder(TokenCounter(model="llama3.2", tokenizer="heuristic"), num_ctx=num_ctx)
+    client = OllamaClient(base_url="http://127.0.0.1:1", parse_stats=ParseStats(), prompt_builder=builder)
+    client.calls = []
+
+    def fake_call(prompt, priority, task, schema=None, max_tokens=None):
+        client.calls.append((task, prompt))
+        if task == TASK_JD_SCORE:
+            return completion('{"score": 0.1}')
+        count = prompt[1]["content"].count("CANDIDATE ")
+        return completion(batch_reply(count))
+
+    client._call_ollama = fake_call
+    return client
+
+
+def candidates(count, resume="Skills\nPython, FastAPI\n"):
+    return [{"id": f"c{i}@example.com", "name": f"C{i}", "resume_text": resume} for i in range(count)]
+
+
+def test_batches_pack_by_tokens_and_ceiling():
+    reply = lambda n: json.dumps({"scores": [{"id": i, "score": 0.9} for i in range(1, n + 1)]})
+    client = make_client(batch_reply=reply)
+    scores = client.score_candidates_with_jd(candidates(7), JOB, max_batch_size=3)
+    # 3 + 3 in batches; the last one alone goes through single scoring
+    assert list(scores.values()) == [0.9] * 6 + [0.1]
+    assert [task for task, _ in client.calls] == [TASK_BATCH_JD_SCORE, TASK_BATCH_JD_SCORE, TASK_JD_SCORE]
+
+    # A small context fits fewer long resumes per prompt
+    small = make_client(num_ctx=1200, batch_reply=reply)
+    batches = small._plan_jd_batches(candidates(6, resume="Experience\n" + "Built APIs. " * 60), JOB, 8)
+    assert len(batches) > 1 and sorted(i for b in batches for i in b) == list(range(6))
+
+
+def test_missing_or_invalid_scores_fall_back_to_single_calls():
+    client = make_client(batch_reply=lambda n: '{"scores": [{"id": 2, "score": 0.8}]}')
+    scores = client.score_candidates_with_jd(candidates(3), JOB)
+    assert scores == {"c0@example.com": 0.1, "c1@example.com": 0.8, "c2@example.com": 0.1}
+
+    client = make_client(batch_reply=lambda n: "not json")
+    scores = client.score_candidates_with_jd(candidates(3), JOB)
+    assert list(scores.values()) == [0.1, 0.1, 0.1]
+    assert [task for task, _ in client.calls].count(TASK_JD_SCORE) == 3
@@ -0,0 +1,130 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+
+from app.db import models
+from app.db.migrations import add_missing_columns
+from app.services.ranking_service import rank_job, stale_matches
+from conftest import run_with_async_client
+from mock_ollama import MockOllama
+
+
+@pytest.fixture
+def db(db):
+    db.add(models.Job(id=1, title="Backend Engineer", jd_text="Python FastAPI Docker", max_budget=100))
+    db.add(models.Candidate(email="ada@example.com", name="Ada", resume_text="Skills\nPython FastAPI", expected_ctc=100))
+    db.add(models.Candidate(email="bob@example.com", name="Bob", resume_text="Skills\nCOBOL", expected_ctc=150))
+    db.add(models.Candidate(email="cy@example.com", name="Cy", resume_text="Skills\nDocker", expected_ctc=90))
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def mock():
+    with MockOllama() as server:
+        yield server
+
+
+def rank(db, mock, **kwargs):
+    async def run(client):
+        job = db.get(models.Job, 1)
+        return await rank_job(db, job, db.query(models.Candidate).all(), batch_size=1, llm_client=client, **kwargs)
+
+    return run_with_async_client(mock.url, run)
+
+
+def jd_requests(mock):
+    return mock.stats()["by_schema"].get("JDScore", 0)
+
+
+def test_rerank_without_changes_makes_no_llm_calls(db, mock):
+    first = rank(db, mock)
+    assert first["incremental"]["scored"] == 3 and first["incremental"]["inserted"] == 3
+    assert jd_requests(mock) == 3
+
+    db.get(models.CandidateJobMatch, ("bob@example.com", 1)).status = "saved"
+    db.commit()
+    requests = mock.stats()["requests"]
+
+    second = rank(db, mock)
+    assert mock.stats()["requests"] == requests
+    assert second["incremental"] == {
+        "mode": "incremental", "scored": 0, "reused": 3, "failed": 0, "inserted": 0, "updated": 0, "unchanged": 3,
+        "removed": 0, "stale": {},
+    }
+    assert [r["candidate_email"] for r in second["rankings"]] == [r["candidate_email"] for r in first["rankings"]]
+    assert {r["candidate_email"]: r["status"] for r in second["rankings"]}["bob@example.com"] == "saved"
+
+
+def test_only_new_and_changed_candidates_are_scored(db, mock):
+    rank(db, mock)
+    ada_before = db.get(models.CandidateJobMatch, ("ada@example.com", 1)).jd_match_score
+
+    db.get(models.Candidate, "bob@example.com").expected_ctc = 100
+    db.add(models.Candidate(email="dee@example.com", name="Dee", resume_text="Skills\nPython", expected_ctc=80))
+    db.query(models.Candidate).filter_by(email="cy@example.com").delete()
+    db.commit()
+
+    result = rank(db, mock)
+    stats = result["incremental"]
+    assert (stats["scored"], stats["reused"], stats["inserted"], stats["removed"]) == (2, 1, 1, 1)
+    assert stats["stale"] == {"new": 1, "candidate": 1}
+    assert jd_requests(mock) == 5
+    assert mock.stats()["by_schema"]["ComparativeScores"] == 2
+    assert sorted(r["candidate_email"] for r in result["rankings"]) == ["ada@example.com", "bob@example.com", "dee@example.com"]
+    assert db.get(models.CandidateJobMatch, ("ada@example.com", 1)).jd_match_score == ada_before
+    assert db.get(models.CandidateJobMatch, ("cy@example.com", 1)) is None
+
+
+def test_job_changes_and_full_mode_rescore_everyone(db, mock):
+    rank(db, mock)
+    db.get(models.Job, 1).max_budget = 120
+    db.commit()
+    assert rank(db, mock)["incremental"]["stale"] == {"budget": 3}
+
+    result = rank(db, mock, incremental=False)
+    assert result["incremental"]["mode"] == "full" and result["incremental"]["scored"] == 3
+    assert jd_requests(mock) == 9
+
+
+def test_missing_columns_are_added_to_an_existing_table():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE candidate_job_match (candidate_email VARCHAR, job_id INTEGER, status VARCHAR)"))
+    add_missing_columns(engine)
+    columns = {column["name"] for column in inspect(engine).get_columns("candidate_job_match")}
+    assert {"candidate_fingerprint", "resume_hash", "jd_hash", "model_name", "overall_score"} <= columns
+    indexes = {index["name"] for index in inspect(engine).get_indexes("candidate_job_match")}
+    assert {"ix_candidate_job_match_jd_hash", "ix_candidate_job_match_prompt_version"} <= indexes
+
+
+def test_stale_matches_reports_rows_whose_inputs_changed(db, mock, monkeypatch):
+    rank(db, mock)
+    job = db.get(models.Job, 1)
+    assert stale_matches(db, job) == []
+
+    db.get(models.Candidate, "ada@example.com").resume_text = "Skills\nRust"
+    db.commit()
+    assert [m.candidate_email for m in stale_matches(db, job)] == ["ada@example.com"]
+    assert len(stale_matches(db, job, model="another-model")) == 3
+
+    monkeypatch.setattr("app.services.ranking_service.PROMPT_TEMPLATE_VERSION", "next")
+    assert len(stale_matches(db, job)) == 3
+
+
+def test_unparseable_scores_are_failed_and_rescored_next_time(db):
+    with MockOllama(malformed_rate=1.0) as broken:
+        first = rank(db, broken)
+    assert first["incremental"]["failed"] == 3
+    for match in db.query(models.CandidateJobMatch).all():
+        assert match.jd_match_score == 0.5 and match.jd_score_fallback
+        assert match.resume_hash is None and match.model_name is None
+    assert len(stale_matches(db, db.get(models.Job, 1))) == 3
+
+    with MockOllama() as healthy:
+        second = rank(db, healthy)
+        assert jd_requests(healthy) == 3
+    assert second["incremental"]["scored"] == 3 and second["incremental"]["failed"] == 0
+    assert second["incremental"]["stale"] == {"fallback": 3}
+    assert not any(m.jd_score_fallback for m in db.query(models.CandidateJobMatch).all())
+    assert stale_matches(db, db.get(models.Job, 1)) == []
@@ -0,0 +1,51 @@
+import time
+
+from app.services.llm_cache import LLMCache, make_cache_key
+
+
+def _payload(prompt):
+    return {"model": "llama3.2", "messages": [{"role": "user", "content": prompt}]}
+
+
+def test_key_ignores_whitespace_but_not_model_or_version():
+    key = make_cache_key("llama3.2", "1", _payload("Score   this\n resume"))
+    assert key == make_cache_key("llama3.2", "1", _payload("  Score this resume  "))
+    assert key != make_cache_key("llama3.2", "2", _payload("Score this resume"))
+    assert key != make_cache_key("mistral", "1", _payload("Score this resume"))
+
+
+def test_memory_then_disk_hit(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = LLMCache(path=path, ttl_seconds=60, memory_max_bytes=1024)
+    cache.set("k", {"choices": [{"message": {"content": "0.8"}}]})
+    assert cache.get("k")["choices"][0]["message"]["content"] == "0.8"
+    assert cache.stats()["memory_hits"] == 1
+
+    # A fresh instance (e.g. another worker) only has the disk tier
+    other = LLMCache(path=path, ttl_seconds=60, memory_max_bytes=1024)
+    assert other.get("k") is not None
+    assert other.stats()["disk_hits"] == 1
+    assert other.get("missing") is None
+    assert other.stats()["misses"] == 1
+
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.db"), ttl_seconds=60, memory_max_bytes=60)
+    cache.set("a", {"v": "x" * 20})
+    cache.set("b", {"v": "y" * 20})
+    cache.get("a")
+    cache.set("c", {"v": "z" * 20})
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["memory_bytes"] <= 60
+    # "b" was least recently used, so it is served from disk now
+    cache.get("b")
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_ttl_expiry(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.db"), ttl_seconds=0, memory_max_bytes=1024)
+    cache.set("k", {"v": 1})
+    time.sleep(0.01)
+    assert cache.get("k") is None
+    assert cache.purge_expired() == 1
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.llm_fanout import gather_bounded, map_bounded
+from app.services.llm_resilience import LLMUnavailableError
+from app.services.llm_scheduler import LLMScheduler
+from conftest import JOB, make_client, run_with_async_client
+from mock_ollama import MockOllama
+
+
+def flaky(item):
+    if item == 3:
+        raise RuntimeError("boom")
+    time.sleep(0.05)
+    return item * 10
+
+
+def test_map_bounded_keeps_order_and_defaults_failures():
+    started = time.monotonic()
+    assert map_bounded(list(range(6)), flaky, 6, lambda item: -1) == [0, 10, 20, -1, 40, 50]
+    assert time.monotonic() - started < 0.2
+
+
+def test_unavailable_backend_is_raised_after_the_rest_finish():
+    done = []
+
+    def call(item):
+        if item == 0:
+            raise LLMUnavailableError("circuit open")
+        done.append(item)
+        return item
+
+    with pytest.raises(LLMUnavailableError):
+        map_bounded([0, 1, 2], call, 2, lambda item: None)
+    assert sorted(done) == [1, 2]
+
+
+def test_gather_bounded_limits_concurrency():
+    in_flight, peak = 0, 0
+
+    async def call(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if item == "b":
+            raise ValueError("bad answer")
+        return item.upper()
+
+    assert asyncio.run(gather_bounded(["a", "b", "c", "d", "e"], call, 2, lambda item: "?")) == ["A", "?", "C", "D", "E"]
+    assert peak == 2
+
+
+def candidates(count):
+    return [{"id": f"c{i}", "name": f"C{i}", "resume_text": "Skills\nPython" if i % 2 else "Skills\nCOBOL"} for i in range(count)]
+
+
+def test_jd_scoring_uses_the_backends_parallel_slots():
+    with MockOllama(latency="fixed:0.2", concurrency=4) as mock:
+        client = make_client(mock.url, scheduler=LLMScheduler(max_concurrency=4))
+        started = time.monotonic()
+        scores = client.score_candidates_with_jd(candidates(8), JOB, max_batch_size=1)
+        elapsed = time.monotonic() - started
+        assert list(scores) == [f"c{i}" for i in range(8)]
+        assert scores["c1"] > scores["c0"]
+        # 8 requests on 4 slots: two rounds, not eight
+        assert elapsed < 0.8
+        assert mock.stats()["max_in_flight"] == 4
+
+
+def test_async_jd_scoring_survives_failed_requests():
+    async def run(client):
+        return await client.score_candidates_with_jd(candidates(6), JOB, max_batch_size=1, concurrency=3)
+
+    with MockOllama(error_rate=0.5, seed=3) as mock:
+        scores = run_with_async_client(mock.url, run, scheduler=LLMScheduler(max_concurrency=4))
+        assert list(scores) == [f"c{i}" for i in range(6)]
+        assert 0 < mock.stats()["injected_errors"] < 6
+        assert 0.5 in scores.values()
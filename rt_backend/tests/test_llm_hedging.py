@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+from app.core.config import settings
+from app.services.llm_resilience import AdaptiveTimeouts, HedgeBudget, RetryPolicy
+from app.services.llm_scheduler import LLMScheduler
+from app.services.ollama_endpoints import EndpointPool
+from app.services.ollama_service import TASK_JD_SCORE, AsyncOllamaClient, OllamaClient
+from conftest import CANDIDATE, JOB, client_kwargs, make_client
+from mock_ollama import MockOllama
+
+
+def warm_timeouts(seconds=0.05):
+    # One recorded sample puts the hedge delay at ~50ms
+    timeouts = AdaptiveTimeouts({TASK_JD_SCORE: 5.0}, min_samples=1)
+    timeouts.record(TASK_JD_SCORE, seconds)
+    return timeouts
+
+
+def test_transient_failures_are_retried_with_backoff():
+    with MockOllama(error_rate=1.0) as mock:
+        client = make_client(mock.url, retry_policy=RetryPolicy(attempts=2, base_delay=0.01))
+        assert client.compare_candidate_with_jd(CANDIDATE, JOB) == 0.5
+        assert mock.stats()["injected_errors"] == 3
+        assert client.metrics.stats()["compare_candidate_with_jd"]["retries"] == 2
+
+
+def test_slow_request_is_hedged_to_another_endpoint(monkeypatch):
+    # Least-loaded routing with a heavier slow node sends the primary there
+    monkeypatch.setattr(settings, "LLM_PREFIX_AFFINITY", False)
+    with MockOllama(latency="fixed:1.0") as slow, MockOllama(latency="fixed:0") as fast:
+        client = OllamaClient(**client_kwargs(
+            endpoints=EndpointPool([(slow.url, 10), (fast.url, 1)]),
+            timeouts=warm_timeouts(),
+            hedge_budget=HedgeBudget(ratio=0.05, burst=1),
+        ))
+        client.hedge = True
+        started = time.monotonic()
+        client.compare_candidate_with_jd(CANDIDATE, JOB)
+        assert time.monotonic() - started < 0.5
+        stats = client.metrics.stats()["compare_candidate_with_jd"]
+        assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+        assert fast.stats()["requests"] == 1
+
+
+
+def test_hedge_takes_a_slot_of_its_own(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PREFIX_AFFINITY", False)
+    with MockOllama(latency="fixed:0.3") as slow, MockOllama(latency="fixed:0") as fast:
+        def client(max_concurrency):
+            client = OllamaClient(**client_kwargs(
+                endpoints=EndpointPool([(slow.url, 10), (fast.url, 1)]),
+                timeouts=warm_timeouts(),
+                hedge_budget=HedgeBudget(ratio=0.05, burst=1),
+                scheduler=LLMScheduler(max_concurrency=max_concurrency),
+            ))
+            client.hedge = True
+            client.compare_candidate_with_jd(CANDIDATE, JOB)
+            return client
+
+        # The request's own slot is the only one: no hedge, budget untouched
+        saturated = client(1)
+        assert fast.stats()["requests"] == 0
+        assert saturated.metrics.stats()["compare_candidate_with_jd"]["hedges"] == 0
+        assert saturated.hedge_budget.stats()["denied"] == 0
+
+        hedged = client(2)
+        assert fast.stats()["requests"] == 1
+        assert hedged.metrics.stats()["compare_candidate_with_jd"]["hedges"] == 1
+        deadline = time.monotonic() + 2
+        while hedged.scheduler.stats()["active"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert hedged.scheduler.stats()["active"] == 0
+
+def test_async_hedge_budget_exhausted_waits_for_primary(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PREFIX_AFFINITY", False)
+
+    async def run(slow, fast):
+        client = AsyncOllamaClient(**client_kwargs(
+            endpoints=EndpointPool([(slow.url, 10), (fast.url, 1)]),
+            timeouts=warm_timeouts(),
+            hedge_budget=HedgeBudget(ratio=0.05, burst=0),
+        ))
+        client.hedge = True
+        try:
+            await client.compare_candidate_with_jd(CANDIDATE, JOB)
+        finally:
+            await client.aclose()
+        return client
+
+    with MockOllama(latency="fixed:0.3") as slow, MockOllama(latency="fixed:0") as fast:
+        client = asyncio.run(run(slow, fast))
+        assert fast.stats()["requests"] == 0
+        assert client.hedge_budget.stats()["denied"] == 1
@@ -0,0 +1,68 @@
+import asyncio
+
+from app.schemas.llm import JDScore
+from app.services.llm_metrics import LLMMetrics, instrumented
+from app.services.llm_resilience import AdaptiveTimeouts
+from app.services.ollama_service import TASK_JD_SCORE
+from conftest import CANDIDATE, JOB, make_client
+from mock_ollama import MockOllama
+
+
+def test_latency_and_tokens_per_method():
+    with MockOllama(latency="fixed:0.06") as mock:
+        client = make_client(mock.url)
+        client.compare_candidate_with_jd(CANDIDATE, JOB)
+        client.extract_email_from_resume("ada@example.com")
+        stats = client.metrics.stats()
+
+    jd = stats["compare_candidate_with_jd"]
+    assert jd["calls"] == 1 and jd["fallbacks"] == 0
+    assert jd["latency"]["buckets"]["0.05"] == 0 and jd["latency"]["buckets"]["0.1"] == 1
+    assert jd["tokens"]["requests"] == 1 and jd["tokens"]["prompt"] > 0 and jd["tokens"]["completion"] > 0
+    assert stats["extract_email_from_resume"]["calls"] == 1
+
+
+def test_failures_are_recorded_by_cause():
+    with MockOllama(error_rate=1.0) as mock:
+        client = make_client(mock.url)
+        client.compare_candidate_with_jd(CANDIDATE, JOB)
+        jd = client.metrics.stats()["compare_candidate_with_jd"]
+        assert jd["failures"]["http_error"] == 1 and jd["fallbacks"] == 1
+
+    with MockOllama(malformed_rate=1.0) as mock:
+        client = make_client(mock.url)
+        client.compare_candidate_with_jd(CANDIDATE, JOB)
+        jd = client.metrics.stats()["compare_candidate_with_jd"]
+        assert jd["failures"]["parse"] == client._parse_attempts(JDScore) and jd["fallbacks"] == 1
+
+    with MockOllama(responses={"JDScore": '{"score": 7}'}) as mock:
+        client = make_client(mock.url)
+        assert client.compare_candidate_with_jd(CANDIDATE, JOB) == 1.0
+        assert client.metrics.stats()["compare_candidate_with_jd"]["failures"]["clamp"] == 1
+
+    with MockOllama(hang_rate=1.0, hang_seconds=0.5) as mock:
+        client = make_client(mock.url, timeouts=AdaptiveTimeouts({TASK_JD_SCORE: 0.1}))
+        client.compare_candidate_with_jd(CANDIDATE, JOB)
+        assert client.metrics.stats()["compare_candidate_with_jd"]["failures"]["timeout"] == 1
+        assert client.metrics.recent_failures()[-1]["cause"] == "timeout"
+
+
+def test_instrumented_attributes_nested_async_calls():
+    class Fake:
+        def __init__(self):
+            self.metrics = LLMMetrics()
+
+        @instrumented
+        async def outer(self):
+            self.metrics.record_usage(1, 1)
+            await self.inner()
+
+        @instrumented
+        async def inner(self):
+            self.metrics.record_usage(5, 5)
+
+    fake = Fake()
+    asyncio.run(fake.outer())
+    stats = fake.metrics.stats()
+    assert stats["outer"]["tokens"]["prompt"] == 1 and stats["inner"]["tokens"]["prompt"] == 5
+    assert 'llm_tokens_total{method="inner",kind="prompt"} 5' in fake.metrics.prometheus()
@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+from app.services.llm_resilience import CLOSED, HALF_OPEN, OPEN, AdaptiveTimeouts, CircuitBreaker, HedgeBudget, RetryPolicy
+from conftest import run_with_async_client
+from mock_ollama import MockOllama
+
+
+def test_breaker_opens_then_half_opens_with_single_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()["rejected_calls"] == 2
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_adaptive_timeout_follows_latency_and_is_capped():
+    timeouts = AdaptiveTimeouts({"jd_score": 30.0, "rank_resumes": 120.0},
+                                percentile=0.9, multiplier=2.0, min_timeout=1.0, min_samples=5)
+    assert timeouts.timeout("jd_score") == 30.0
+    for _ in range(10):
+        timeouts.record("jd_score", 1.5)
+        timeouts.record("rank_resumes", 100.0)
+    assert timeouts.timeout("jd_score") == 3.0
+    assert timeouts.timeout("rank_resumes") == 120.0
+    timeouts.record("tiny", 0.01)
+    assert timeouts.stats()["jd_score"] == {"samples": 10, "timeout_seconds": 3.0}
+
+
+def test_retry_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(attempts=5, base_delay=0.5, max_delay=2.0, seed=1)
+    delays = [policy.delay(retry) for retry in range(1, 6)]
+    assert 0 <= delays[0] <= 0.5 and 0 <= delays[1] <= 1.0
+    assert all(d <= 2.0 for d in delays)
+    assert policy.retryable_status(503) and policy.retryable_status(429)
+    assert not policy.retryable_status(400)
+
+
+def test_hedge_budget_limits_hedges_to_a_share_of_requests():
+    budget = HedgeBudget(ratio=0.25, burst=1)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    for _ in range(4):
+        budget.record_request()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    assert budget.stats()["hedges"] == 2 and budget.stats()["denied"] == 2
+
+
+def test_cancelled_probe_lets_the_next_call_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+
+    async def run(client):
+        caller = asyncio.create_task(client.compare_candidate_with_jd({"name": "Ada"}, {"jd_text": "Python"}))
+        await asyncio.sleep(0.1)
+        assert not breaker.allow()  # the probe is still out
+        # Cancel the shared request itself, not just one caller waiting on it
+        for request in list(client._inflight._tasks.values()):
+            request.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        return await client.compare_candidate_with_jd({"name": "Ada"}, {"jd_text": "Python"}, default=None)
+
+    time.sleep(0.06)
+    with MockOllama(latency="fixed:0.3") as mock:
+        assert run_with_async_client(mock.url, run, circuit_breaker=breaker) is not None
+    assert breaker.state == CLOSED
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from app.services.llm_resilience import AdaptiveTimeouts
+from app.services.llm_router import LOCAL, REMOTE, LLMRouter, RemoteLLMClient, parse_task_map
+from app.services.llm_scheduler import LLMScheduler
+from app.services.ollama_endpoints import EndpointPool
+from app.services.ollama_service import TASK_JD_SCORE, TASK_RANK, OllamaClient
+from conftest import CANDIDATE, JOB, client_kwargs
+from mock_ollama import MockOllama
+
+
+def node_kwargs(url):
+    return client_kwargs(
+        endpoints=EndpointPool([(url, 1)]), scheduler=LLMScheduler(max_concurrency=1),
+        timeouts=AdaptiveTimeouts({TASK_JD_SCORE: 5.0}, min_samples=1),
+    )
+
+
+@pytest.fixture
+def clients():
+    local = OllamaClient(**node_kwargs("http://127.0.0.1:9"))
+    remote = RemoteLLMClient(api_key="sk-test", **node_kwargs("http://127.0.0.1:10"))
+    return local, remote
+
+
+def test_parse_task_map_rejects_unknown_tasks():
+    assert parse_task_map("jd_score=auto, rank_resumes=remote") == {"jd_score": "auto", "rank_resumes": "remote"}
+    assert parse_task_map("jd_score=2.5", float) == {"jd_score": 2.5}
+    with pytest.raises(ValueError):
+        parse_task_map("scoring=auto")
+    with pytest.raises(ValueError):
+        LLMRouter(None, routes={"jd_score": "cloud"})
+
+
+def test_configured_routes_and_cost_budget(clients):
+    local, remote = clients
+    router = LLMRouter(local, remote, routes={TASK_RANK: REMOTE}, default_route=LOCAL, remote_max_per_minute=1)
+    assert router.client_for(TASK_JD_SCORE) is local
+    assert router.route(TASK_RANK) == (REMOTE, "configured")
+    # The second remote call in the minute is over budget and stays local
+    assert router.route(TASK_RANK) == (LOCAL, "remote_budget_exhausted")
+    assert router.stats()["calls"][TASK_RANK] == {LOCAL: 1, REMOTE: 1}
+
+    assert LLMRouter(local).route(TASK_RANK) == (LOCAL, "no_remote")
+
+
+def test_auto_overflows_on_queue_depth_and_latency_budget(clients):
+    local, remote = clients
+    router = LLMRouter(local, remote, routes={}, default_route="auto", overflow_queue_depth=1,
+                       latency_budgets={TASK_RANK: 1.0}, remote_max_per_minute=0)
+    assert router.route(TASK_JD_SCORE) == (LOCAL, "auto")
+
+    # Hold the only local slot and queue one request behind it
+    def queued():
+        with local.scheduler.slot():
+            pass
+
+    slot = local.scheduler.slot()
+    slot.__enter__()
+    waiter = threading.Thread(target=queued)
+    waiter.start()
+    while local.scheduler.queue_depth() < 1:
+        time.sleep(0.01)
+    assert router.route(TASK_JD_SCORE) == (REMOTE, "local_queue_depth")
+    slot.__exit__(None, None, None)
+    waiter.join()
+
+    local.timeouts.record(TASK_RANK, 3.0)
+    assert router.route(TASK_RANK) == (REMOTE, "local_latency_budget")
+
+
+def test_router_exposes_the_client_interface():
+    with MockOllama(responses={"JDScore": '{"score": 0.1}'}) as local_mock, \
+            MockOllama(responses={"JDScore": '{"score": 0.9}'}) as remote_mock:
+        local = OllamaClient(**node_kwargs(local_mock.url))
+        remote = RemoteLLMClient(api_key="sk-test", **node_kwargs(remote_mock.url))
+        assert remote.session.headers["Authorization"] == "Bearer sk-test"
+        assert "keep_alive" not in remote._transport_payload({"messages": []})
+
+        router = LLMRouter(local, remote, routes={TASK_JD_SCORE: REMOTE}, remote_max_per_minute=0)
+        assert router.compare_candidate_with_jd(CANDIDATE, JOB) == 0.9
+        router.routes[TASK_JD_SCORE] = LOCAL
+        assert router.compare_candidate_with_jd(CANDIDATE, JOB) == 0.1
+        assert router.scoring_concurrency() == local.scoring_concurrency()
+        assert router.scoring_concurrency(3) == 3
+        with pytest.raises(AttributeError):
+            router.not_a_method
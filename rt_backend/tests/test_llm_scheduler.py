@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+
+from app.services.llm_scheduler import BULK, INTERACTIVE, LLMScheduler
+
+
+def test_concurrency_cap_is_respected():
+    scheduler = LLMScheduler(max_concurrency=2, lane_weights={INTERACTIVE: 1, BULK: 1})
+    peak = []
+    running = [0]
+    lock = threading.Lock()
+
+    def work():
+        with scheduler.slot(BULK):
+            with lock:
+                running[0] += 1
+                peak.append(running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert max(peak) == 2
+    stats = scheduler.stats()
+    assert stats["active"] == 0
+    assert stats["lanes"][BULK]["granted"] == 8
+
+
+def test_interactive_lane_is_preferred_but_bulk_is_not_starved():
+    scheduler = LLMScheduler(max_concurrency=1, lane_weights={INTERACTIVE: 3, BULK: 1})
+    order = []
+
+    async def job(lane, i):
+        async with scheduler.async_slot(lane):
+            order.append(lane)
+            await asyncio.sleep(0)
+
+    async def run():
+        # Hold the only slot so every job below has to queue
+        async with scheduler.async_slot(INTERACTIVE):
+            tasks = [asyncio.create_task(job(BULK, i)) for i in range(4)]
+            tasks += [asyncio.create_task(job(INTERACTIVE, i)) for i in range(6)]
+            await asyncio.sleep(0.01)
+            assert scheduler.queue_depth() == 10
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order[:4].count(INTERACTIVE) == 3
+    assert BULK in order[:4]
+    assert len(order) == 10
+
+
+def test_cancelled_async_waiter_leaves_queue():
+    scheduler = LLMScheduler(max_concurrency=1)
+
+    async def run():
+        async with scheduler.async_slot(INTERACTIVE):
+            waiter = asyncio.create_task(scheduler.async_slot(BULK).__aenter__())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            assert scheduler.queue_depth() == 0
+        assert scheduler.stats()["active"] == 0
+
+    asyncio.run(run())
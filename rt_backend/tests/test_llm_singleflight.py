@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import time
+
+from app.services.llm_singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_threads_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"score": 0.9}
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"score": 0.9}] * 5
+    assert flight.stats() == {"leaders": 1, "shared": 4, "in_flight": 0}
+
+
+def test_thread_errors_propagate_and_key_is_released():
+    flight = SingleFlight()
+
+    def boom():
+        raise RuntimeError("down")
+
+    try:
+        flight.do("k", boom)
+    except RuntimeError:
+        pass
+    assert flight.do("k", lambda: 1) == 1
+
+
+def test_tasks_share_one_call():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 0.7
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", slow) for _ in range(5)))
+
+    assert asyncio.run(run()) == [0.7] * 5
+    assert len(calls) == 1
+    assert flight.stats()["in_flight"] == 0
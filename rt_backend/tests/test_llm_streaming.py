@@ -0,0 +1,49 @@
+import json
+
+from app.services.llm_streaming import StreamAccumulator
+
+
+def sse(content=None, finish_reason=None):
+    delta = {} if content is None else {"content": content}
+    return "data: " + json.dumps({"choices": [{"delta": delta, "finish_reason": finish_reason}]})
+
+
+def test_stops_once_json_object_closes():
+    stream = StreamAccumulator()
+    parts = ['{"sco', 're": 0.', '8', '}', " because the candidate", " knows Python"]
+    consumed = 0
+    for part in parts:
+        consumed += 1
+        if stream.feed_line(sse(part)):
+            break
+    assert consumed == 4
+    assert stream.complete and not stream.finished
+    assert stream.response()["choices"][0]["message"]["content"] == '{"score": 0.8}'
+
+
+def test_braces_inside_strings_do_not_close_object():
+    stream = StreamAccumulator()
+    assert not stream.feed_line(sse('{"reasoning": "uses } and \\" in text", "x": {"y": 1}'))
+    assert stream.feed_line(sse("}  trailing"))
+    assert json.loads(stream.content)["x"] == {"y": 1}
+
+
+def test_plain_text_reads_to_done_and_keeps_usage():
+    stream = StreamAccumulator()
+    assert not stream.feed_line(": keep-alive comment")
+    assert not stream.feed_line(sse("0.75"))
+    # The usage chunk still has to come after the finish_reason
+    assert not stream.feed_line(sse(finish_reason="stop"))
+    assert stream.feed_line('data: {"choices": [], "usage": {"prompt_tokens": 5, "completion_tokens": 1}}')
+    assert stream.feed_line("data: [DONE]")
+    response = stream.response()
+    assert response["choices"][0]["message"]["content"] == "0.75"
+    assert response["choices"][0]["finish_reason"] == "stop"
+    assert response["usage"]["completion_tokens"] == 1
+
+
+def test_stream_without_usage_reads_to_done():
+    stream = StreamAccumulator()
+    assert not stream.feed_line(sse("0.75", finish_reason="stop"))
+    assert stream.feed_line("data: [DONE]")
+    assert stream.finished and stream.usage is None
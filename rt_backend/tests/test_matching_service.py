@@ -0,0 +1,35 @@
+import pytest
+
+from app.db import models
+from app.services import matching_service
+from conftest import make_client
+from mock_ollama import MockOllama
+
+
+@pytest.fixture
+def db(db):
+    db.add(models.Job(id=1, title="Backend Engineer", jd_text="Python FastAPI Docker", max_budget=100))
+    db.add(models.Candidate(email="ada@example.com", name="Ada", resume_text="Skills\nPython FastAPI Docker",
+                           resume_path="ada.pdf", current_ctc=80, expected_ctc=100))
+    db.add(models.Candidate(email="bob@example.com", name="Bob", resume_text="Skills\nCOBOL",
+                           resume_path="bob.pdf", current_ctc=120, expected_ctc=150))
+    db.commit()
+    return db
+
+
+def test_candidates_are_keyed_by_email(db, monkeypatch):
+    with MockOllama() as mock:
+        client = make_client(mock.url)
+        monkeypatch.setattr(matching_service, "get_llm_router", lambda: client)
+        job = db.get(models.Job, 1)
+        candidates = db.query(models.Candidate).all()
+        jd_scores = matching_service.score_candidates_with_jd(candidates, job)
+        comparative = matching_service.compare_candidates(candidates, job)
+        jd_matches, _ = matching_service.match_candidates_with_job(db, 1)
+
+    assert set(jd_scores) == set(comparative) == {"ada@example.com", "bob@example.com"}
+    assert jd_scores["ada@example.com"] > jd_scores["bob@example.com"]
+    assert comparative["ada@example.com"] > comparative["bob@example.com"]
+    assert [c.email for c in jd_matches] == ["ada@example.com", "bob@example.com"]
+    match = db.get(models.CandidateJobMatch, ("ada@example.com", 1))
+    assert match.jd_match_score == jd_scores["ada@example.com"]
@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+from app.schemas.llm import JDScore
+from conftest import make_client
+from mock_ollama import LatencyModel, MockOllama
+
+JOB = {"id": 1, "title": "Backend Engineer", "jd_text": "Python FastAPI PostgreSQL Docker Kubernetes", "min_budget": 10, "max_budget": 20}
+RESUME = "Ada Lovelace\nada@example.com\n\nSkills\nPython, FastAPI, Docker\n\nExperience\n6 years of backend work\n"
+
+
+def test_latency_specs():
+    assert LatencyModel("fixed:0.25").sample() == 0.25
+    assert all(0.1 <= LatencyModel("uniform:0.1,0.2", seed=1).sample() <= 0.2 for _ in range(20))
+    with pytest.raises(ValueError):
+        LatencyModel("uniform:0.1")
+
+
+def test_rule_based_answers_are_deterministic():
+    with MockOllama() as mock:
+        client = make_client(mock.url)
+        details = client.extract_candidate_details(RESUME)
+        assert details["email"] == "ada@example.com" and details["full_name"] == "Ada Lovelace"
+        assert {"python", "fastapi", "docker"} <= set(details["skills"])
+
+        weak = dict(name="B", resume_text="Skills\nCOBOL")
+        strong = dict(name="A", resume_text=RESUME)
+        first = client.compare_candidate_with_jd(strong, JOB)
+        assert first == client.compare_candidate_with_jd(strong, JOB)
+        assert first > client.compare_candidate_with_jd(weak, JOB)
+
+        scores = client.score_candidates_with_jd([dict(strong, id="a"), dict(weak, id="b")], JOB)
+        assert scores["a"] > scores["b"]
+        assert mock.stats()["by_schema"]["BatchJDScores"] == 1
+
+
+def test_canned_responses_and_error_injection():
+    with MockOllama(responses={"JDScore": '{"score": 0.42}'}) as mock:
+        assert make_client(mock.url).compare_candidate_with_jd({"resume_text": RESUME}, JOB) == 0.42
+
+    with MockOllama(error_rate=1.0) as mock:
+        # Every request fails; the client falls back to its neutral default
+        assert make_client(mock.url).compare_candidate_with_jd({"resume_text": RESUME}, JOB) == 0.5
+        assert mock.stats()["injected_errors"] == 1
+
+    with MockOllama(malformed_rate=1.0) as mock:
+        client = make_client(mock.url)
+        assert client.compare_candidate_with_jd({"resume_text": RESUME}, JOB) == 0.5
+        assert mock.stats()["malformed"] == client._parse_attempts(JDScore)
+        assert client.parse_stats.stats()["jd_score"]["exhausted"] == 1
+
+
+def test_concurrency_limit_queues_extra_requests():
+    with MockOllama(latency="fixed:0.05", concurrency=2) as mock:
+        client = make_client(mock.url)
+        threads = [
+            threading.Thread(target=client.compare_candidate_with_jd, args=({"resume_text": f"{RESUME} {i}"}, JOB))
+            for i in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = mock.stats()
+        assert stats["requests"] == 6 and stats["max_in_flight"] == 2
@@ -0,0 +1,57 @@
+from app.services.ollama_endpoints import EndpointPool, parse_endpoints
+
+
+def test_parse_endpoints_with_weights():
+    assert parse_endpoints("http://gpu1:11434|3, http://cpu1:11434/") == [
+        ("http://gpu1:11434", 3),
+        ("http://cpu1:11434", 1),
+    ]
+    assert parse_endpoints("") == []
+
+
+def test_least_outstanding_respects_weight():
+    pool = EndpointPool([("http://a", 2), ("http://b", 1)], failure_threshold=2, probe_interval=1)
+    picked = [pool.acquire().url for _ in range(3)]
+    assert picked.count("http://a") == 2
+    assert picked.count("http://b") == 1
+
+
+def test_consecutive_failures_eject_and_probe_readmits():
+    pool = EndpointPool([("http://a", 1), ("http://127.0.0.1:9", 1)], failure_threshold=2, probe_interval=1)
+    bad = pool.endpoints[1]
+    for _ in range(2):
+        bad.outstanding += 1
+        pool.release(bad, success=False, error="boom")
+    assert not bad.healthy
+    assert all(pool.acquire().url == "http://a" for _ in range(3))
+
+    # Nothing listens on port 9, so the probe keeps it ejected
+    assert pool.probe(bad) is False
+    assert not bad.healthy
+
+
+def test_affinity_pins_key_to_one_healthy_node():
+    pool = EndpointPool([("http://a", 1), ("http://b", 1), ("http://c", 1)], failure_threshold=1, probe_interval=1,
+                        affinity_max_outstanding=0)
+    picked = {pool.acquire("job-1-prefix").url for _ in range(5)}
+    assert len(picked) == 1
+    assert len({pool.acquire(f"job-{i}").url for i in range(30)}) == 3
+
+    # If the pinned node is ejected the key moves, and only that key's traffic moves
+    pinned = next(e for e in pool.endpoints if e.url in picked)
+    pinned.healthy = False
+    assert pool.acquire("job-1-prefix").url not in picked
+
+
+def test_saturated_affinity_node_overflows_to_least_loaded():
+    pool = EndpointPool([("http://a", 1), ("http://b", 1)], failure_threshold=1, probe_interval=1,
+                        affinity_max_outstanding=2)
+    picked = [pool.acquire("job-1-prefix").url for _ in range(4)]
+    pinned = picked[0]
+    assert picked[:2] == [pinned, pinned]
+    assert pinned not in picked[2:]
+
+    # Once the pinned node has room again the key goes back to it
+    endpoint = next(e for e in pool.endpoints if e.url == pinned)
+    pool.release(endpoint, success=True)
+    assert pool.acquire("job-1-prefix").url == pinned
@@ -0,0 +1,19 @@
+from app.services.ollama_endpoints import EndpointPool
+from app.services.ollama_warmup import ModelWarmer, parse_keep_alive
+
+
+def test_parse_keep_alive():
+    assert parse_keep_alive("30m") == "30m"
+    assert parse_keep_alive("-1") == -1
+    assert parse_keep_alive("600") == 600
+
+
+def test_unreachable_node_is_not_ready():
+    # Nothing listens on port 9
+    pool = EndpointPool([("http://127.0.0.1:9", 1)], failure_threshold=1, probe_interval=1)
+    warmer = ModelWarmer(pool, models=["llama3.2"], keep_alive="5m", ping_interval=60, load_timeout=1)
+    assert not warmer.ready
+    assert warmer.warm_all() is False
+    status = warmer.status()
+    assert status["ready"] is False
+    assert status["nodes"][0]["last_error"]
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from app.db import models
+from app.services.openai_batch import (
+    LocalBatchBackend, build_batch_requests, ingest_batch_results, run_batch, score_custom_id, write_batch_file,
+)
+from conftest import make_client
+from mock_ollama import MockOllama
+
+RESUME = "Ada Lovelace\nada@example.com\n\nSkills\nPython, FastAPI, Docker\n\nExperience\n6 years of backend work\n"
+
+
+@pytest.fixture
+def db(db):
+    db.add(models.Job(id=1, title="Backend Engineer", jd_text="Python FastAPI Docker", max_budget=100, status="active"))
+    db.add(models.Job(id=2, title="Old role", jd_text="COBOL", status="closed"))
+    db.add(models.Candidate(email="ada@example.com", resume_text=RESUME, expected_ctc=100))
+    db.add(models.Candidate(email="bob@example.com", name="Bob", resume_text="Skills\nCOBOL", expected_ctc=150))
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def client():
+    return make_client("http://127.0.0.1:9")
+
+
+def test_batch_file_covers_active_jobs_and_extractions(db, client, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.openai_batch.settings.OPENAI_MODEL", "gpt-test")
+    lines = build_batch_requests(db, extract=True, client=client)
+    assert [line["custom_id"] for line in lines] == [
+        "score:1:ada@example.com", "score:1:bob@example.com", "extract:ada@example.com", "extract:bob@example.com",
+    ]
+    assert all(line["url"] == "/v1/chat/completions" and line["body"]["model"] == "gpt-test" for line in lines)
+    assert lines[0]["body"]["response_format"]["json_schema"]["name"] == "JDScore"
+
+    path = write_batch_file(lines, str(tmp_path / "batch.jsonl"))
+    with open(path) as f:
+        assert [json.loads(line)["custom_id"] for line in f] == [line["custom_id"] for line in lines]
+
+
+def test_ingest_upserts_matches_and_skips_failures(db, client, tmp_path):
+    db.add(models.CandidateJobMatch(candidate_email="bob@example.com", job_id=1, jd_match_score=0.9, comparative_score=0.2))
+    db.commit()
+
+    def responder(body):
+        # Bob's request fails; Ada scores 0.8
+        if "COBOL" in json.dumps(body):
+            raise RuntimeError("rate limited")
+        return {"choices": [{"message": {"role": "assistant", "content": '{"score": 0.8}'}}]}
+
+    backend = LocalBatchBackend(responder=responder)
+    path = write_batch_file(build_batch_requests(db, job_ids=[1], client=client), str(tmp_path / "batch.jsonl"))
+    batch_id = backend.submit(path)
+    assert backend.status(batch_id) == {"id": batch_id, "status": "completed", "total": 2, "completed": 1, "failed": 1}
+
+    assert ingest_batch_results(db, batch_id, backend, client) == {"scored": 1, "extracted": 0, "failed": 1, "skipped": 0}
+    ada = db.query(models.CandidateJobMatch).filter_by(candidate_email="ada@example.com", job_id=1).one()
+    assert ada.jd_match_score == 0.8 and ada.overall_score == round(0.8 * 0.4 + 0.5 * 0.3 + 1.0 * 0.3, 3)
+    bob = db.query(models.CandidateJobMatch).filter_by(candidate_email="bob@example.com", job_id=1).one()
+    assert bob.jd_match_score == 0.9
+    assert score_custom_id(1, "ada@example.com") == "score:1:ada@example.com"
+
+
+def test_unparseable_scores_are_failed_and_not_stored(db, client, tmp_path):
+    db.add(models.CandidateJobMatch(candidate_email="bob@example.com", job_id=1, jd_match_score=0.9, model_name="m"))
+    db.commit()
+
+    backend = LocalBatchBackend(responder=lambda body: {
+        "model": "m", "choices": [{"message": {"role": "assistant", "content": '{"verdict": "good"}'}}],
+    })
+    path = write_batch_file(build_batch_requests(db, job_ids=[1], client=client), str(tmp_path / "batch.jsonl"))
+    batch_id = backend.submit(path)
+
+    assert ingest_batch_results(db, batch_id, backend, client) == {"scored": 0, "extracted": 0, "failed": 2, "skipped": 0}
+    bob = db.query(models.CandidateJobMatch).filter_by(candidate_email="bob@example.com", job_id=1).one()
+    assert bob.jd_match_score == 0.9 and bob.resume_hash is None
+    assert db.query(models.CandidateJobMatch).filter_by(candidate_email="ada@example.com").first() is None
+
+
+def test_run_batch_against_mock_ollama(db, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.openai_batch.settings.OPENAI_BATCH_DIR", str(tmp_path))
+    with MockOllama() as mock:
+        client = make_client(mock.url)
+        monkeypatch.setattr("app.services.openai_batch.get_ollama_client", lambda: client)
+        result = run_batch(db, extract=True, backend=LocalBatchBackend(base_url=mock.url), poll_interval=0)
+
+    assert result["status"] == "completed"
+    assert result["ingested"] == {"scored": 2, "extracted": 2, "failed": 0, "skipped": 0}
+    ada = db.query(models.Candidate).filter_by(email="ada@example.com").one()
+    assert ada.name == "Ada Lovelace" and "python" in json.loads(ada.additional_info)["skills"]
+    scores = {m.candidate_email: m.jd_match_score for m in db.query(models.CandidateJobMatch).filter_by(job_id=1)}
+    assert scores["ada@example.com"] > scores["bob@example.com"]
@@ -0,0 +1,72 @@
+from app.services.prompt_builder import PromptBuilder, TokenCounter, pack_batches, split_sections
+
+RESUME = """Ada Lovelace
+ada@example.com
+
+Summary
+""" + "Enthusiastic engineer who loves long summaries. " * 40 + """
+Skills
+Python, FastAPI, SQL
+
+Work Experience
+Senior engineer at Analytical Engines, 2015-2024
+
+Education
+BSc Mathematics
+"""
+
+
+def make_builder(num_ctx=400):
+    return PromptBuilder(TokenCounter(model="llama3.2", tokenizer="heuristic"), num_ctx=num_ctx)
+
+
+def test_split_sections_in_document_order():
+    names = [name for name, _ in split_sections(RESUME)]
+    assert names == ["header", "summary", "skills", "experience", "education"]
+
+
+def test_fit_keeps_skills_and_experience_before_summary():
+    builder = make_builder()
+    fitted = builder.fit(RESUME, 60)
+    assert builder.counter.count(fitted) <= 60
+    assert "Python, FastAPI" in fitted
+    assert "Analytical Engines" in fitted
+    assert fitted.index("Python") < fitted.index("Analytical")
+
+
+def test_build_never_exceeds_context_window():
+    builder = make_builder(num_ctx=300)
+
+    def render(jd, resumes):
+        return "Score the candidates.\nJD:\n" + jd + "".join(f"\nRESUME {i}:\n{r}" for i, r in enumerate(resumes))
+
+    prompt = builder.build(render, reserve=50, jd="Must know Python. " * 200, resumes=[RESUME, RESUME, "Short resume"])
+    assert builder.counter.count(prompt) <= builder.limit - 50
+    assert "Short resume" in prompt
+    assert "Must know Python" in prompt
+
+
+def test_short_inputs_are_untouched():
+    builder = make_builder(num_ctx=4096)
+    prompt = builder.build(lambda jd, resumes: jd + "|" + resumes[0], reserve=32, jd="JD", resumes=[RESUME])
+    assert prompt == "JD|" + RESUME
+
+
+def test_stable_jd_is_identical_for_every_candidate():
+    builder = make_builder(num_ctx=300)
+    jd = "Must know Python. " * 200
+
+    def render(jd, resumes):
+        return [{"role": "system", "content": "JD:\n" + jd}, {"role": "user", "content": resumes[0]}]
+
+    short = builder.build(render, reserve=32, jd=jd, resumes=["Short resume"], stable_jd=True)
+    long = builder.build(render, reserve=32, jd=jd, resumes=[RESUME * 3], stable_jd=True)
+    assert short[0] == long[0]
+    assert builder.count_prompt(long) <= builder.limit - 32
+
+
+def test_pack_batches_respects_budget_and_ceiling():
+    assert pack_batches([10, 10, 10, 10, 10], budget=30, max_items=8) == [[0, 1, 2], [3, 4]]
+    assert pack_batches([10, 10, 10, 10, 10], budget=100, max_items=2) == [[0, 1], [2, 3], [4]]
+    # Too big to share a prompt: packed alone, order kept
+    assert pack_batches([5, 50, 5], budget=20, max_items=8) == [[0], [1], [2]]
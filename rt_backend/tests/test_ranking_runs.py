@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.db import models
+from app.services.llm_resilience import LLMUnavailableError
+from app.services.ranking_lock import JobRankingLock, JobRankingLocked
+from app.services.ranking_runs import CANCELLED, COMPLETED, FAILED, RUNNING, RankingRunManager, run_status
+from conftest import run_with_async_client
+from mock_ollama import MockOllama
+
+pytestmark = pytest.mark.usefixtures("job_pool")
+
+OPTIONS = {"cascade": None, "batch_size": 1, "concurrency": 1, "incremental": True}
+
+
+def run_with_manager(mock, session_factory, scenario):
+    return run_with_async_client(mock.url, lambda client: scenario(RankingRunManager(session_factory, llm_client=client)))
+
+
+def status_of(session_factory, run_id):
+    db = session_factory()
+    try:
+        return run_status(db.get(models.RankingRun, run_id))
+    finally:
+        db.close()
+
+
+def test_run_reports_progress_and_stores_results(session_factory):
+    async def scenario(manager):
+        started = manager.submit(1, OPTIONS)
+        # Re-submitting while the job is being ranked returns the same run
+        assert manager.submit(1, OPTIONS)["run_id"] == started["run_id"]
+        await asyncio.sleep(0.25)
+        during = status_of(session_factory, started["run_id"])
+        await manager.wait(started["run_id"])
+        return started, during
+
+    with MockOllama(latency="fixed:0.1") as mock:
+        started, during = run_with_manager(mock, session_factory, scenario)
+
+    assert started["status"] == "queued"
+    assert during["status"] == RUNNING and 0 < during["scored"] < 4 and during["eta_seconds"] is not None
+    done = status_of(session_factory, started["run_id"])
+    assert done["status"] == COMPLETED and done["scored"] == 4 and done["progress"] == 1.0
+    assert done["summary"]["incremental"]["inserted"] == 4
+    db = session_factory()
+    assert all(m.comparative_score is not None for m in db.query(models.CandidateJobMatch).all())
+    db.close()
+
+
+def test_cancelled_run_keeps_what_it_scored(session_factory):
+    async def scenario(manager):
+        run_id = manager.submit(1, OPTIONS)["run_id"]
+        task = manager._tasks[run_id]
+        await asyncio.sleep(0.5)
+        assert manager.cancel(run_id)
+        await manager.wait(run_id)
+        assert task.cancelled()
+        assert not manager.cancel(run_id)
+        return run_id
+
+    with MockOllama(latency="fixed:0.3") as mock:
+        run_id = run_with_manager(mock, session_factory, scenario)
+
+    status = status_of(session_factory, run_id)
+    assert status["status"] == CANCELLED and 0 < status["scored"] < 4
+    db = session_factory()
+    matches = db.query(models.CandidateJobMatch).all()
+    # Stored as they finished, waiting for the comparative pass
+    assert len(matches) == status["scored"] and all(m.comparative_score is None for m in matches)
+    db.close()
+
+
+def test_run_fails_for_a_missing_job_and_orphans_are_recovered(session_factory):
+    async def scenario(manager):
+        run_id = manager.submit(99, OPTIONS)["run_id"]
+        await manager.wait(run_id)
+        return run_id
+
+    with MockOllama() as mock:
+        run_id = run_with_manager(mock, session_factory, scenario)
+    status = status_of(session_factory, run_id)
+    assert status["status"] == FAILED and status["errors"] == ["Job not found"]
+
+    db = session_factory()
+    db.add(models.RankingRun(id="orphan", job_id=1, status=RUNNING, scored=0, failed=0))
+    db.commit()
+    db.close()
+    assert RankingRunManager(session_factory).recover() == 1
+    assert status_of(session_factory, "orphan")["status"] == FAILED
+
+
+def test_job_lock_admits_one_holder_until_released_or_expired(session_factory):
+    first, second = JobRankingLock(1, session_factory), JobRankingLock(1, session_factory)
+    first.acquire()
+    with pytest.raises(JobRankingLocked):
+        second.acquire()
+    assert first.heartbeat() and not second.heartbeat()
+    first.release()
+    second.acquire()
+
+    db = session_factory()
+    db.get(models.RankingLock, 1).heartbeat_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    db.commit()
+    db.close()
+    # The holder stopped beating: its lock can be taken over
+    first.acquire()
+    assert not second.heartbeat()
+
+
+def test_runs_of_other_live_workers_are_left_alone(session_factory):
+    now = datetime.now(timezone.utc)
+    db = session_factory()
+    db.add(models.RankingRun(id="elsewhere", job_id=1, status=RUNNING, scored=0, failed=0, owner="other", heartbeat_at=now))
+    db.add(models.RankingLock(job_id=1, token="t", owner="other", run_id="elsewhere", heartbeat_at=now))
+    db.commit()
+    db.close()
+
+    async def scenario(manager):
+        assert manager.recover() == 0
+        # The other worker's run is returned rather than duplicated
+        assert manager.submit(1, OPTIONS)["run_id"] == "elsewhere"
+
+        db = session_factory()
+        expired = now - timedelta(hours=1)
+        db.get(models.RankingRun, "elsewhere").heartbeat_at = expired
+        db.get(models.RankingLock, 1).heartbeat_at = expired
+        db.commit()
+        db.close()
+        run_id = manager.submit(1, OPTIONS)["run_id"]
+        await manager.wait(run_id)
+        return run_id
+
+    with MockOllama() as mock:
+        run_id = run_with_manager(mock, session_factory, scenario)
+
+    assert run_id != "elsewhere" and status_of(session_factory, run_id)["status"] == COMPLETED
+    assert status_of(session_factory, "elsewhere")["status"] == FAILED
+    db = session_factory()
+    assert db.get(models.RankingLock, 1).token is None
+    db.close()
+
+
+def test_failed_candidates_survive_the_llm_going_down(session_factory):
+    class DownClient:
+        def scoring_concurrency(self, concurrency=None):
+            return concurrency or 1
+
+        async def score_candidates_with_jd(self, *args, **kwargs):
+            raise LLMUnavailableError("Ollama is down")
+
+        async def compare_candidates(self, *args, **kwargs):
+            await asyncio.sleep(1)
+
+    async def run():
+        manager = RankingRunManager(session_factory, llm_client=DownClient())
+        run_id = manager.submit(1, OPTIONS)["run_id"]
+        await manager.wait(run_id)
+        return run_id
+
+    status = status_of(session_factory, asyncio.run(run()))
+    # Every group is tried before the error stops the run
+    assert status["status"] == FAILED and status["failed"] == 4
+    assert status["errors"] == ["1 candidates: Ollama is down"] * 4 + ["LLM unavailable: Ollama is down"]
@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.ranking_lock import JobRankingLock
+from app.services.ranking_stream import ranking_events, sse
+from conftest import run_with_async_client
+from mock_ollama import MockOllama
+
+pytestmark = pytest.mark.usefixtures("job_pool")
+
+
+def parse(raw: str):
+    lines = raw.strip().split("\n")
+    return lines[0].removeprefix("event: "), json.loads(lines[1].removeprefix("data: "))
+
+
+def collect(mock, session_factory, job_id=1, **options):
+    async def run(client):
+        return [raw async for raw in ranking_events(job_id, session_factory, keepalive=0.05, llm_client=client, **options)]
+
+    return run_with_async_client(mock.url, run)
+
+
+def test_candidates_stream_before_the_final_ranking(session_factory):
+    with MockOllama(latency="fixed:0.1") as mock:
+        raw = collect(mock, session_factory, batch_size=1, concurrency=1)
+
+    assert ": keep-alive\n\n" in raw
+    events = [parse(event) for event in raw if not event.startswith(":")]
+    names = [name for name, _ in events]
+    assert names == ["started", "candidate", "candidate", "candidate", "candidate", "ranking"]
+    assert events[0][1] == {"total_candidates": 4, "to_score": 4}
+    assert all(data["jd_match_score"] > 0 and not data["reused"] for name, data in events if name == "candidate")
+    final = events[-1][1]
+    assert [r["overall_score"] for r in final["rankings"]] == sorted((r["overall_score"] for r in final["rankings"]), reverse=True)
+
+    with MockOllama() as mock:
+        events = [parse(event) for event in collect(mock, session_factory) if not event.startswith(":")]
+        assert mock.stats()["requests"] == 0
+    assert [name for name, _ in events] == ["started"] + ["candidate"] * 4 + ["ranking"]
+    assert all(data["reused"] for name, data in events if name == "candidate")
+
+
+def test_missing_job_is_an_error_event(session_factory):
+    with MockOllama() as mock:
+        assert collect(mock, session_factory, job_id=99) == [sse("error", {"status_code": 404, "detail": "Job not found"})]
+
+
+def test_job_ranked_elsewhere_is_a_conflict(session_factory):
+    lock = JobRankingLock(1, session_factory)
+    lock.acquire()
+    with MockOllama() as mock:
+        events = collect(mock, session_factory)
+        assert mock.stats()["requests"] == 0
+    assert [parse(event)[1]["status_code"] for event in events] == [409]
+    lock.release()
+    with MockOllama() as mock:
+        assert parse(collect(mock, session_factory)[-1])[0] == "ranking"
+
+
+class SlowToCancelClient:
+    """Scoring that takes a while to wind down once cancelled."""
+
+    def __init__(self):
+        self.busy = 0
+
+    def scoring_concurrency(self, concurrency=None):
+        return concurrency or 1
+
+    async def _slow(self):
+        self.busy += 1
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.5)
+            raise
+        finally:
+            self.busy -= 1
+
+    async def score_candidates_with_jd(self, *args, **kwargs):
+        await self._slow()
+
+    async def compare_candidates(self, *args, **kwargs):
+        await self._slow()
+
+
+def test_session_outlives_a_ranking_that_is_still_winding_down(session_factory):
+    client = SlowToCancelClient()
+    sessions, closed_while_busy = [], []
+
+    def tracking_factory():
+        db = session_factory()
+        close = db.close
+        db.close = lambda: (closed_while_busy.append(client.busy > 0), close())
+        sessions.append(db)
+        return db
+
+    async def run():
+        started = asyncio.Event()
+
+        async def consume():
+            async for raw in ranking_events(1, tracking_factory, keepalive=5, llm_client=client):
+                started.set()
+
+        consumer = asyncio.create_task(consume())
+        await started.wait()
+        consumer.cancel()
+        # Cancelled again while the stream waits for the ranking to wind down
+        await asyncio.sleep(0.1)
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        assert client.busy
+        # The ranking finishes winding down on its own and only then lets go of the session
+        while client.busy:
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    assert len(closed_while_busy) == len(sessions) and not any(closed_while_busy)
@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.ollama_service import AsyncOllamaClient
+from app.services.ranking_service import scoring_model
+from app.services.scoring_cascade import CascadeConfig, cascade_jd_scores, select_for_escalation
+from conftest import client_kwargs
+from mock_ollama import MockOllama
+
+
+def test_select_for_escalation_band_and_top_k():
+    config = CascadeConfig(cheap_model="tiny", band_low=0.4, band_high=0.6, top_k=2)
+    scores = {"a": 0.95, "b": 0.9, "c": 0.5, "d": 0.1, "e": 0.8}
+    ambiguous, top = select_for_escalation(scores, config)
+    assert ambiguous == {"c"}
+    assert top == {"a", "b"}
+
+
+def test_invalid_band_is_rejected():
+    with pytest.raises(ValueError):
+        CascadeConfig(cheap_model="tiny", band_low=0.7, band_high=0.3)
+    with pytest.raises(ValueError):
+        CascadeConfig(cheap_model="tiny", top_k=-1)
+
+
+def scores_by_name(scores):
+    """JDScore responder answering with the score of the candidate named in the prompt."""
+    def respond(body):
+        prompt = json.dumps(body)
+        score = next(score for name, score in scores.items() if f"Name: {name}" in prompt)
+        return "not json" if score is None else json.dumps({"score": score})
+    return respond
+
+
+def test_cascade_escalates_ambiguous_top_and_unscored_candidates():
+    cheap = MockOllama(latency="fixed:0.01", responses={"JDScore": scores_by_name(
+        {"cand-a": 0.95, "cand-b": 0.9, "cand-c": 0.5, "cand-d": 0.1, "cand-e": None},
+    )})
+    full = MockOllama(latency="fixed:0.2", responses={"JDScore": scores_by_name(
+        {"cand-a": 0.7, "cand-b": 0.7, "cand-c": 0.6, "cand-d": 0.7, "cand-e": 0.3},
+    )})
+    config = CascadeConfig(cheap_model="tiny", band_low=0.4, band_high=0.6, top_k=1)
+    candidates = [(key, {"name": f"cand-{key}", "resume_text": "Python"}) for key in "abcde"]
+
+    async def run():
+        clients = [
+            AsyncOllamaClient(**client_kwargs(server.url, model=model))
+            for server, model in ((cheap, "tiny"), (full, "full"))
+        ]
+        try:
+            return await cascade_jd_scores(candidates, {"title": "Backend", "jd_text": "Python"}, config,
+                                           cheap_client=clients[0], full_client=clients[1], concurrency=1)
+        finally:
+            for client in clients:
+                await client.aclose()
+
+    with cheap, full:
+        scores, stats = asyncio.run(run())
+        assert full.stats()["by_schema"]["JDScore"] == 3
+
+    # a is the cheap top-1, c is inside the band, e got no valid cheap score
+    assert scores == {"a": 0.7, "b": 0.9, "c": 0.6, "d": 0.1, "e": 0.3}
+    assert (stats["stage1_scored"], stats["escalated"]) == (5, 3)
+    assert (stats["escalated_ambiguous"], stats["escalated_top_k"], stats["escalated_unscored"]) == (1, 1, 1)
+    assert stats["full_model"] == "full" and stats["band_low"] == 0.4
+
+    # Full-model time per escalated candidate, for the two it skipped, minus the cheap stage
+    expected = stats["stage2_seconds"] / 3 * 2 - stats["stage1_seconds"]
+    assert stats["estimated_seconds_saved"] == pytest.approx(expected, abs=0.01)
+    assert stats["estimated_seconds_saved"] > 0.2
+
+
+def test_cascade_thresholds_are_not_part_of_the_scoring_model():
+    narrow = CascadeConfig(cheap_model="tiny", band_low=0.4, band_high=0.6, top_k=1)
+    wide = CascadeConfig(cheap_model="tiny", band_low=0.2, band_high=0.8, top_k=10)
+    assert scoring_model(narrow) == scoring_model(wide) != scoring_model(CascadeConfig(cheap_model="other"))
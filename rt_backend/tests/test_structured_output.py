@@ -0,0 +1,60 @@
+import json
+
+from app.schemas.llm import JDScore
+from app.services.ollama_service import OllamaClient, ParseStats
+
+
+def completion(content):
+    return {"choices": [{"message": {"content": content}}]}
+
+
+def make_client():
+    return OllamaClient(base_url="http://127.0.0.1:1", parse_stats=ParseStats())
+
+
+def test_payload_carries_json_schema():
+    payload = make_client()._build_payload("prompt", JDScore)
+    assert payload["response_format"]["type"] == "json_schema"
+    assert payload["response_format"]["json_schema"]["name"] == "JDScore"
+    assert "score" in payload["response_format"]["json_schema"]["schema"]["properties"]
+
+
+def test_stop_sequences_are_only_sent_without_a_schema():
+    # A blank line may fall inside pretty-printed JSON
+    assert "stop" not in make_client()._build_payload("prompt", JDScore, stop=["\n\n"])
+    assert make_client()._build_payload("prompt", stop=["\n\n"])["stop"] == ["\n\n"]
+
+
+def test_parsers_return_typed_results():
+    client = make_client()
+    assert client._parse_jd_score(completion('{"score": 1.7}')) == 1.0
+    assert client._parse_email(completion('{"email": "a.b@example.com"}')) == "a.b@example.com"
+    assert client._parse_email(completion('{"email": null}')) is None
+
+    details = client._parse_details(completion(json.dumps({"full_name": "Ada", "skills": ["python"]})))
+    assert details["full_name"] == "Ada" and details["skills"] == ["python"] and details["phone"] is None
+    details = client._parse_details(completion('{"full_name": "Ada", "email": "Email: ada@example.com"}'))
+    assert details["email"] == "ada@example.com"
+
+    scores = client._parse_compare(
+        completion('{"scores": [{"id": 1, "score": 0.9}]}'),
+        [{"id": 1}, {"id": 2}],
+    )
+    assert scores == {1: 0.9, 2: 0.5}
+
+
+def test_invalid_output_is_counted_and_retried_until_exhausted():
+    client = make_client()
+    attempts = client._parse_attempts(JDScore)
+    bad = completion("The candidate scores 0.8")
+
+    for attempt in range(attempts - 1):
+        assert not client._accept(bad, JDScore, "jd_score", attempt)
+    assert not client._accept(bad, JDScore, "jd_score", attempts - 1)
+    assert client._accept(completion('{"score": 0.8}'), JDScore, "jd_score", 0)
+    # Transport failures are final; the method default applies
+    assert client._accept({}, JDScore, "jd_score", 0)
+
+    assert client.parse_stats.stats()["jd_score"] == {
+        "valid": 1, "invalid": attempts, "retried": attempts - 1, "exhausted": 1,
+    }
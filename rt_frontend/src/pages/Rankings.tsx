@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import {
     Box,
     Typography,
@@ -115,19 +115,37 @@ export default function Rankings() {
             .finally(() => setLoading(false))
     }, [selectedJobId])
 
-    // Trigger Ollama ranking
-    const handleRank = async () => {
+    // Stop a running ranking stream when the job changes or the page closes
+    const stopStream = useRef<(() => void) | null>(null)
+    useEffect(() => {
+        return () => {
+            stopStream.current?.()
+            stopStream.current = null
+            setRanking(false)
+        }
+    }, [selectedJobId])
+
+    // Trigger Ollama ranking; candidates appear as soon as each one is scored
+    const handleRank = () => {
         if (!selectedJobId) return
         setRanking(true)
         setError(null)
-        try {
-            const res = await rankingsApi.rankByJob(selectedJobId)
-            setRankings(res.rankings)
-        } catch {
-            setError('Ranking failed. Make sure Ollama is running.')
-        } finally {
-            setRanking(false)
-        }
+        stopStream.current = rankingsApi.streamRankByJob(selectedJobId, {
+            onCandidate: (result) =>
+                setRankings((prev) =>
+                    [...prev.filter((r) => r.candidate_email !== result.candidate_email), result].sort(
+                        (a, b) => b.overall_score - a.overall_score
+                    )
+                ),
+            onDone: (res) => {
+                setRankings(res.rankings)
+                setRanking(false)
+            },
+            onError: () => {
+                setError('Ranking failed. Make sure Ollama is running.')
+                setRanking(false)
+            },
+        })
     }
 
     // Update candidate status
@@ -224,7 +242,7 @@ export default function Rankings() {
                 {ranking && (
                     <Box sx={{ mt: 2 }}>
                         <Alert severity="info" sx={{ borderRadius: 2 }}>
-                            🧠 Ollama is analyzing resumes against the job description. This may take 30–60 seconds...
+                            🧠 Ollama is analyzing resumes against the job description. Candidates appear below as they are scored; the final order follows the comparative pass...
                         </Alert>
                         <LinearProgress sx={{ mt: 1, borderRadius: 2 }} />
                     </Box>
@@ -8,6 +8,7 @@ import {
     JobCreate,
     ProcessAndMatchResponse,
     RankingResponse,
+    RankingResult,
 } from '../types';
 
 // API base URL - defaults to local development
@@ -180,6 +181,32 @@ export const rankingsApi = {
         return response.data;
     },
 
+    // Rank with results streamed as server-sent events; returns a function that stops the stream
+    streamRankByJob: (
+        jobId: number,
+        handlers: {
+            onCandidate: (result: RankingResult) => void;
+            onDone: (response: RankingResponse) => void;
+            onError: (detail: string) => void;
+        }
+    ): (() => void) => {
+        const source = new EventSource(`${API_BASE_URL}/rank-by-job/${jobId}/stream`);
+        source.addEventListener('candidate', (event) => {
+            handlers.onCandidate(JSON.parse((event as MessageEvent).data));
+        });
+        source.addEventListener('ranking', (event) => {
+            source.close();
+            handlers.onDone(JSON.parse((event as MessageEvent).data));
+        });
+        // Either an "error" event from the server (with a detail) or a lost connection
+        source.addEventListener('error', (event) => {
+            source.close();
+            const data = (event as MessageEvent).data;
+            handlers.onError(data ? JSON.parse(data).detail : 'Lost connection to the ranking stream');
+        });
+        return () => source.close();
+    },
+
     getRankings: async (jobId: number): Promise<RankingResponse> => {
         const response = await api.get(`/rankings/${jobId}`);
         return response.data;